@@ -0,0 +1,213 @@
+# ai_gateway.py - Gateway da IA (clientes reutilizados e limites de concorrência)
+
+"""
+Ponto único de acesso ao Gemini para os endpoints de IA.
+
+- Um cliente (GenerativeModel) por nome de modelo, criado uma vez e reutilizado
+- Geração sempre assíncrona (send_message_async / generate_content_async)
+- Limite global de chamadas em andamento e limite por usuário (ou por IP,
+  nas rotas sem login), para um único cliente não ocupar todas as vagas
+- Fila com tempo máximo de espera: quem não consegue vaga a tempo, ou chega
+  com a fila já cheia, recebe 429 com Retry-After em vez de ficar pendurado
+
+Nos streams a vaga fica ocupada até o último evento (ou até o cliente desconectar).
+Um relatório por seções ocupa uma vaga do usuário, e cada seção só uma vaga global.
+
+Configuração (variáveis de ambiente):
+    AI_MAX_CONCURRENT   chamadas ao modelo em andamento no total (padrão: 16)
+    AI_MAX_PER_USER     chamadas em andamento por usuário/IP (padrão: 2)
+    AI_MAX_WAITING      requisições esperando vaga; acima disso 429 na hora (padrão: 64)
+    AI_QUEUE_TIMEOUT    segundos esperando vaga antes do 429 (padrão: 5)
+"""
+
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import os
+
+from fastapi import HTTPException
+
+from chat_stream import get_model, stream_reply
+
+MAX_CONCURRENT = int(os.environ.get("AI_MAX_CONCURRENT", "16"))
+MAX_PER_USER = int(os.environ.get("AI_MAX_PER_USER", "2"))
+MAX_WAITING = int(os.environ.get("AI_MAX_WAITING", "64"))
+QUEUE_TIMEOUT = float(os.environ.get("AI_QUEUE_TIMEOUT", "5"))
+
+
+class Lease:
+    """Vaga ocupada no gateway; release() pode ser chamado mais de uma vez."""
+
+    def __init__(self, gateway: "AIGateway", user: Optional[str], global_slot: bool):
+        self._gateway = gateway
+        self._user = user
+        self._global_slot = global_slot
+        self._generation = gateway._generation
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            if self._generation == self._gateway._generation:  # vagas de antes do reset() já foram esquecidas
+                self._gateway._release(self._user, user_slot=self._user is not None, global_slot=self._global_slot)
+
+
+class AIGateway:
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, max_per_user: int = MAX_PER_USER,
+                 max_waiting: int = MAX_WAITING, queue_timeout: float = QUEUE_TIMEOUT):
+        self.max_concurrent = max_concurrent
+        self.max_per_user = max_per_user
+        self.max_waiting = max_waiting
+        self.queue_timeout = queue_timeout
+        self._clients = {}
+        self._global = None
+        self._users: Dict[str, list] = {}  # usuário -> [semáforo, referências]
+        self._generation = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def client(self, model_name: str):
+        """Cliente do modelo, criado na primeira chamada."""
+        model = self._clients.get(model_name)
+        if model is None:
+            model = self._clients[model_name] = get_model(model_name)
+        return model
+
+    # ----- Vagas -----
+
+    def _reject(self, detail: str):
+        self.rejected += 1
+        raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(max(1, int(self.queue_timeout)))})
+
+    def _user_semaphore(self, user: str) -> asyncio.Semaphore:
+        entry = self._users.get(user)
+        if entry is None:
+            entry = self._users[user] = [asyncio.Semaphore(self.max_per_user), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release(self, user: Optional[str], user_slot: bool = True, global_slot: bool = False):
+        if global_slot:
+            self._global.release()
+            self.in_flight -= 1
+            self.completed += 1
+        if user is not None:
+            entry = self._users[user]
+            if user_slot:
+                entry[0].release()
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._users[user]
+
+    async def _acquire(self, semaphore: asyncio.Semaphore, timeout: float):
+        if not semaphore.locked():
+            await semaphore.acquire()
+        else:
+            await asyncio.wait_for(semaphore.acquire(), timeout=max(timeout, 0.001))
+
+    async def acquire(self, user: Optional[str], global_slot: bool = True) -> Lease:
+        """
+        Espera vaga do usuário e vaga global (prazo total de queue_timeout); 429 se não der.
+        user=None pega só a vaga global (chamadas dentro de uma vaga de usuário
+        já ocupada, como as seções de um relatório); global_slot=False só a do usuário.
+        """
+        if self._global is None:
+            self._global = asyncio.Semaphore(self.max_concurrent)
+        if self.waiting >= self.max_waiting:
+            self._reject("Serviço de IA sobrecarregado. Tente novamente em instantes.")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.queue_timeout
+        user_semaphore = self._user_semaphore(user) if user is not None else None
+        holding_user = False
+        self.waiting += 1
+        try:
+            if user_semaphore is not None:
+                await self._acquire(user_semaphore, deadline - loop.time())
+                holding_user = True
+            if global_slot:
+                await self._acquire(self._global, deadline - loop.time())
+        except BaseException as e:
+            self._release(user, user_slot=holding_user)
+            if isinstance(e, asyncio.TimeoutError):
+                if user_semaphore is not None and not holding_user:
+                    self._reject("Muitas solicitações simultâneas à IA para este usuário. Aguarde as anteriores terminarem.")
+                self._reject("Serviço de IA ocupado. Tente novamente em instantes.")
+            raise
+        finally:
+            self.waiting -= 1
+        if global_slot:
+            self.in_flight += 1
+        return Lease(self, user, global_slot)
+
+    # ----- Chamadas -----
+
+    async def chat(self, model_name: str, history: List[dict], message: str, user: str) -> str:
+        lease = await self.acquire(user)
+        try:
+            chat = self.client(model_name).start_chat(history=history)
+            response = await chat.send_message_async(message)
+            return response.text
+        finally:
+            lease.release()
+
+    async def generate(self, model_name: str, prompt: str, user: str, within: Optional[Lease] = None) -> str:
+        """within: vaga de usuário já ocupada pelo chamador; aí só a vaga global é pedida."""
+        lease = await self.acquire(None if within is not None else user)
+        try:
+            response = await self.client(model_name).generate_content_async(prompt)
+            return response.text
+        finally:
+            lease.release()
+
+    async def stream_chat(
+        self,
+        model_name: str,
+        history: List[dict],
+        message: str,
+        user: str,
+        on_complete: Optional[Callable[[str], Awaitable[dict]]] = None,
+    ):
+        """
+        Ocupa a vaga antes de abrir o stream (o 429 sai como status HTTP, não
+        no meio dos eventos). Retorna (lease, eventos SSE); a vaga é liberada
+        ao fim dos eventos, e o chamador deve liberar também no fim da resposta
+        para o caso de o stream nunca começar.
+        """
+        lease = await self.acquire(user)
+        try:
+            chat = self.client(model_name).start_chat(history=history)
+        except BaseException:
+            lease.release()
+            raise
+        return lease, self._leased(lease, stream_reply(chat, message, on_complete))
+
+    async def _leased(self, lease: Lease, events: AsyncIterator[str]) -> AsyncIterator[str]:
+        try:
+            async for event in events:
+                yield event
+        finally:
+            lease.release()
+
+    def reset(self):
+        """Esquece semáforos (presos ao event loop) no desligamento."""
+        self._generation += 1
+        self._global = None
+        self._users.clear()
+        self.in_flight = 0
+        self.waiting = 0
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_per_user": self.max_per_user,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "active_users": len(self._users),
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "models": sorted(self._clients),
+        }
+
+
+ai_gateway = AIGateway()
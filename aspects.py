@@ -0,0 +1,136 @@
+# aspects.py - Motor de Aspectos (NumPy)
+
+"""
+Cálculo vetorizado de aspectos.
+
+Em vez de comparar par a par em Python, monta a matriz de distâncias
+angulares entre todos os corpos de uma vez e compara com a tabela de
+aspectos inteira (N x N x K) numa única operação. Funciona para um mapa
+(vetor de N longitudes) ou para um lote de mapas (matriz B x N).
+
+Com a tabela padrão (MAJOR_ASPECTS, sem orbes por planeta) o resultado é
+idêntico ao do antigo laço de calculate_aspects, inclusive na ordem.
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+
+class AspectDef(NamedTuple):
+    name: str
+    angle: float
+    orb: float
+
+
+MAJOR_ASPECTS = [
+    AspectDef("Conjunção", 0, 8),
+    AspectDef("Oposição", 180, 8),
+    AspectDef("Quadratura", 90, 8),
+    AspectDef("Trígono", 120, 8),
+    AspectDef("Sextil", 60, 6),
+]
+
+MINOR_ASPECTS = [
+    AspectDef("Semissextil", 30, 2),
+    AspectDef("Semiquadratura", 45, 2),
+    AspectDef("Sesquiquadratura", 135, 2),
+    AspectDef("Quincúncio", 150, 3),
+    AspectDef("Quintil", 72, 2),
+    AspectDef("Biquintil", 144, 2),
+]
+
+
+class AspectTable:
+    """
+    Tabela de aspectos configurável.
+
+    planet_orbs: fator de orbe por corpo (ex.: {"Sol": 1.25, "Lua": 1.25}).
+    O orbe de um par é o orbe do aspecto vezes o maior fator dos dois corpos;
+    corpos fora do dicionário usam fator 1.
+    """
+
+    def __init__(self, aspects: Sequence[AspectDef] = MAJOR_ASPECTS,
+                 planet_orbs: Optional[Dict[str, float]] = None):
+        self.aspects = [AspectDef(*a) for a in aspects]
+        self.names = [a.name for a in self.aspects]
+        self.angles = np.array([a.angle for a in self.aspects], dtype=np.float64)
+        self.orbs = np.array([a.orb for a in self.aspects], dtype=np.float64)
+        self.planet_orbs = dict(planet_orbs or {})
+
+    def orb_matrix(self, bodies_a: Sequence[str], bodies_b: Sequence[str]) -> np.ndarray:
+        """Orbes (Na x Nb x K) para cada par de corpos e aspecto."""
+        if not self.planet_orbs:
+            return np.broadcast_to(self.orbs, (len(bodies_a), len(bodies_b), len(self.orbs)))
+        fa = np.array([self.planet_orbs.get(b, 1.0) for b in bodies_a])
+        fb = np.array([self.planet_orbs.get(b, 1.0) for b in bodies_b])
+        factor = np.maximum(fa[:, None], fb[None, :])
+        return factor[:, :, None] * self.orbs
+
+
+DEFAULT_TABLE = AspectTable()
+
+
+def angular_distance(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Menor distância angular (0..180) entre cada longitude de a e cada uma de b.
+    a: (..., Na), b: (..., Nb) -> (..., Na, Nb)
+    """
+    diff = np.abs(a[..., :, None] - b[..., None, :])
+    return np.minimum(diff, 360 - diff)
+
+
+def aspect_mask(distances: np.ndarray, orbs: np.ndarray, table: AspectTable) -> np.ndarray:
+    """(..., Na, Nb) distâncias -> (..., Na, Nb, K) booleano: par dentro do orbe do aspecto k."""
+    return np.abs(distances[..., None] - table.angles) <= orbs
+
+
+class AspectHit(NamedTuple):
+    i: int
+    j: int
+    aspect: str
+    angle: float
+    orb: float
+
+
+_UPPER = {}
+
+
+def _upper_triangle(n: int) -> np.ndarray:
+    """Máscara i < j (cacheada por tamanho)."""
+    if n not in _UPPER:
+        _UPPER[n] = np.triu(np.ones((n, n), dtype=bool), k=1)[:, :, None]
+    return _UPPER[n]
+
+
+def find_aspects(longitudes: Sequence[float], bodies: Sequence[str],
+                 table: AspectTable = DEFAULT_TABLE) -> List[AspectHit]:
+    """
+    Aspectos de um mapa: todos os pares i < j, na ordem (i, j, aspecto da tabela).
+    """
+    lon = np.asarray(longitudes, dtype=np.float64)
+    dist = angular_distance(lon, lon)
+    mask = aspect_mask(dist, table.orb_matrix(bodies, bodies), table)
+    mask &= _upper_triangle(len(lon))
+    i, j, k = np.nonzero(mask)
+    names, angles = table.names, table.angles.tolist()
+    return [
+        AspectHit(a, b, names[c], round(d, 2), round(abs(d - angles[c]), 2))
+        for a, b, c, d in zip(i.tolist(), j.tolist(), k.tolist(), dist[i, j].tolist())
+    ]
+
+
+def find_aspects_batch(longitudes: np.ndarray, bodies: Sequence[str],
+                       table: AspectTable = DEFAULT_TABLE):
+    """
+    Aspectos de um lote de mapas (B x N longitudes, mesmos corpos em todos).
+    Retorna arrays paralelos (mapa, i, j, k, ângulo, orbe) sem criar objetos por aspecto.
+    """
+    lon = np.asarray(longitudes, dtype=np.float64)
+    n = lon.shape[-1]
+    dist = angular_distance(lon, lon)  # (B, N, N)
+    mask = aspect_mask(dist, table.orb_matrix(bodies, bodies), table)
+    mask &= _upper_triangle(n)[None]
+    b, i, j, k = np.nonzero(mask)
+    angle = dist[b, i, j]
+    return b, i, j, k, angle, np.abs(angle - table.angles[k])
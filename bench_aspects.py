@@ -0,0 +1,81 @@
+"""
+Benchmark do motor de aspectos vetorizado (aspects.py) contra o laço original
+de calculate_aspects.
+
+1. Confere em mapas aleatórios que o resultado é idêntico (mesmos aspectos, na mesma ordem)
+2. Mede um mapa por vez e um lote de mapas
+
+Uso:
+    python bench_aspects.py [nº de mapas]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from aspects import MAJOR_ASPECTS, MINOR_ASPECTS, AspectTable, find_aspects, find_aspects_batch
+
+BODIES = [
+    "Sol", "Lua", "Mercúrio", "Vênus", "Marte", "Júpiter", "Saturno", "Urano", "Netuno",
+    "Plutão", "Quíron", "Lilith", "NóduloNorte", "NóduloSul", "Ascendente", "MeioCéu",
+]
+N_CHARTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+
+def legacy_aspects(degrees):
+    """Laço original de calculate_aspects (main.py), sobre longitudes 0-360."""
+    aspect_defs = [
+        ("Conjunção", 0, 8),
+        ("Oposição", 180, 8),
+        ("Quadratura", 90, 8),
+        ("Trígono", 120, 8),
+        ("Sextil", 60, 6)
+    ]
+    aspects = []
+    n = len(degrees)
+    for i in range(n):
+        for j in range(i + 1, n):
+            diff = abs(degrees[i] - degrees[j])
+            diff = min(diff, 360 - diff)
+            for asp_name, asp_angle, orb in aspect_defs:
+                if abs(diff - asp_angle) <= orb:
+                    aspects.append((i, j, asp_name, round(diff, 2), round(abs(diff - asp_angle), 2)))
+    return aspects
+
+
+def random_chart(rng):
+    # Graus com 2 casas decimais, como saem de PlanetPosition (inclui casos exatamente no limite do orbe)
+    return [round(rng.uniform(0, 360), 2) for _ in BODIES]
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    charts = [random_chart(rng) for _ in range(N_CHARTS)]
+    charts.append([0, 8, 16, 90, 98, 180, 188, 60, 66, 120, 128, 300, 240, 232, 352, 359.99])
+
+    print("🔍 Conferindo equivalência com o laço original...")
+    for degrees in charts:
+        assert [tuple(h) for h in find_aspects(degrees, BODIES)] == legacy_aspects(degrees), degrees
+    print(f"   ✅ {len(charts)} mapas idênticos")
+
+    print(f"\n⏱️  {N_CHARTS} mapas, {len(BODIES)} corpos")
+    _, t_legacy = timed(lambda: [legacy_aspects(c) for c in charts])
+    _, t_single = timed(lambda: [find_aspects(c, BODIES) for c in charts])
+    matrix = np.array(charts)
+    _, t_batch = timed(lambda: find_aspects_batch(matrix, BODIES))
+    print(f"   laço original       : {t_legacy * 1000:8.1f} ms ({t_legacy / len(charts) * 1e6:6.1f} µs/mapa)")
+    print(f"   vetorizado (1 a 1)  : {t_single * 1000:8.1f} ms ({t_single / len(charts) * 1e6:6.1f} µs/mapa)")
+    print(f"   vetorizado (lote)   : {t_batch * 1000:8.1f} ms ({t_batch / len(charts) * 1e6:6.1f} µs/mapa)")
+
+    full = AspectTable(MAJOR_ASPECTS + MINOR_ASPECTS, planet_orbs={"Sol": 1.25, "Lua": 1.25})
+    _, t_full = timed(lambda: find_aspects_batch(matrix, BODIES, full))
+    print(f"   lote + menores/orbes: {t_full * 1000:8.1f} ms ({t_full / len(charts) * 1e6:6.1f} µs/mapa)")
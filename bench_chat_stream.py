@@ -0,0 +1,80 @@
+"""
+Benchmark de carga do chat em streaming (/chat/stream).
+
+Abre streams SSE simultâneos contra uma API rodando e mede, do lado do
+cliente, o tempo até o primeiro token (TTFT), a duração total e tokens/s,
+junto com as métricas que o servidor manda no evento "done".
+
+Todos os streams saem do mesmo IP, então o limite por usuário do ai_gateway
+(AI_MAX_PER_USER) barra quase tudo com 429; para medir o streaming em si,
+suba a API com o modelo local de teste e limites altos:
+    CHAT_STUB_MODEL=1 AI_MAX_PER_USER=1000 AI_MAX_CONCURRENT=1000 AI_MAX_WAITING=1000 uvicorn main:app --port 8000 &
+    python bench_chat_stream.py [URL] [streams por conexão]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import json
+import statistics
+import sys
+import time
+
+import requests
+
+BASE_URL = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+STREAMS_PER_CONNECTION = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+LEVELS = [1, 8, 32, 128]
+
+PAYLOAD = {"message": "Como o Sol em Leão na casa 10 aparece na carreira?", "history": []}
+
+
+def _stream(session: requests.Session):
+    """(ttft, duração, métricas do servidor) de um stream; None se recusado com 429."""
+    start = time.perf_counter()
+    ttft = None
+    server = {}
+    event = None
+    with session.post(f"{BASE_URL}/chat/stream", json=PAYLOAD, stream=True, timeout=300) as r:
+        if r.status_code == 429:
+            return None
+        r.raise_for_status()
+        for line in r.iter_lines(decode_unicode=True):
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                if event == "token" and ttft is None:
+                    ttft = time.perf_counter() - start
+                elif event == "done":
+                    server = json.loads(line[6:])["metrics"]
+                elif event == "error":
+                    raise RuntimeError(json.loads(line[6:])["detail"])
+    return ttft, time.perf_counter() - start, server
+
+
+def _pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def run_level(concurrency: int, total: int):
+    sessions = [requests.Session() for _ in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: _stream(sessions[i % concurrency]), range(total)))
+    elapsed = time.perf_counter() - start
+    rejected = results.count(None)
+    results = [r for r in results if r is not None]
+
+    ttft = [r[0] * 1000 for r in results if r[0] is not None]
+    duration = [r[1] * 1000 for r in results]
+    rate = [r[2]["tokens_per_second"] for r in results if r[2].get("tokens_per_second")]
+    server_ttft = [r[2]["ttft_ms"] for r in results if r[2].get("ttft_ms") is not None]
+    print(f"{concurrency:>4} | {total / elapsed:7.1f} streams/s | "
+          f"TTFT p50 {_pct(ttft, 0.5):6.0f} p95 {_pct(ttft, 0.95):6.0f} ms (servidor p50 {_pct(server_ttft, 0.5):6.0f}) | "
+          f"total p50 {_pct(duration, 0.5):6.0f} ms | tokens/s p50 {statistics.median(rate) if rate else 0:6.1f} | 429: {rejected}")
+
+
+if __name__ == "__main__":
+    print(f"🌊 {BASE_URL}/chat/stream, {STREAMS_PER_CONNECTION} streams por conexão")
+    for level in LEVELS:
+        run_level(level, level * STREAMS_PER_CONNECTION)
+    print(requests.get(f"{BASE_URL}/health", timeout=10).json().get("chat_stream"))
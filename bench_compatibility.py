@@ -0,0 +1,63 @@
+"""
+Benchmark do ranking de compatibilidade (compatibility.py).
+
+1. Confere score_matrix contra um laço simples par a par (poucos mapas).
+2. Mede a pontuação vetorizada + top-k com N mapas salvos.
+
+Uso:
+    python bench_compatibility.py [nº de mapas]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from aspects import DEFAULT_TABLE
+from chart_core import CHART_BODIES
+from compatibility import ASPECT_WEIGHTS, BODY_WEIGHTS, score_matrix, top_k
+
+N_CHARTS = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+TOP_K = 20
+
+
+def reference_score(query, row):
+    """Pontuação par a par, sem numpy."""
+    total = 0.0
+    for a, la in zip(CHART_BODIES, query):
+        for b, lb in zip(CHART_BODIES, row):
+            d = abs(la - lb) % 360
+            d = min(d, 360 - d)
+            for name, angle, orb in zip(DEFAULT_TABLE.names, DEFAULT_TABLE.angles.tolist(), DEFAULT_TABLE.orbs.tolist()):
+                weight = ASPECT_WEIGHTS.get(name, 0.0)
+                closeness = max(0.0, 1 - abs(d - angle) / orb)
+                total += weight * BODY_WEIGHTS.get(a, 1.0) * BODY_WEIGHTS.get(b, 1.0) * closeness
+    return total
+
+
+def main():
+    rng = random.Random(42)
+    n_bodies = len(CHART_BODIES)
+
+    query = np.array([rng.uniform(0, 360) for _ in range(n_bodies)])
+    sample = np.array([[rng.uniform(0, 360) for _ in range(n_bodies)] for _ in range(50)])
+    scores, _, _ = score_matrix(query, sample)
+    worst = max(abs(s - reference_score(query, row)) for s, row in zip(scores.tolist(), sample.tolist()))
+    print(f"Conferência: 50 mapas, maior diferença {worst:.2e}")
+    assert worst < 1e-2, "score_matrix diverge da referência"
+
+    matrix = np.random.default_rng(42).uniform(0, 360, (N_CHARTS, n_bodies)).astype(np.float32)
+    score_matrix(query, matrix[:100])  # aquecimento
+    t0 = time.perf_counter()
+    scores, _, _ = score_matrix(query, matrix)
+    t1 = time.perf_counter()
+    best = top_k(scores, TOP_K)
+    t2 = time.perf_counter()
+    assert np.array_equal(best, np.argsort(-scores, kind="stable")[:TOP_K]) or \
+        np.allclose(scores[best], np.sort(scores)[::-1][:TOP_K])
+    print(f"{N_CHARTS} mapas: pontuação {(t1 - t0) * 1000:.1f} ms, top-{TOP_K} {(t2 - t1) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Benchmark de concorrência da API (carga mista).
+
+Dispara requisições simultâneas contra uma API rodando e mede vazão e latência
+para vários níveis de concorrência. A carga mistura:
+- /calculate  (geocodificação + efemérides)
+- /health     (rota leve; deve continuar rápida mesmo com a API ocupada)
+
+Uso:
+    uvicorn main:app --port 8000 &
+    python bench_concurrency.py [URL] [nº de requisições por nível]
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import sys
+import time
+
+import requests
+
+BASE_URL = sys.argv[1] if len(sys.argv) > 1 else "http://localhost:8000"
+REQUESTS_PER_LEVEL = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+LEVELS = [1, 4, 16, 64]
+
+CITIES = [("São Paulo", "Brasil"), ("Rio de Janeiro", "Brasil"), ("Lisboa", "Portugal"), ("Paris", "França")]
+
+
+def _payload(i: int) -> dict:
+    city, country = CITIES[i % len(CITIES)]
+    return {
+        "date": f"{1 + i % 28:02d}/{1 + i % 12:02d}/{1950 + i % 60}",
+        "time": f"{i % 24:02d}:{i % 60:02d}",
+        "city": city,
+        "country": country,
+    }
+
+
+def _call(session: requests.Session, i: int):
+    start = time.perf_counter()
+    if i % 4 == 3:
+        kind = "health"
+        r = session.get(f"{BASE_URL}/health", timeout=60)
+    else:
+        kind = "calculate"
+        r = session.post(f"{BASE_URL}/calculate", json=_payload(i), timeout=60)
+    return kind, r.status_code, time.perf_counter() - start
+
+
+def run_level(concurrency: int, total: int):
+    sessions = [requests.Session() for _ in range(concurrency)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: _call(sessions[i % concurrency], i), range(total)))
+    elapsed = time.perf_counter() - start
+
+    def _pct(values, p):
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * p))] * 1000 if values else 0.0
+
+    calc = [t for kind, _, t in results if kind == "calculate"]
+    health = [t for kind, _, t in results if kind == "health"]
+    errors = sum(1 for _, status, _ in results if status != 200)
+    print(f"{concurrency:>5} | {total / elapsed:>8.1f} req/s | "
+          f"calculate p50 {statistics.median(calc) * 1000:>7.1f} ms p95 {_pct(calc, 0.95):>7.1f} ms | "
+          f"health p95 {_pct(health, 0.95):>7.1f} ms | erros {errors}")
+
+
+if __name__ == "__main__":
+    print(f"🧪 Benchmark de concorrência em {BASE_URL} ({REQUESTS_PER_LEVEL} req/nível)\n")
+    # Aquecimento (cache de geocodificação, pools, arquivos de efemérides)
+    for i in range(len(CITIES)):
+        requests.post(f"{BASE_URL}/calculate", json=_payload(i), timeout=60)
+    print("concor.|  vazão        | latência")
+    for level in LEVELS:
+        run_level(level, REQUESTS_PER_LEVEL)
@@ -0,0 +1,105 @@
+"""
+Benchmark da busca eletiva (electional.py) num período de 1 ano.
+
+1. Confere as bordas de cada janela com o Swiss Ephemeris direto (1 min
+   dentro = verdadeiro, 1 min fora = falso) e que a busca em blocos
+   paralelos devolve as mesmas janelas que a busca serial
+2. Mede: busca serial, em blocos num pool de processos, e a varredura
+   ingênua minuto a minuto estimada a partir de uma amostra
+
+Usa as tabelas de efemérides (EPHEMERIS_TABLE_DIR) quando cobrem o ano;
+sem elas a amostragem cai no swe.calc_ut e a diferença do paralelismo aparece mais.
+
+Uso:
+    python bench_electional.py [ano] [nº de processos]
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+import electional
+from electional import Condition
+from ephemeris_setup import init_ephemeris, init_worker
+from ephemeris_tables import datetime_to_jd, get_ephemeris_tables, jd_to_datetime
+
+YEAR = int(sys.argv[1]) if len(sys.argv) > 1 else datetime.utcnow().year
+WORKERS = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 2)
+LAT, LON = -23.55, -46.63  # São Paulo
+
+SCENARIOS = {
+    "Lua em Touro, Vênus direto, sem aspecto tenso a Marte": [
+        Condition("sign", "Lua", ("Touro",)),
+        Condition("retrograde", "Vênus", negate=True),
+        Condition("aspect", "*", ("hard",), "Marte", orb=3, negate=True),
+    ],
+    "+ Ascendente em Leão ou Virgem": [
+        Condition("sign", "Lua", ("Touro",)),
+        Condition("retrograde", "Vênus", negate=True),
+        Condition("aspect", "*", ("hard",), "Marte", orb=3, negate=True),
+        Condition("sign", "Ascendente", ("Leão", "Virgem")),
+    ],
+    "Mercúrio direto, Lua crescente na casa 10": [
+        Condition("retrograde", "Mercúrio", negate=True),
+        Condition("aspect", "Lua", ("Trígono", "Sextil"), "Sol"),
+        Condition("house", "Lua", (10,)),
+    ],
+}
+
+
+def check_edges(conditions, windows, jd_start, jd_end):
+    minute = 1.0 / 1440
+    for start, end in windows:
+        for jd, inside in ((start + minute, True), (end - minute, True), (start - minute, False), (end + minute, False)):
+            if jd_start <= jd <= jd_end and end - start > 2 * minute:
+                got = electional.evaluate_all(conditions, [jd], LAT, LON, exact=True)[0]
+                assert got == inside, (jd_to_datetime(start), jd_to_datetime(end), jd_to_datetime(jd), inside)
+
+
+def brute_force_estimate(conditions, jd_start, n=2000):
+    """Tempo de avaliar todas as condições (sem poda) em n minutos com swe direto, extrapolado para o ano."""
+    jds = jd_start + np.arange(n) / 1440
+    t0 = time.perf_counter()
+    for condition in conditions:
+        samples = electional.sample(jds, LAT, LON, condition.bodies, condition.needs_houses, exact=True)
+        electional.evaluate(condition, samples)
+    return (time.perf_counter() - t0) * (366 * 1440 / n)
+
+
+def run_parallel(pool, conditions, jd_start, jd_end):
+    futures = [pool.submit(electional.search, conditions, a, b, LAT, LON)
+               for a, b in electional.search_chunks(jd_start, jd_end)]
+    return electional.merge_windows([w for f in futures for w in f.result()])
+
+
+if __name__ == "__main__":
+    init_ephemeris()
+    jd_start = datetime_to_jd(datetime(YEAR, 1, 1))
+    jd_end = datetime_to_jd(datetime(YEAR + 1, 1, 1))
+    tables = get_ephemeris_tables()
+    using_tables = tables is not None and tables.covers(jd_start, jd_end)
+    print(f"📅 {YEAR}, {WORKERS} processos, tabelas de efemérides: {'sim' if using_tables else 'não (swe.calc_ut)'}")
+
+    with ProcessPoolExecutor(WORKERS, initializer=init_worker) as pool:
+        scenarios = {title: [electional.validate(c) for c in conds] for title, conds in SCENARIOS.items()}
+        run_parallel(pool, next(iter(scenarios.values())), jd_start, jd_start + 1)  # aquecimento
+        for title, conditions in scenarios.items():
+            t0 = time.perf_counter()
+            serial = electional.search(conditions, jd_start, jd_end, LAT, LON)
+            t_serial = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            parallel = run_parallel(pool, conditions, jd_start, jd_end)
+            t_parallel = time.perf_counter() - t0
+
+            assert len(serial) == len(parallel) and np.allclose(serial, parallel, atol=1e-6), "blocos divergem da busca serial"
+            check_edges(conditions, serial, jd_start, jd_end)
+            hours = sum(e - s for s, e in serial) * 24
+            print(f"\n🔭 {title}")
+            print(f"   {len(serial)} janelas, {hours:.0f} h no total, bordas conferidas ✅")
+            print(f"   serial {t_serial * 1000:8.0f} ms | paralelo {t_parallel * 1000:8.0f} ms | "
+                  f"minuto a minuto ~{brute_force_estimate(conditions, jd_start):.0f} s")
@@ -0,0 +1,51 @@
+"""
+Benchmark da tabela de casas (houses.py) contra a varredura linear original
+(find_house_with_orb, referência em test_houses.py, onde fica também a
+conferência de equivalência).
+
+Mede as formas num lote de mapas: a escalar (HouseTable.house) é a usada em
+compute_chart; houses() e assign_houses_batch só compensam em lotes.
+
+Uso:
+    python bench_houses.py [nº de mapas]
+"""
+
+import random
+import sys
+import time
+
+import numpy as np
+
+from ephemeris_setup import init_ephemeris
+from houses import HouseTable, assign_houses_batch
+from test_houses import N_BODIES, find_house_with_orb, random_cusps
+
+N_CHARTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    init_ephemeris()
+    rng = random.Random(7)
+
+    cusps = np.array([random_cusps(rng) for _ in range(N_CHARTS)])
+    longitudes = np.array([[rng.uniform(0, 360) for _ in range(N_BODIES)] for _ in range(N_CHARTS)])
+    cusps_list, lon_list = cusps.tolist(), longitudes.tolist()
+
+    print(f"⏱️  {N_CHARTS} mapas, {N_BODIES} corpos")
+    _, t_legacy = timed(lambda: [[find_house_with_orb(x, c) for x in row] for c, row in zip(cusps_list, lon_list)])
+    _, t_scalar = timed(lambda: [[t.house(x) for x in row] for t, row in ((HouseTable(c), r) for c, r in zip(cusps_list, lon_list))])
+    _, t_vector = timed(lambda: [HouseTable(c).houses(row) for c, row in zip(cusps, longitudes)])
+    _, t_batch = timed(lambda: assign_houses_batch(cusps, longitudes))
+    for label, t in [
+        ("varredura linear    ", t_legacy),
+        ("HouseTable.house    ", t_scalar),
+        ("HouseTable.houses   ", t_vector),
+        ("assign_houses_batch ", t_batch),
+    ]:
+        print(f"   {label}: {t * 1000:8.1f} ms ({t / N_CHARTS * 1e6:6.1f} µs/mapa)")
@@ -0,0 +1,49 @@
+"""
+Benchmark da varredura de retificação (rectification.py) num dia inteiro, minuto a minuto.
+
+1. Confere, em todos os 1440 minutos, longitudes e casas contra compute_chart
+   (casas idênticas; longitudes interpoladas com erro em segundos de arco)
+2. Mede: varredura incremental x um compute_chart completo por minuto
+
+Uso:
+    python bench_rectification.py [DD/MM/AAAA] [passo em minutos]
+"""
+
+from datetime import datetime
+import sys
+import time
+
+import numpy as np
+
+import rectification
+from chart_core import PLANETS_SWEPH, compute_chart
+from ephemeris_setup import init_ephemeris
+
+DAY = datetime.strptime(sys.argv[1], "%d/%m/%Y") if len(sys.argv) > 1 else datetime(2000, 1, 1)
+STEP = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+LAT, LON, TZ = -23.55, -46.63, "America/Sao_Paulo"  # São Paulo
+
+
+if __name__ == "__main__":
+    init_ephemeris()
+    local, jds = rectification.candidate_times(DAY, DAY.replace(hour=23, minute=59), STEP, TZ)
+
+    t0 = time.perf_counter()
+    result = rectification.sweep(jds, LAT, LON)
+    segments = rectification.segment_bounds(result)
+    t_sweep = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    charts = [compute_chart(jd, LAT, LON) for jd in jds]
+    t_full = time.perf_counter() - t0
+
+    longitude = np.array([c.longitude for c in charts])
+    house = np.array([c.house for c in charts])
+    error = np.abs((result.longitude - longitude + 180) % 360 - 180).max() * 3600
+    mismatches = int((result.house != house).sum())
+    assert mismatches == 0, f"{mismatches} casas divergem de compute_chart"
+
+    print(f"📅 {DAY:%d/%m/%Y}, {len(jds)} candidatos, {len(segments)} trechos")
+    print(f"   erro máximo de longitude {error:.4f}\", casas idênticas ✅")
+    print(f"   varredura {t_sweep * 1000:6.0f} ms ({result.ephemeris_calls} chamadas) | "
+          f"compute_chart por minuto {t_full * 1000:6.0f} ms ({len(jds) * (len(PLANETS_SWEPH) + 1)} chamadas)")
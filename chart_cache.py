@@ -0,0 +1,221 @@
+# chart_cache.py - Cache de Mapas Calculados
+
+"""
+Cache de mapas astrais em duas camadas.
+
+Depois de resolvidos (jd, lat, lon, sistema de casas) o cálculo é
+determinístico, então o resultado pode ser reaproveitado entre /calculate,
+/generate-report, /generate-chart-svg, /charts etc.
+
+1. LRU em memória com TTL (por processo)
+2. Tabela chart_cache no banco
+
+A chave inclui uma "impressão digital" das configurações de cálculo (arquivos
+de efemérides + versão do cálculo). Se os arquivos .se1 forem trocados, as
+chaves mudam sozinhas; purge_stale() apaga do banco o que ficou obsoleto e
+invalidate() é o gancho para limpar tudo manualmente.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Callable
+import hashlib
+import threading
+import os
+
+from database import SessionLocal
+from ephemeris_setup import ephemeris_fingerprint
+import models
+
+# Aumentar quando a lógica de compute_chart mudar (casas com orbe, formato do ChartArrays...)
+CHART_CACHE_VERSION = "2"
+
+CHART_CACHE_SIZE = int(os.environ.get("CHART_CACHE_SIZE", "2048"))
+CHART_CACHE_TTL = timedelta(seconds=int(os.environ.get("CHART_CACHE_TTL_SECONDS", str(7 * 24 * 3600))))
+
+
+class ChartCache:
+    """
+    LRU + TTL em memória e tabela no banco.
+    encode/decode convertem o valor em JSON para o banco e de volta.
+    """
+
+    def __init__(self, encode: Callable, decode: Callable,
+                 maxsize: int = CHART_CACHE_SIZE, ttl: timedelta = CHART_CACHE_TTL):
+        self.encode = encode
+        self.decode = decode
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.settings_hash = f"{CHART_CACHE_VERSION}-{ephemeris_fingerprint()}"
+        self._lru = OrderedDict()  # key -> (valor, expira_em)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.errors = 0
+
+    def key(self, jd: float, lat: float, lon: float, house_system: str = "P") -> str:
+        """Hash canônico do instante e local (jd em ~1 ms, coordenadas em ~1 m)."""
+        canonical = f"{jd:.8f}|{lat:.5f}|{lon:.5f}|{house_system}|{self.settings_hash}"
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    # ----- Memória -----
+
+    def get_memory(self, key: str):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= datetime.utcnow():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+    def _put_memory(self, key: str, value, expires_at: datetime):
+        with self._lock:
+            self._lru[key] = (value, expires_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+                self.evictions += 1
+
+    # ----- Banco -----
+
+    def get_db(self, key: str):
+        """Busca no banco (bloqueante) e promove para a memória."""
+        db = SessionLocal()
+        try:
+            row = db.query(models.ChartCache).filter(models.ChartCache.cache_key == key).first()
+            if row is None or row.expires_at <= datetime.utcnow():
+                self.misses += 1
+                return None
+            value = self.decode(row.chart_data)
+            self._put_memory(key, value, row.expires_at)
+            self.db_hits += 1
+            return value
+        except Exception:
+            self.errors += 1
+            return None
+        finally:
+            db.close()
+
+    def get(self, key: str):
+        """Memória e depois banco."""
+        value = self.get_memory(key)
+        if value is None:
+            value = self.get_db(key)
+        return value
+
+    def get_many(self, keys) -> dict:
+        """Vários mapas de uma vez (uma única consulta ao banco para o que não está em memória)."""
+        found = {}
+        missing = []
+        for key in keys:
+            value = self.get_memory(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if not missing:
+            return found
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            rows = db.query(models.ChartCache).filter(models.ChartCache.cache_key.in_(missing)).all()
+            for row in rows:
+                if row.expires_at > now:
+                    value = self.decode(row.chart_data)
+                    self._put_memory(row.cache_key, value, row.expires_at)
+                    found[row.cache_key] = value
+                    self.db_hits += 1
+        except Exception:
+            self.errors += 1
+        finally:
+            db.close()
+        self.misses += len(set(missing) - set(found))
+        return found
+
+    def put_many(self, items: dict):
+        """Grava vários mapas {chave: valor} numa única transação."""
+        expires_at = datetime.utcnow() + self.ttl
+        for key, value in items.items():
+            self._put_memory(key, value, expires_at)
+        db = SessionLocal()
+        try:
+            existing = {
+                row.cache_key: row for row in
+                db.query(models.ChartCache).filter(models.ChartCache.cache_key.in_(list(items))).all()
+            }
+            for key, value in items.items():
+                row = existing.get(key)
+                if row is None:
+                    row = models.ChartCache(cache_key=key)
+                    db.add(row)
+                row.chart_data = self.encode(value)
+                row.settings_hash = self.settings_hash
+                row.created_at = datetime.utcnow()
+                row.expires_at = expires_at
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.errors += 1
+        finally:
+            db.close()
+
+    def put(self, key: str, value):
+        self.put_many({key: value})
+
+    # ----- Invalidação -----
+
+    def invalidate(self):
+        """
+        Gancho para quando arquivos de efemérides ou o sistema de casas mudarem:
+        recalcula a impressão digital, limpa a memória e apaga o banco.
+        """
+        self.settings_hash = f"{CHART_CACHE_VERSION}-{ephemeris_fingerprint()}"
+        with self._lock:
+            self._lru.clear()
+        db = SessionLocal()
+        try:
+            db.query(models.ChartCache).delete()
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.errors += 1
+        finally:
+            db.close()
+
+    def purge_stale(self) -> int:
+        """Apaga do banco entradas expiradas ou de configurações antigas."""
+        db = SessionLocal()
+        try:
+            deleted = db.query(models.ChartCache).filter(
+                (models.ChartCache.settings_hash != self.settings_hash)
+                | (models.ChartCache.expires_at <= datetime.utcnow())
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception:
+            db.rollback()
+            self.errors += 1
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.db_hits
+        total = hits + self.misses
+        return {
+            "settings": self.settings_hash,
+            "memory_size": len(self._lru),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "errors": self.errors,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
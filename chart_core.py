@@ -0,0 +1,152 @@
+# chart_core.py - Representação Interna do Mapa
+
+"""
+Núcleo do cálculo do mapa astral, sem modelos de apresentação.
+
+O mapa é guardado em arrays (float64) por corpo: longitude, latitude,
+velocidade e casa. Todas as etapas internas (aspectos, Nodo Sul, casas,
+cache, sinastria...) usam as longitudes brutas; os modelos Pydantic
+(PlanetPosition, HouseInfo...) são montados só na borda da API, em main.py.
+
+Antes a longitude era quebrada em signo/grau arredondado a 2 casas e depois
+reconstruída com zodiac_signs.index(sign)*30 + degree, o que perdia precisão
+(orbes podiam virar nas bordas) e repetia buscas em lista.
+"""
+
+import os
+
+import numpy as np
+import swisseph as swe
+
+from houses import HouseTable
+
+# ========= Signos e Corpos =========
+
+zodiac_signs = [
+    "Áries", "Touro", "Gêmeos", "Câncer", "Leão", "Virgem",
+    "Libra", "Escorpião", "Sagitário", "Capricórnio", "Aquário", "Peixes"
+]
+
+PLANETS_SWEPH = {
+    "Sol": swe.SUN,
+    "Lua": swe.MOON,
+    "Mercúrio": swe.MERCURY,
+    "Vênus": swe.VENUS,
+    "Marte": swe.MARS,
+    "Júpiter": swe.JUPITER,
+    "Saturno": swe.SATURN,
+    "Urano": swe.URANUS,
+    "Netuno": swe.NEPTUNE,
+    "Plutão": swe.PLUTO,
+    "Quíron": swe.CHIRON,
+    "Lilith": swe.MEAN_APOG,
+    "NóduloNorte": swe.TRUE_NODE
+    # NóduloSul = +180° do NóduloNorte manualmente
+}
+
+# Ordem dos corpos no mapa: planetas, Nodo Sul e ângulos
+CHART_BODIES = list(PLANETS_SWEPH) + ["NóduloSul", "Ascendente", "MeioCéu"]
+
+# Corpos com orbe de transição de casa (os Nodos usam a casa nominal)
+HOUSE_ORB_MASK = np.array([b not in ("NóduloNorte", "NóduloSul") for b in CHART_BODIES[:-2]])
+_HOUSE_ORB_FLAGS = HOUSE_ORB_MASK.tolist()
+
+# Sistema de casas do Swiss Ephemeris ('P' = Placidus). Faz parte da chave do cache de mapas.
+HOUSE_SYSTEM = os.environ.get("HOUSE_SYSTEM", "P")
+
+# ========= Mapa em Arrays =========
+
+class ChartArrays:
+    """
+    Mapa calculado em forma compacta.
+
+    bodies: nomes na ordem de CHART_BODIES
+    longitude, latitude, speed: float64 por corpo (graus, graus, graus/dia)
+    house: int8 por corpo (1-12)
+    cusps: 12 cúspides (longitude, float64)
+    """
+
+    __slots__ = ("jd", "lat", "lon", "house_system", "bodies", "longitude", "latitude", "speed", "house", "cusps")
+
+    def __init__(self, jd, lat, lon, house_system, bodies, longitude, latitude, speed, house, cusps):
+        self.jd = jd
+        self.lat = lat
+        self.lon = lon
+        self.house_system = house_system
+        self.bodies = list(bodies)
+        self.longitude = np.asarray(longitude, dtype=np.float64)
+        self.latitude = np.asarray(latitude, dtype=np.float64)
+        self.speed = np.asarray(speed, dtype=np.float64)
+        self.house = np.asarray(house, dtype=np.int8)
+        self.cusps = np.asarray(cusps, dtype=np.float64)
+
+    @property
+    def retrograde(self) -> np.ndarray:
+        # Só os corpos calculados pelo Swiss Ephemeris; Nodo Sul e ângulos ficam sempre False
+        return (self.speed < 0) & np.isin(self.bodies, list(PLANETS_SWEPH))
+
+    @property
+    def ascendant(self) -> float:
+        return float(self.longitude[self.bodies.index("Ascendente")])
+
+    @property
+    def midheaven(self) -> float:
+        return float(self.longitude[self.bodies.index("MeioCéu")])
+
+    def index(self, body: str) -> int:
+        return self.bodies.index(body)
+
+    def to_dict(self) -> dict:
+        """Forma JSON (para o cache no banco)."""
+        return {
+            "jd": self.jd, "lat": self.lat, "lon": self.lon, "house_system": self.house_system,
+            "bodies": self.bodies,
+            "longitude": self.longitude.tolist(),
+            "latitude": self.latitude.tolist(),
+            "speed": self.speed.tolist(),
+            "house": self.house.tolist(),
+            "cusps": self.cusps.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChartArrays":
+        return cls(**data)
+
+
+def compute_chart(jd: float, lat: float, lon: float, house_system: str = HOUSE_SYSTEM) -> ChartArrays:
+    """
+    Efemérides e casas de um instante/local, sem nenhum arredondamento.
+    """
+    cusps, asc_mc = swe.houses(jd, lat, lon, house_system.encode())
+    n = len(CHART_BODIES)
+    longitude = np.zeros(n)
+    latitude = np.zeros(n)
+    speed = np.zeros(n)
+    house = np.zeros(n, dtype=np.int8)
+
+    for idx, (planet_name, code) in enumerate(PLANETS_SWEPH.items()):
+        pos, ret = swe.calc(jd, code)
+        if ret < 0:
+            raise RuntimeError(f"Erro ao calcular {planet_name}")
+        longitude[idx], latitude[idx], speed[idx] = pos[0], pos[1], pos[3]
+
+    # NóduloSul = NóduloNorte + 180°
+    nn = CHART_BODIES.index("NóduloNorte")
+    sn = CHART_BODIES.index("NóduloSul")
+    longitude[sn] = (longitude[nn] + 180) % 360
+    latitude[sn] = -latitude[nn]
+    speed[sn] = speed[nn]
+
+    # Casas por busca binária nas cúspides; para um mapa só, o bisect escalar
+    # por corpo sai mais barato que montar arrays (o NumPy fica para os lotes)
+    table = HouseTable(cusps)
+    for idx, (x, orb) in enumerate(zip(longitude[:sn + 1].tolist(), _HOUSE_ORB_FLAGS)):
+        house[idx] = table.house(x, orb)
+
+    # Ascendente (casa 1) e MeioCéu (casa 10)
+    asc = CHART_BODIES.index("Ascendente")
+    mc = CHART_BODIES.index("MeioCéu")
+    longitude[asc], house[asc] = asc_mc[0], 1
+    longitude[mc], house[mc] = asc_mc[1], 10
+
+    return ChartArrays(jd, lat, lon, house_system, CHART_BODIES, longitude, latitude, speed, house, cusps)
@@ -0,0 +1,251 @@
+# chat_stream.py - Streaming das Respostas da IA (SSE)
+
+"""
+Respostas do chat enviadas pedaço a pedaço como server-sent events, à medida
+que o Gemini gera, em vez de esperar a resposta inteira (10-30 s em leituras
+longas).
+
+Eventos:
+    event: token   data: {"text": "..."}
+    event: done    data: {..., "metrics": {"ttft_ms", "duration_ms", "tokens", "tokens_per_second"}}
+    event: error   data: {"detail": "..."}
+
+Métricas por stream (tempo até o primeiro token e tokens/s depois dele) vão
+no evento "done" e se acumulam em stream_stats, exposto no /health.
+
+Modelo local de teste (para carga sem rede e sem custo), ligado por ambiente:
+    CHAT_STUB_MODEL              "1" troca o Gemini pelo StubModel em get_model
+    CHAT_STUB_TTFT_MS            atraso até o primeiro pedaço (padrão: 400)
+    CHAT_STUB_TOKENS_PER_SECOND  ritmo de geração (padrão: 60)
+    CHAT_STUB_TOKENS             tokens por resposta (padrão: 300)
+    CHAT_STUB_FAILURE_RATE       fração das chamadas que falham, para testar novas tentativas (padrão: 0)
+"""
+
+from collections import deque
+from types import SimpleNamespace
+from typing import AsyncIterator, Awaitable, Callable, Optional
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+
+import google.generativeai as genai
+
+STUB_ENABLED = os.environ.get("CHAT_STUB_MODEL", "") not in ("", "0")
+STUB_TTFT_MS = float(os.environ.get("CHAT_STUB_TTFT_MS", "400"))
+STUB_TOKENS_PER_SECOND = float(os.environ.get("CHAT_STUB_TOKENS_PER_SECOND", "60"))
+STUB_TOKENS = int(os.environ.get("CHAT_STUB_TOKENS", "300"))
+STUB_FAILURE_RATE = float(os.environ.get("CHAT_STUB_FAILURE_RATE", "0"))
+
+# Tokens por pedaço enviado pelo stub (o Gemini manda pedaços de tamanho parecido)
+STUB_CHUNK_TOKENS = 8
+
+# Streams recentes usados nos percentis do /health
+STATS_WINDOW = 512
+
+STUB_WORDS = (
+    "Sol", "em", "Leão", "na", "casa", "10", "indica", "uma", "identidade", "que", "busca",
+    "reconhecimento", "e", "expressão", "criativa;", "a", "sombra", "aparece", "quando",
+    "o", "orgulho", "impede", "a", "escuta.", "Lua", "em", "Peixes", "trígono", "a", "Netuno",
+)
+
+
+# ========= Modelo Local de Teste =========
+
+class StubChunk:
+    def __init__(self, text: str, tokens: int):
+        self.text = text
+        # Contagem acumulada, como no usage_metadata do Gemini
+        self.usage_metadata = SimpleNamespace(candidates_token_count=tokens)
+
+
+class StubResponse:
+    """Mesmo uso da resposta do Gemini: `async for chunk in response` ou `.text` depois de resolve()."""
+
+    def __init__(self, prompt: str):
+        self._prompt = prompt
+        self._parts = []
+
+    async def __aiter__(self):
+        await asyncio.sleep(STUB_TTFT_MS / 1000)
+        if random.random() < STUB_FAILURE_RATE:
+            raise RuntimeError("Falha simulada do modelo local")
+        sent = 0
+        while sent < STUB_TOKENS:
+            n = min(STUB_CHUNK_TOKENS, STUB_TOKENS - sent)
+            if sent:
+                await asyncio.sleep(n / STUB_TOKENS_PER_SECOND)
+            words = [STUB_WORDS[(sent + i) % len(STUB_WORDS)] for i in range(n)]
+            text = " ".join(words) + " "
+            sent += n
+            self._parts.append(text)
+            yield StubChunk(text, sent)
+
+    async def resolve(self):
+        async for _ in self:
+            pass
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+
+class StubChat:
+    def __init__(self, history=None):
+        self.history = list(history or [])
+
+    async def send_message_async(self, content, stream: bool = False):
+        response = StubResponse(content)
+        if not stream:
+            await response.resolve()
+        return response
+
+
+class StubModel:
+    """Substituto local do genai.GenerativeModel (start_chat / generate_content_async)."""
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+
+    def start_chat(self, history=None) -> StubChat:
+        return StubChat(history)
+
+    async def generate_content_async(self, contents, stream: bool = False):
+        return await StubChat().send_message_async(contents, stream=stream)
+
+
+def get_model(name: str):
+    """Modelo do Gemini, ou o stub local quando CHAT_STUB_MODEL está ligado."""
+    return StubModel(name) if STUB_ENABLED else genai.GenerativeModel(name)
+
+
+# ========= Métricas =========
+
+def estimate_tokens(text: str) -> int:
+    """~4 caracteres por token (só quando o modelo não informa a contagem)."""
+    return max(1, len(text) // 4) if text else 0
+
+
+class StreamMetrics:
+    """Tempo até o primeiro token e ritmo de geração de um stream."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.first = None
+        self.end = None
+        self.estimated = 0
+        self.reported = 0
+
+    def chunk(self, text: str, usage=None):
+        if self.first is None and text:
+            self.first = time.perf_counter()
+        self.estimated += estimate_tokens(text)
+        # No Gemini a contagem do usage_metadata é acumulada
+        self.reported = max(self.reported, getattr(usage, "candidates_token_count", 0) or 0)
+
+    def finish(self) -> dict:
+        self.end = time.perf_counter()
+        tokens = self.reported or self.estimated
+        generating = self.end - self.first if self.first is not None else 0.0
+        return {
+            "ttft_ms": round((self.first - self.start) * 1000, 1) if self.first is not None else None,
+            "duration_ms": round((self.end - self.start) * 1000, 1),
+            "tokens": tokens,
+            "tokens_per_second": round(tokens / generating, 1) if generating > 0 else None,
+        }
+
+
+class StreamStats:
+    """Contadores e percentis dos streams recentes (para o /health)."""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.streams = 0
+        self.active = 0
+        self.errors = 0
+
+    def started(self):
+        with self._lock:
+            self.streams += 1
+            self.active += 1
+
+    def ended(self):
+        with self._lock:
+            self.active -= 1
+
+    def failed(self):
+        with self._lock:
+            self.errors += 1
+
+    def record(self, metrics: dict):
+        with self._lock:
+            self._recent.append((metrics["ttft_ms"], metrics["tokens_per_second"]))
+
+    def stats(self) -> dict:
+        with self._lock:
+            ttft = sorted(t for t, _ in self._recent if t is not None)
+            rate = sorted(r for _, r in self._recent if r is not None)
+
+        def pct(values, p):
+            return values[min(len(values) - 1, int(len(values) * p))] if values else None
+
+        return {
+            "streams": self.streams,
+            "active": self.active,
+            "errors": self.errors,
+            "ttft_ms_p50": pct(ttft, 0.5),
+            "ttft_ms_p95": pct(ttft, 0.95),
+            "tokens_per_second_p50": pct(rate, 0.5),
+        }
+
+
+stream_stats = StreamStats()
+
+
+# ========= SSE =========
+
+def sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def chunk_text(chunk) -> str:
+    """Texto do pedaço (pedaços só com finish_reason/safety não têm texto e o Gemini levanta ValueError)."""
+    try:
+        return chunk.text
+    except ValueError:
+        return ""
+
+
+async def stream_reply(
+    chat,
+    message: str,
+    on_complete: Optional[Callable[[str], Awaitable[dict]]] = None,
+) -> AsyncIterator[str]:
+    """
+    Envia a mensagem ao chat e repassa cada pedaço como evento SSE.
+    on_complete recebe o texto completo (ex.: para salvar no banco) e o que
+    devolver vai junto no evento "done".
+    """
+    metrics = StreamMetrics()
+    stream_stats.started()
+    parts = []
+    try:
+        response = await chat.send_message_async(message, stream=True)
+        async for chunk in response:
+            text = chunk_text(chunk)
+            metrics.chunk(text, getattr(chunk, "usage_metadata", None))
+            if text:
+                parts.append(text)
+                yield sse("token", {"text": text})
+        extra = await on_complete("".join(parts)) if on_complete else {}
+        summary = metrics.finish()
+        stream_stats.record(summary)
+        yield sse("done", {**extra, "metrics": summary})
+    except Exception as e:
+        stream_stats.failed()
+        yield sse("error", {"detail": f"Erro ao processar resposta da IA: {str(e)}"})
+    finally:
+        stream_stats.ended()
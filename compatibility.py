@@ -0,0 +1,167 @@
+# compatibility.py - Ranking de Compatibilidade
+
+"""
+Ranking de compatibilidade de um mapa contra todos os mapas salvos de um usuário.
+
+As longitudes dos BirthChart do usuário ficam numa matriz (mapas x corpos),
+montada uma vez e guardada em memória por usuário (CompatibilityIndex). A
+pontuação contra o mapa consultado é calculada para todos de uma vez
+(distâncias mapas x N x N, um aspecto por vez para limitar a memória), e o
+top-k sai de np.argpartition: só os k escolhidos viram objetos de resposta.
+
+Pontuação de um par de corpos em aspecto:
+    peso do aspecto x peso do corpo A x peso do corpo B x (1 - orbe / orbe máximo)
+Aspectos harmônicos somam, tensos subtraem.
+"""
+
+from collections import OrderedDict
+import threading
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from aspects import DEFAULT_TABLE, AspectTable, angular_distance
+from chart_core import CHART_BODIES, zodiac_signs
+
+ASPECT_WEIGHTS = {
+    "Conjunção": 1.0,
+    "Trígono": 1.0,
+    "Sextil": 0.8,
+    "Quadratura": -0.6,
+    "Oposição": -0.4,
+}
+
+# Pontos pessoais pesam mais; Lilith e Nodos quase não entram
+BODY_WEIGHTS = {
+    "Sol": 2.0, "Lua": 2.0, "Vênus": 2.0, "Marte": 1.5, "Ascendente": 1.5,
+    "Mercúrio": 1.0, "Júpiter": 1.0, "Saturno": 1.0, "MeioCéu": 1.0,
+    "Urano": 0.5, "Netuno": 0.5, "Plutão": 0.5, "Quíron": 0.5,
+    "Lilith": 0.25, "NóduloNorte": 0.25, "NóduloSul": 0.25,
+}
+
+# Linhas por bloco no cálculo da pontuação (limita a matriz temporária)
+SCORE_CHUNK = 4096
+
+# Usuários com matriz em memória
+INDEX_CACHE_SIZE = 256
+
+
+def longitudes_from_chart_data(chart_data: Optional[dict], bodies: Sequence[str] = CHART_BODIES) -> Optional[np.ndarray]:
+    """
+    Longitudes de um chart_data salvo: usa "longitudes" (brutas) quando existe;
+    mapas antigos só têm signo/grau, que são convertidos de volta.
+    """
+    if not chart_data:
+        return None
+    raw = chart_data.get("longitudes")
+    if raw:
+        lookup = raw
+    else:
+        lookup = {
+            p["planet"]: zodiac_signs.index(p["sign"]) * 30 + p["degree"]
+            for p in chart_data.get("positions", [])
+        }
+    if any(b not in lookup for b in bodies):
+        return None
+    return np.array([lookup[b] for b in bodies], dtype=np.float64)
+
+
+def score_matrix(query: np.ndarray, matrix: np.ndarray, bodies: Sequence[str] = CHART_BODIES,
+                 table: AspectTable = DEFAULT_TABLE):
+    """
+    Pontuação do mapa consultado (N,) contra cada linha de matrix (M, N).
+    Retorna (pontuação, parte harmônica, parte tensa), cada um (M,).
+    """
+    weights = np.array([BODY_WEIGHTS.get(b, 1.0) for b in bodies], dtype=np.float32)
+    pair_weight = weights[:, None] * weights[None, :]
+    harmony = np.zeros(len(matrix), dtype=np.float64)
+    tension = np.zeros(len(matrix), dtype=np.float64)
+    query = np.asarray(query, dtype=np.float32)
+    for start in range(0, len(matrix), SCORE_CHUNK):
+        block = np.asarray(matrix[start:start + SCORE_CHUNK], dtype=np.float32)
+        dist = angular_distance(query[None, :], block)  # (m, N, N)
+        for name, angle, orb in zip(table.names, table.angles.tolist(), table.orbs.tolist()):
+            weight = ASPECT_WEIGHTS.get(name, 0.0)
+            if weight == 0.0:
+                continue
+            closeness = np.clip(1.0 - np.abs(dist - angle) / orb, 0.0, None)
+            total = np.einsum("mij,ij->m", closeness, pair_weight) * abs(weight)
+            if weight > 0:
+                harmony[start:start + len(block)] += total
+            else:
+                tension[start:start + len(block)] += total
+    return harmony - tension, harmony, tension
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Índices das k maiores pontuações, em ordem decrescente (sem ordenar tudo)."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.array([], dtype=np.int64)
+    idx = np.argpartition(-scores, k - 1)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+
+class ChartMatrix(NamedTuple):
+    fingerprint: tuple
+    ids: np.ndarray
+    names: List[Optional[str]]
+    longitudes: np.ndarray  # (mapas, corpos)
+
+
+class CompatibilityIndex:
+    """
+    Matriz de longitudes por usuário, em LRU. Criar ou apagar um mapa chama
+    invalidate(); a impressão digital (nº de mapas, maior id, soma dos ids,
+    created_at mais recente) cobre os outros processos, que não veem o
+    invalidate() deste.
+    """
+
+    def __init__(self, maxsize: int = INDEX_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, user_id: int, fingerprint: tuple, load_rows) -> ChartMatrix:
+        """load_rows() -> [(id, nome, chart_data), ...], chamado só quando a matriz está desatualizada."""
+        with self._lock:
+            entry = self._lru.get(user_id)
+            if entry is not None and entry.fingerprint == fingerprint:
+                self._lru.move_to_end(user_id)
+                self.hits += 1
+                return entry
+
+        ids, names, rows = [], [], []
+        for chart_id, name, chart_data in load_rows():
+            lon = longitudes_from_chart_data(chart_data)
+            if lon is None:
+                continue
+            ids.append(chart_id)
+            names.append(name)
+            rows.append(lon)
+        entry = ChartMatrix(
+            fingerprint,
+            np.array(ids, dtype=np.int64),
+            names,
+            np.array(rows, dtype=np.float32).reshape(len(rows), len(CHART_BODIES)),
+        )
+        with self._lock:
+            self.builds += 1
+            self._lru[user_id] = entry
+            self._lru.move_to_end(user_id)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+        return entry
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._lru.pop(user_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"users": len(self._lru), "hits": self.hits, "builds": self.builds}
+
+
+compatibility_index = CompatibilityIndex()
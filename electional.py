@@ -0,0 +1,320 @@
+# electional.py - Busca Eletiva (janelas de tempo que satisfazem condições)
+
+"""
+Busca de janelas de tempo em que um conjunto de condições sobre o céu é
+verdadeiro num local, por exemplo:
+"Lua em Touro, Vênus direto, nenhum aspecto tenso a Marte, nos próximos 90 dias".
+
+As condições são declarativas (Condition) e usam os mesmos corpos do mapa
+(CHART_BODIES) e os mesmos aspectos do motor de aspectos:
+
+    sign        corpo em um dos signos
+    retrograde  corpo retrógrado
+    aspect      corpo e outro corpo ("*" = qualquer planeta) em um dos aspectos
+    house       corpo em uma das casas (Placidus no local)
+
+Todas aceitam negate (ex.: retrograde + negate = "não retrógrado").
+
+Etapas:
+1. Poda em níveis: condições só com corpos lentos numa grade diária,
+   depois as que não dependem do local numa grade horária; cada nível só
+   olha os trechos que passaram no anterior (com uma amostra de folga de
+   cada lado).
+2. Grade fina (1 h com Lua, 10 min com ângulos/casas) dentro desses trechos,
+   avaliando as condições em sequência só nas amostras ainda vivas; as
+   cúspides (swe.houses) só são calculadas para as amostras que sobraram.
+   As longitudes vêm das tabelas pré-calculadas quando cobrem o período.
+3. Cada borda de janela é refinada por bisseção (todas as bordas juntas,
+   vetorizada) com o Swiss Ephemeris direto, até REFINE_TOLERANCE.
+
+Períodos longos são divididos em blocos (search_chunks) para rodar em
+paralelo no pool de CPU; as janelas que cruzam a divisa são unidas em merge_windows.
+"""
+
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import swisseph as swe
+
+from aspects import MAJOR_ASPECTS, MINOR_ASPECTS, angular_distance
+from chart_core import CHART_BODIES, HOUSE_ORB_MASK, HOUSE_SYSTEM, PLANETS_SWEPH, zodiac_signs
+from ephemeris_tables import get_ephemeris_tables
+from houses import assign_houses_batch
+
+KINDS = ("sign", "retrograde", "aspect", "house")
+ANGLES = ("Ascendente", "MeioCéu")
+FAST_BODIES = ("Lua",) + ANGLES
+
+# Grupos de aspectos aceitos além dos nomes
+ASPECT_DEFS = {a.name: a for a in MAJOR_ASPECTS + MINOR_ASPECTS}
+ASPECT_GROUPS = {
+    "tensos": ["Conjunção", "Quadratura", "Oposição"],
+    "hard": ["Conjunção", "Quadratura", "Oposição"],
+    "harmônicos": ["Trígono", "Sextil"],
+    "soft": ["Trígono", "Sextil"],
+}
+
+# Passos de amostragem (dias)
+SLOW_STEP = 1.0
+MOON_STEP = 1.0 / 24
+ANGLE_STEP = 1.0 / 144
+
+# Precisão das bordas (dias): ~10 s
+REFINE_TOLERANCE = 1.0 / 8640
+
+CHUNK_DAYS = 30
+MAX_DAYS = 2 * 366
+
+_SN = CHART_BODIES.index("NóduloSul")
+_NN = CHART_BODIES.index("NóduloNorte")
+_ASC = CHART_BODIES.index("Ascendente")
+_MC = CHART_BODIES.index("MeioCéu")
+_PLANETS = list(PLANETS_SWEPH)
+
+
+class Condition(NamedTuple):
+    kind: str                     # sign / retrograde / aspect / house
+    body: str
+    values: Tuple = ()            # signos, casas ou aspectos
+    other: Optional[str] = None   # segundo corpo do aspecto ("*" = qualquer planeta)
+    orb: Optional[float] = None   # orbe do aspecto (padrão: o da tabela)
+    negate: bool = False
+
+    @property
+    def bodies(self) -> List[str]:
+        names = [self.body, self.other] if self.other else [self.body]
+        return [b for n in names for b in (_PLANETS if n == "*" else [n])]
+
+    @property
+    def fast(self) -> bool:
+        return self.kind == "house" or any(b in FAST_BODIES for b in self.bodies)
+
+    @property
+    def needs_houses(self) -> bool:
+        return self.kind == "house" or any(b in ANGLES for b in self.bodies)
+
+
+def validate(condition: Condition) -> Condition:
+    """Normaliza e confere uma condição; ValueError com a mensagem para o usuário."""
+    if condition.kind not in KINDS:
+        raise ValueError(f"Tipo de condição desconhecido: {condition.kind}")
+    for name in [condition.body] + ([condition.other] if condition.other else []):
+        if name not in CHART_BODIES and name != "*":
+            raise ValueError(f"Corpo desconhecido: {name}")
+    if condition.kind == "sign":
+        unknown = [s for s in condition.values if s not in zodiac_signs]
+        if unknown or not condition.values:
+            raise ValueError(f"Signos inválidos: {unknown or 'nenhum'}")
+    elif condition.kind == "house":
+        if not condition.values or any(not 1 <= int(h) <= 12 for h in condition.values):
+            raise ValueError("Casas devem estar entre 1 e 12")
+    elif condition.kind == "aspect":
+        if not condition.other:
+            raise ValueError("Condição de aspecto exige o segundo corpo (other)")
+        names = [n for v in (condition.values or ("hard",)) for n in ASPECT_GROUPS.get(v, [v])]
+        unknown = [n for n in names if n not in ASPECT_DEFS]
+        if unknown:
+            raise ValueError(f"Aspectos desconhecidos: {unknown}")
+        condition = condition._replace(values=tuple(dict.fromkeys(names)))
+    elif condition.kind == "retrograde" and condition.body not in PLANETS_SWEPH:
+        raise ValueError(f"{condition.body} não tem retrogradação")
+    return condition
+
+
+class Samples(NamedTuple):
+    jd: np.ndarray
+    longitude: np.ndarray       # (T, N) em CHART_BODIES
+    speed: np.ndarray           # (T, N)
+    house: Optional[np.ndarray]  # (T, N) ou None quando nenhuma condição precisa
+
+
+def sample(jds: np.ndarray, lat: float, lon: float, bodies: Sequence[str],
+           houses: bool, exact: bool = False) -> Samples:
+    """
+    Posições dos corpos pedidos em cada instante. Tabelas pré-calculadas quando
+    cobrem o período (e exact=False); senão swe.calc_ut.
+    """
+    jds = np.asarray(jds, dtype=np.float64)
+    n = len(CHART_BODIES)
+    longitude = np.zeros((len(jds), n))
+    speed = np.zeros((len(jds), n))
+    wanted = set(bodies)
+    if "NóduloSul" in wanted:
+        wanted.add("NóduloNorte")
+    tables = None if exact or not len(jds) else get_ephemeris_tables()
+    if tables is not None and not tables.covers(jds.min(), jds.max()):
+        tables = None
+    for col, (name, code) in enumerate(PLANETS_SWEPH.items()):
+        if name not in wanted:
+            continue
+        if tables is not None:
+            longitude[:, col], speed[:, col] = tables.position(name, jds)
+        else:
+            for t, jd in enumerate(jds.tolist()):
+                pos, _ = swe.calc_ut(jd, code, swe.FLG_SWIEPH | swe.FLG_SPEED)
+                longitude[t, col], speed[t, col] = pos[0], pos[3]
+    longitude[:, _SN] = (longitude[:, _NN] + 180.0) % 360.0
+    speed[:, _SN] = speed[:, _NN]
+
+    house = None
+    if houses:
+        cusps = np.empty((len(jds), 12))
+        hsys = HOUSE_SYSTEM.encode()
+        for t, jd in enumerate(jds.tolist()):
+            c, ascmc = swe.houses(jd, lat, lon, hsys)
+            cusps[t] = c[:12]
+            longitude[t, _ASC], longitude[t, _MC] = ascmc[0], ascmc[1]
+        house = np.zeros((len(jds), n), dtype=np.int8)
+        house[:, :_SN + 1] = assign_houses_batch(cusps, longitude[:, :_SN + 1], orb=HOUSE_ORB_MASK)
+        house[:, _ASC], house[:, _MC] = 1, 10
+    return Samples(jds, longitude, speed, house)
+
+
+def evaluate(condition: Condition, samples: Samples) -> np.ndarray:
+    """Condição em cada amostra -> (T,) booleano."""
+    idx = CHART_BODIES.index(condition.body) if condition.body != "*" else None
+    if condition.kind == "sign":
+        signs = [zodiac_signs.index(s) for s in condition.values]
+        result = np.isin((samples.longitude[:, idx] // 30).astype(np.int64) % 12, signs)
+    elif condition.kind == "retrograde":
+        result = samples.speed[:, idx] < 0
+    elif condition.kind == "house":
+        result = np.isin(samples.house[:, idx], [int(h) for h in condition.values])
+    else:
+        first = [CHART_BODIES.index(b) for b in (_PLANETS if condition.body == "*" else [condition.body])]
+        second = [CHART_BODIES.index(b) for b in (_PLANETS if condition.other == "*" else [condition.other])]
+        dist = angular_distance(samples.longitude[:, first], samples.longitude[:, second])  # (T, Na, Nb)
+        same = np.equal.outer(first, second)
+        result = np.zeros(len(samples.jd), dtype=bool)
+        for name in condition.values:
+            aspect = ASPECT_DEFS[name]
+            orb = condition.orb if condition.orb is not None else aspect.orb
+            hit = (np.abs(dist - aspect.angle) <= orb) & ~same
+            result |= hit.reshape(len(samples.jd), -1).any(axis=1)
+    return ~result if condition.negate else result
+
+
+def evaluate_all(conditions: Sequence[Condition], jds: np.ndarray, lat: float, lon: float,
+                 exact: bool = False) -> np.ndarray:
+    """
+    Todas as condições (E lógico), podando: cada condição só é avaliada (e
+    só calcula os próprios corpos) nas amostras que passaram nas anteriores.
+    As mais baratas vão primeiro; as que precisam de casas ficam por último,
+    então as cúspides só são calculadas para as amostras vivas.
+    """
+    jds = np.asarray(jds, dtype=np.float64)
+    alive = np.ones(len(jds), dtype=bool)
+    for condition in sorted(conditions, key=lambda c: (c.needs_houses, len(c.bodies))):
+        where = np.nonzero(alive)[0]
+        if not len(where):
+            break
+        samples = sample(jds[where], lat, lon, condition.bodies, condition.needs_houses, exact)
+        alive[where] = evaluate(condition, samples)
+    return alive
+
+
+def _runs(mask: np.ndarray) -> List[Tuple[int, int]]:
+    """Trechos contíguos verdadeiros [a, b] (índices inclusivos)."""
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return list(zip(edges[0::2].tolist(), (edges[1::2] - 1).tolist()))
+
+
+def fine_step(conditions: Sequence[Condition]) -> float:
+    if any(c.needs_houses for c in conditions):
+        return ANGLE_STEP
+    if any(c.fast for c in conditions):
+        return MOON_STEP
+    return SLOW_STEP / 4
+
+
+def pruning_levels(conditions: Sequence[Condition]) -> List[Tuple[float, List[Condition]]]:
+    """
+    Níveis de poda, do mais grosso ao mais fino: condições lentas na grade
+    diária, depois as sem casas/ângulos na grade horária. O nível final
+    (todas as condições em fine_step) fica por conta de search.
+    """
+    levels = []
+    slow = [c for c in conditions if not c.fast]
+    if slow:
+        levels.append((SLOW_STEP, slow))
+    plain = [c for c in conditions if not c.needs_houses]
+    if any(c.needs_houses for c in conditions) and any(c.fast for c in plain):
+        levels.append((MOON_STEP, plain))
+    return levels
+
+
+def _grid(lo: float, hi: float, step: float) -> np.ndarray:
+    return np.append(np.arange(lo, hi, step), hi)
+
+
+def candidate_ranges(conditions: Sequence[Condition], jd_start: float, jd_end: float,
+                     lat: float, lon: float) -> List[Tuple[float, float]]:
+    """Trechos que ainda podem conter janelas depois da poda em cada nível."""
+    ranges = [(jd_start, jd_end)]
+    for step, group in pruning_levels(conditions):
+        pruned = []
+        for lo, hi in ranges:
+            grid = _grid(lo, hi, step)
+            mask = evaluate_all(group, grid, lat, lon)
+            # Uma amostra de folga de cada lado: a condição pode virar entre duas amostras
+            grown = mask.copy()
+            grown[1:] |= mask[:-1]
+            grown[:-1] |= mask[1:]
+            pruned += [(float(grid[a]), float(grid[b])) for a, b in _runs(grown)]
+        ranges = pruned
+    return ranges
+
+
+def refine_edges(conditions: Sequence[Condition], false_side: np.ndarray, true_side: np.ndarray,
+                 lat: float, lon: float) -> np.ndarray:
+    """Bisseção vetorizada de todas as bordas; devolve o instante verdadeiro mais próximo da virada."""
+    a = np.asarray(false_side, dtype=np.float64)
+    b = np.asarray(true_side, dtype=np.float64)
+    while len(a) and np.max(np.abs(b - a)) > REFINE_TOLERANCE:
+        mid = (a + b) / 2
+        ok = evaluate_all(conditions, mid, lat, lon, exact=True)
+        b = np.where(ok, mid, b)
+        a = np.where(ok, a, mid)
+    return b
+
+
+def search(conditions: Sequence[Condition], jd_start: float, jd_end: float,
+           lat: float, lon: float) -> List[Tuple[float, float]]:
+    """Janelas (início, fim) em JD UT dentro de [jd_start, jd_end]."""
+    step = fine_step(conditions)
+    starts, ends = [], []      # (lado falso, lado verdadeiro) de cada borda; None = limite do período
+    for lo, hi in candidate_ranges(conditions, jd_start, jd_end, lat, lon):
+        grid = _grid(lo, hi, step)
+        mask = evaluate_all(conditions, grid, lat, lon)
+        for a, b in _runs(mask):
+            starts.append((grid[a - 1], grid[a]) if a > 0 else (None, grid[a]))
+            ends.append((grid[b + 1], grid[b]) if b < len(grid) - 1 else (None, grid[b]))
+
+    def refined(edges):
+        todo = [k for k, (f, _) in enumerate(edges) if f is not None]
+        result = np.array([t for _, t in edges], dtype=np.float64)
+        if todo:
+            result[todo] = refine_edges(
+                conditions, [edges[k][0] for k in todo], [edges[k][1] for k in todo], lat, lon
+            )
+        return result.tolist()
+
+    return list(zip(refined(starts), refined(ends)))
+
+
+def search_chunks(jd_start: float, jd_end: float, days: float = CHUNK_DAYS) -> List[Tuple[float, float]]:
+    """Divide o período em blocos para o pool de CPU."""
+    edges = np.append(np.arange(jd_start, jd_end, days), jd_end)
+    return list(zip(edges[:-1].tolist(), edges[1:].tolist()))
+
+
+def merge_windows(windows: Sequence[Tuple[float, float]], gap: float = REFINE_TOLERANCE) -> List[Tuple[float, float]]:
+    """Une janelas encostadas (a mesma janela cortada na divisa de dois blocos)."""
+    merged: List[List[float]] = []
+    for start, end in sorted(windows):
+        if merged and start - merged[-1][1] <= gap:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return [(s, e) for s, e in merged]
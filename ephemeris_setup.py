@@ -0,0 +1,127 @@
+# ephemeris_setup.py - Inicialização do Swiss Ephemeris
+
+"""
+Inicialização única do Swiss Ephemeris.
+
+- Define o caminho das efemérides uma vez por processo (antes era a cada mapa)
+- Aquece os arquivos sepl_18 (planetas), semo_18 (Lua) e seas_18 (asteroides/Quíron)
+  calculando um mapa de exemplo, para que a primeira requisição real não pague
+  a abertura dos arquivos
+- Guarda tempo de carga e cobertura dos arquivos para o /health
+"""
+
+from typing import Iterable, Optional
+import glob
+import hashlib
+import os
+import threading
+import time
+
+import swisseph as swe
+
+EPHEMERIS_PATH = os.environ.get(
+    "EPHEMERIS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ephemeris")
+)
+
+# Arquivos esperados: planetas, Lua e asteroides (Quíron)
+REQUIRED_FILES = ["sepl_18.se1", "semo_18.se1", "seas_18.se1"]
+
+# Corpos usados no aquecimento quando nenhuma lista é passada
+DEFAULT_BODIES = [
+    swe.SUN, swe.MOON, swe.MERCURY, swe.VENUS, swe.MARS, swe.JUPITER, swe.SATURN,
+    swe.URANUS, swe.NEPTUNE, swe.PLUTO, swe.CHIRON, swe.MEAN_APOG, swe.TRUE_NODE,
+]
+
+# Instante do mapa de aquecimento (J2000) e local (São Paulo)
+WARMUP_JD = 2451545.0
+WARMUP_LAT, WARMUP_LON = -23.55, -46.63
+
+_lock = threading.Lock()
+_status: Optional[dict] = None
+
+
+def file_coverage(name: str) -> dict:
+    """
+    Cobertura de um arquivo .se1 pelo nome: "sepl_18" = 1800 a 2399,
+    "seplm06" = 600 a.C. em diante (cada arquivo cobre 600 anos).
+    """
+    stem = os.path.splitext(os.path.basename(name))[0]
+    digits = stem[-2:]
+    if not digits.isdigit():
+        return {}
+    start = int(digits) * 100
+    if stem[-3] == "m":
+        start = -start
+    return {"from_year": start, "to_year": start + 599}
+
+
+def ephemeris_fingerprint(path: str = EPHEMERIS_PATH) -> str:
+    """Hash de nome, tamanho e data dos arquivos de efemérides."""
+    h = hashlib.sha1()
+    for name in sorted(glob.glob(os.path.join(path, "*.se1"))):
+        st = os.stat(name)
+        h.update(f"{os.path.basename(name)}:{st.st_size}:{int(st.st_mtime)};".encode())
+    return h.hexdigest()[:12]
+
+
+def init_ephemeris(bodies: Iterable[int] = DEFAULT_BODIES, house_system: str = "P") -> dict:
+    """
+    Define o caminho e aquece as efemérides (idempotente).
+    Retorna o status usado pelo /health.
+    """
+    global _status
+    if _status is not None:
+        return _status
+    with _lock:
+        if _status is not None:
+            return _status
+
+        start = time.perf_counter()
+        swe.set_ephe_path(EPHEMERIS_PATH)
+
+        files = {}
+        for path in sorted(glob.glob(os.path.join(EPHEMERIS_PATH, "*.se1"))):
+            files[os.path.basename(path)] = {"size_kb": os.path.getsize(path) // 1024, **file_coverage(path)}
+        missing = [f for f in REQUIRED_FILES if f not in files]
+
+        # Mapa de exemplo: abre os arquivos e preenche os caches internos do Swiss Ephemeris
+        moshier = []
+        errors = {}
+        for code in bodies:
+            try:
+                _, retflag = swe.calc_ut(WARMUP_JD, code, swe.FLG_SWIEPH | swe.FLG_SPEED)
+                if not retflag & swe.FLG_SWIEPH:
+                    # Sem o arquivo, o Swiss Ephemeris cai para Moshier (menos preciso)
+                    moshier.append(swe.get_planet_name(code))
+            except swe.Error as e:
+                errors[swe.get_planet_name(code)] = str(e)
+        swe.houses(WARMUP_JD, WARMUP_LAT, WARMUP_LON, house_system.encode())
+
+        _status = {
+            "path": EPHEMERIS_PATH,
+            "load_ms": round((time.perf_counter() - start) * 1000, 2),
+            "files": files,
+            "missing_files": missing,
+            "moshier_fallback": moshier,
+            "errors": errors,
+            "ready": not missing and not errors,
+        }
+        return _status
+
+
+def init_worker(bodies: Iterable[int] = DEFAULT_BODIES):
+    """
+    Inicialização de processos filhos (pool de CPU). Após um fork os arquivos
+    abertos pelo processo pai compartilhariam a posição de leitura, então o
+    Swiss Ephemeris é fechado e reaberto no próprio worker.
+    """
+    global _status
+    swe.close()
+    _status = None
+    init_ephemeris(bodies)
+
+
+def ephemeris_status() -> dict:
+    """Status para o /health (inicializa se ainda não foi feito)."""
+    return init_ephemeris()
@@ -0,0 +1,243 @@
+# ephemeris_tables.py - Tabelas de Efemérides Pré-calculadas
+
+"""
+Efemérides pré-calculadas em tabelas compactas (float32), abertas com mmap.
+
+- daily_lon.npy / daily_speed.npy   (dias x corpos): todos os corpos de PLANETS_SWEPH, 1 amostra por dia (0h UT)
+- moon_lon.npy / moon_speed.npy     (horas,): Lua de hora em hora
+- meta.json                         jd inicial, passos, corpos e impressão digital das efemérides
+
+Entre duas amostras a posição é interpolada com Hermite cúbico (longitude +
+velocidade nas duas pontas), o que dá precisão de segundos de arco para os
+planetas no passo diário e para a Lua no passo horário. Trânsitos, eventos
+etc. leem as tabelas em vez de chamar swe.calc_ut dia a dia.
+
+Gerar as tabelas:
+    python ephemeris_tables.py build [ano_inicial] [ano_final]
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+import json
+import os
+import sys
+
+import numpy as np
+import swisseph as swe
+
+from chart_core import PLANETS_SWEPH
+from ephemeris_setup import init_ephemeris, ephemeris_fingerprint
+
+EPHEMERIS_TABLE_DIR = os.environ.get("EPHEMERIS_TABLE_DIR", "./ephemeris_tables")
+DEFAULT_START_YEAR = 1900
+DEFAULT_END_YEAR = 2100
+
+DAILY_STEP = 1.0
+MOON_STEP = 1.0 / 24
+
+J2000 = 2451545.0
+J2000_DATETIME = datetime(2000, 1, 1, 12, tzinfo=timezone.utc)
+
+
+def jd_to_datetime(jd: float) -> datetime:
+    """JD (UT) -> datetime UTC (resolução de segundos)."""
+    return (J2000_DATETIME + timedelta(days=float(jd) - J2000)).replace(microsecond=0)
+
+
+def datetime_to_jd(moment: datetime) -> float:
+    """datetime (UTC se sem fuso) -> JD (UT)."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return J2000 + (moment - J2000_DATETIME).total_seconds() / 86400.0
+
+
+def wrap180(x):
+    """Ângulo em -180..180."""
+    return (np.asarray(x) + 180.0) % 360.0 - 180.0
+
+
+def hermite(p0, p1, m0, m1, t):
+    """
+    Hermite cúbico em t (0..1) entre longitudes p0 e p1 (p1 já desenrolada em
+    relação a p0) com derivadas m0/m1 em graus por passo.
+    Retorna (valor, derivada por passo).
+    """
+    t2 = t * t
+    t3 = t2 * t
+    value = (2 * t3 - 3 * t2 + 1) * p0 + (t3 - 2 * t2 + t) * m0 + (-2 * t3 + 3 * t2) * p1 + (t3 - t2) * m1
+    slope = (6 * t2 - 6 * t) * p0 + (3 * t2 - 4 * t + 1) * m0 + (-6 * t2 + 6 * t) * p1 + (3 * t2 - 2 * t) * m1
+    return value, slope
+
+
+class EphemerisSeries:
+    """
+    Amostras regulares de um ou mais corpos.
+    lon/speed: (amostras, corpos) ou (amostras,) em graus e graus/dia.
+    """
+
+    __slots__ = ("jd0", "step", "lon", "speed")
+
+    def __init__(self, jd0: float, step: float, lon: np.ndarray, speed: np.ndarray):
+        self.jd0 = jd0
+        self.step = step
+        self.lon = lon
+        self.speed = speed
+
+    def __len__(self):
+        return self.lon.shape[0]
+
+    @property
+    def jd_end(self) -> float:
+        return self.jd0 + (len(self) - 1) * self.step
+
+    def covers(self, jd_start: float, jd_end: float) -> bool:
+        return self.jd0 <= jd_start and jd_end <= self.jd_end
+
+    def jd(self, index):
+        return self.jd0 + np.asarray(index) * self.step
+
+    def window(self, jd_start: float, jd_end: float, column: Optional[int] = None):
+        """
+        Amostras que cobrem [jd_start, jd_end] (uma a mais em cada ponta).
+        Retorna (índice da primeira amostra, lon, speed) como views do mmap, sem cópia.
+        """
+        first = max(int(np.floor((jd_start - self.jd0) / self.step)), 0)
+        last = min(int(np.ceil((jd_end - self.jd0) / self.step)), len(self) - 1)
+        lon, speed = self.lon[first:last + 1], self.speed[first:last + 1]
+        if column is not None and lon.ndim == 2:
+            lon, speed = lon[:, column], speed[:, column]
+        return first, lon, speed
+
+    def interval(self, index, t, column: Optional[int] = None):
+        """
+        Interpola dentro do intervalo [index, index + 1] na fração t (0..1).
+        index/t podem ser arrays. Retorna (longitude 0..360, velocidade em graus/dia).
+        """
+        index = np.asarray(index)
+        lon = self.lon if column is None or self.lon.ndim == 1 else self.lon[:, column]
+        speed = self.speed if column is None or self.speed.ndim == 1 else self.speed[:, column]
+        p0 = lon[index].astype(np.float64)
+        p1 = p0 + wrap180(lon[index + 1].astype(np.float64) - p0)
+        m0 = speed[index].astype(np.float64) * self.step
+        m1 = speed[index + 1].astype(np.float64) * self.step
+        value, slope = hermite(p0, p1, m0, m1, np.asarray(t, dtype=np.float64))
+        return value % 360.0, slope / self.step
+
+    def at(self, jds, column: Optional[int] = None):
+        """Longitude e velocidade interpoladas em instantes quaisquer (JD UT)."""
+        pos = (np.asarray(jds, dtype=np.float64) - self.jd0) / self.step
+        index = np.clip(np.floor(pos).astype(np.int64), 0, len(self) - 2)
+        return self.interval(index, pos - index, column)
+
+
+class EphemerisTables:
+    """Tabela diária de todos os corpos + tabela horária da Lua."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.bodies = self.meta["bodies"]
+
+        def load(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        self.daily = EphemerisSeries(self.meta["daily_jd0"], self.meta["daily_step"],
+                                     load("daily_lon.npy"), load("daily_speed.npy"))
+        self.moon = EphemerisSeries(self.meta["moon_jd0"], self.meta["moon_step"],
+                                    load("moon_lon.npy"), load("moon_speed.npy"))
+
+    @classmethod
+    def open(cls, directory: str = EPHEMERIS_TABLE_DIR) -> Optional["EphemerisTables"]:
+        if not os.path.exists(os.path.join(directory, "meta.json")):
+            return None
+        return cls(directory)
+
+    def series(self, body: str):
+        """(série, coluna) de um corpo: a Lua usa a tabela horária."""
+        if body == "Lua":
+            return self.moon, None
+        return self.daily, self.bodies.index(body)
+
+    def position(self, body: str, jds):
+        """Longitude e velocidade interpoladas de um corpo."""
+        series, column = self.series(body)
+        return series.at(jds, column)
+
+    def covers(self, jd_start: float, jd_end: float) -> bool:
+        return self.daily.covers(jd_start, jd_end) and self.moon.covers(jd_start, jd_end)
+
+    def stats(self) -> dict:
+        return {
+            "from": jd_to_datetime(self.daily.jd0).date().isoformat(),
+            "to": jd_to_datetime(self.daily.jd_end).date().isoformat(),
+            "bodies": len(self.bodies),
+            "ephemeris": self.meta.get("ephemeris"),
+            "stale": self.meta.get("ephemeris") != ephemeris_fingerprint(),
+        }
+
+
+def _sample(code: int, jds: np.ndarray):
+    lon = np.empty(len(jds), dtype=np.float32)
+    speed = np.empty(len(jds), dtype=np.float32)
+    flags = swe.FLG_SWIEPH | swe.FLG_SPEED
+    for i, jd in enumerate(jds.tolist()):
+        pos, _ = swe.calc_ut(jd, code, flags)
+        lon[i], speed[i] = pos[0], pos[3]
+    return lon, speed
+
+
+def build_tables(start_year: int = DEFAULT_START_YEAR, end_year: int = DEFAULT_END_YEAR,
+                 out_dir: str = EPHEMERIS_TABLE_DIR) -> dict:
+    """Calcula e grava as tabelas de start_year-01-01 até end_year-12-31 (inclusive)."""
+    init_ephemeris()
+    os.makedirs(out_dir, exist_ok=True)
+    jd0 = swe.julday(start_year, 1, 1, 0.0)
+    jd1 = swe.julday(end_year + 1, 1, 1, 0.0)
+
+    bodies = list(PLANETS_SWEPH)
+    days = jd0 + np.arange(int(round((jd1 - jd0) / DAILY_STEP)) + 1) * DAILY_STEP
+    daily_lon = np.empty((len(days), len(bodies)), dtype=np.float32)
+    daily_speed = np.empty_like(daily_lon)
+    for column, code in enumerate(PLANETS_SWEPH.values()):
+        daily_lon[:, column], daily_speed[:, column] = _sample(code, days)
+
+    hours = jd0 + np.arange(int(round((jd1 - jd0) / MOON_STEP)) + 1) * MOON_STEP
+    moon_lon, moon_speed = _sample(swe.MOON, hours)
+
+    for name, array in [("daily_lon", daily_lon), ("daily_speed", daily_speed),
+                        ("moon_lon", moon_lon), ("moon_speed", moon_speed)]:
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+
+    meta = {
+        "bodies": bodies,
+        "daily_jd0": jd0, "daily_step": DAILY_STEP,
+        "moon_jd0": jd0, "moon_step": MOON_STEP,
+        "ephemeris": ephemeris_fingerprint(),
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return {"days": len(days), "hours": len(hours), "bodies": len(bodies)}
+
+
+_tables = None
+_tables_loaded = False
+
+
+def get_ephemeris_tables() -> Optional[EphemerisTables]:
+    """Tabelas compartilhadas pelo processo (None se ainda não foram geradas)."""
+    global _tables, _tables_loaded
+    if not _tables_loaded:
+        _tables = EphemerisTables.open(EPHEMERIS_TABLE_DIR)
+        _tables_loaded = True
+    return _tables
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "build":
+        print("Uso: python ephemeris_tables.py build [ano_inicial] [ano_final]")
+        sys.exit(1)
+    start = int(args[1]) if len(args) > 1 else DEFAULT_START_YEAR
+    end = int(args[2]) if len(args) > 2 else DEFAULT_END_YEAR
+    info = build_tables(start, end)
+    print(f"✅ {info['days']} dias x {info['bodies']} corpos + {info['hours']} horas da Lua em {EPHEMERIS_TABLE_DIR}")
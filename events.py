@@ -0,0 +1,205 @@
+# events.py - Momento Exato de Aspectos e Ingressos
+
+"""
+Busca do instante exato em que um corpo atinge uma longitude alvo
+(aspecto a um ponto natal, ingresso em signo, retorno...).
+
+Em vez de varrer dia a dia com swe.calc:
+
+1. Colchete pela velocidade: se o corpo está a d graus do alvo e nunca anda
+   mais que v_max graus/dia, ele não chega lá antes de d / v_max dias. O passo
+   é exatamente esse (com um mínimo por corpo), então nenhum cruzamento é pulado
+   e longe do alvo os passos são enormes (Plutão anda anos num passo).
+2. Dentro do colchete (troca de sinal de wrap180(longitude - alvo)), Brent
+   encontra a raiz com poucas avaliações.
+3. Depois de uma raiz a busca continua logo adiante, então as três passagens de
+   um laço retrógrado aparecem como três eventos em sequência.
+
+BodyTrack conta as chamadas ao Swiss Ephemeris (ver bench_events.py).
+"""
+
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import swisseph as swe
+
+from chart_core import PLANETS_SWEPH, zodiac_signs
+from geocoding import normalize_text
+
+# Velocidade máxima (graus/dia) de cada corpo em 1900-2100, com folga de ~10%
+MAX_SPEED = {
+    swe.SUN: 1.13,
+    swe.MOON: 16.9,
+    swe.MERCURY: 2.45,
+    swe.VENUS: 1.4,
+    swe.MARS: 0.88,
+    swe.JUPITER: 0.27,
+    swe.SATURN: 0.145,
+    swe.URANUS: 0.072,
+    swe.NEPTUNE: 0.045,
+    swe.PLUTO: 0.045,
+    swe.CHIRON: 0.165,
+    swe.MEAN_APOG: 0.125,
+    swe.TRUE_NODE: 0.35,
+}
+
+# Passo mínimo (dias): abaixo disso só uma estação exatamente sobre o alvo esconderia duas passagens
+MIN_STEP = {swe.MOON: 1.0 / 24}
+DEFAULT_MIN_STEP = 0.25
+
+# Precisão da raiz (dias): ~0,1 s
+TIME_TOLERANCE = 1e-6
+
+# Horizonte padrão da busca
+MAX_SEARCH_DAYS = 150 * 365.25
+
+# Nomes em inglês aceitos pela API (além dos nomes de PLANETS_SWEPH)
+BODY_ALIASES = {
+    "sun": "Sol", "moon": "Lua", "mercury": "Mercúrio", "venus": "Vênus", "mars": "Marte",
+    "jupiter": "Júpiter", "saturn": "Saturno", "uranus": "Urano", "neptune": "Netuno",
+    "pluto": "Plutão", "chiron": "Quíron", "north node": "NóduloNorte", "northnode": "NóduloNorte",
+    "node": "NóduloNorte", "lilith": "Lilith",
+}
+_BODY_KEYS = {normalize_text(name): name for name in PLANETS_SWEPH}
+_BODY_KEYS.update(BODY_ALIASES)
+
+
+def resolve_body(name: str) -> Optional[str]:
+    """Nome em PLANETS_SWEPH a partir de "Saturno", "saturno", "Saturn"..."""
+    return _BODY_KEYS.get(normalize_text(name))
+
+
+def _wrap180(x: float) -> float:
+    return (x + 180.0) % 360.0 - 180.0
+
+
+class Event(NamedTuple):
+    jd: float
+    target: float       # longitude alvo
+    label: str          # ex.: "Quadratura a Saturno natal", "ingresso em Leão"
+    longitude: float
+    speed: float
+
+    @property
+    def retrograde(self) -> bool:
+        return self.speed < 0
+
+
+class BodyTrack:
+    """Posições de um corpo via swe.calc_ut, contando as chamadas."""
+
+    def __init__(self, code: int):
+        self.code = code
+        self.max_speed = MAX_SPEED[code]
+        self.min_step = MIN_STEP.get(code, DEFAULT_MIN_STEP)
+        self.calls = 0
+
+    def position(self, jd: float):
+        self.calls += 1
+        pos, _ = swe.calc_ut(jd, self.code, swe.FLG_SWIEPH | swe.FLG_SPEED)
+        return pos[0], pos[3]
+
+    def offset(self, jd: float, target: float) -> float:
+        return _wrap180(self.position(jd)[0] - target)
+
+
+def brent(f, a: float, b: float, fa: float, fb: float, tol: float = TIME_TOLERANCE, max_iter: int = 60) -> float:
+    """Raiz de f em [a, b] (fa e fb com sinais opostos) pelo método de Brent."""
+    if fa == 0:
+        return a
+    if fb == 0:
+        return b
+    c, fc = a, fa
+    d = e = b - a
+    for _ in range(max_iter):
+        if (fb > 0) == (fc > 0):
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol1 = 2e-16 * abs(b) + tol / 2
+        m = (c - b) / 2
+        if abs(m) <= tol1 or fb == 0:
+            return b
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            s = fb / fa
+            if a == c:
+                # Secante
+                p, q = 2 * m * s, 1 - s
+            else:
+                # Interpolação quadrática inversa
+                q, r = fa / fc, fb / fc
+                p = s * (2 * m * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * m * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m
+        else:
+            d = e = m
+        a, fa = b, fb
+        b += d if abs(d) > tol1 else (tol1 if m > 0 else -tol1)
+        fb = f(b)
+    return b
+
+
+def next_event(track: BodyTrack, targets: Sequence[float], jd_start: float,
+               jd_limit: float, labels: Optional[Sequence[str]] = None) -> Optional[Event]:
+    """Primeiro instante após jd_start em que o corpo cruza qualquer uma das longitudes alvo."""
+    labels = labels or [f"{t:.2f}°" for t in targets]
+    t = jd_start
+    lon, _ = track.position(t)
+    offsets = [_wrap180(lon - target) for target in targets]
+    while t < jd_limit:
+        distance = min(abs(o) for o in offsets)
+        t2 = min(t + max(distance / track.max_speed, track.min_step), jd_limit)
+        lon2, _ = track.position(t2)
+        offsets2 = [_wrap180(lon2 - target) for target in targets]
+        roots = []
+        for k, (o1, o2) in enumerate(zip(offsets, offsets2)):
+            # Troca de sinal perto do alvo (em ±180 o wrap também troca de sinal)
+            if (o1 < 0) != (o2 < 0) and abs(o1) < 90 and abs(o2) < 90 or o2 == 0:
+                target = targets[k]
+                roots.append((brent(lambda x: track.offset(x, target), t, t2, o1, o2), k))
+        if roots:
+            jd, k = min(roots)
+            lon, speed = track.position(jd)
+            return Event(jd, targets[k], labels[k], lon, speed)
+        t, offsets = t2, offsets2
+    return None
+
+
+def find_events(code: int, targets: Sequence[float], jd_start: float, count: int = 1,
+                jd_limit: Optional[float] = None, labels: Optional[Sequence[str]] = None):
+    """
+    Próximos `count` cruzamentos (um laço retrógrado gera até três seguidos).
+    Retorna (eventos, nº de chamadas ao Swiss Ephemeris).
+    """
+    track = BodyTrack(code)
+    jd_limit = jd_limit or jd_start + MAX_SEARCH_DAYS
+    events: List[Event] = []
+    t = jd_start
+    while len(events) < count:
+        event = next_event(track, targets, t, jd_limit, labels)
+        if event is None:
+            break
+        events.append(event)
+        # Continuar logo depois da raiz (fora da tolerância, para não reencontrá-la)
+        t = event.jd + 100 * TIME_TOLERANCE
+    return events, track.calls
+
+
+def aspect_targets(natal_lon: float, angle: float):
+    """Longitudes que formam o aspecto com o ponto natal (conjunção/oposição têm um lado só)."""
+    if angle % 180 == 0:
+        return [(natal_lon + angle) % 360.0]
+    return [(natal_lon + angle) % 360.0, (natal_lon - angle) % 360.0]
+
+
+def ingress_targets(sign: Optional[str] = None) -> Dict[str, float]:
+    """Início de um signo (ou de todos) como alvo."""
+    signs = [sign] if sign else zodiac_signs
+    return {f"ingresso em {s}": zodiac_signs.index(s) * 30.0 for s in signs}
@@ -0,0 +1,192 @@
+# executor.py - Camada de Execução (trabalho bloqueante fora do event loop)
+
+"""
+Pools limitados para tirar trabalho bloqueante do event loop do FastAPI.
+
+- Pool de CPU (processos por padrão): cálculos de efemérides (swe.calc / swe.houses)
+- Pool de I/O (threads): geocodificação, banco, bcrypt, bibliotecas síncronas
+
+Cada pool tem um limite de tarefas em andamento + fila. Quando a fila está
+cheia por mais de EXECUTOR_QUEUE_TIMEOUT segundos, a requisição recebe 503
+em vez de ficar pendurada indefinidamente. Um pool de processos quebrado
+(worker que morreu) é recriado na chamada seguinte; a que falhou recebe 503.
+
+Configuração (variáveis de ambiente):
+    EXECUTOR_CPU_POOL        "process" (padrão) ou "thread"
+    EXECUTOR_CPU_WORKERS     nº de processos/threads de CPU (padrão: nº de CPUs)
+    EXECUTOR_CPU_QUEUE       tarefas de CPU aceitas ao mesmo tempo (padrão: 4x workers)
+    EXECUTOR_IO_WORKERS      nº de threads de I/O (padrão: 32)
+    EXECUTOR_IO_QUEUE        tarefas de I/O aceitas ao mesmo tempo (padrão: 4x workers)
+    EXECUTOR_QUEUE_TIMEOUT   segundos esperando vaga antes do 503 (padrão: 10)
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from functools import partial
+from typing import AsyncIterator, Iterable
+import asyncio
+import os
+
+from fastapi import HTTPException
+
+from ephemeris_setup import init_ephemeris, init_worker
+
+CPU_POOL_KIND = os.environ.get("EXECUTOR_CPU_POOL", "process")
+CPU_WORKERS = int(os.environ.get("EXECUTOR_CPU_WORKERS", str(os.cpu_count() or 2)))
+CPU_QUEUE = int(os.environ.get("EXECUTOR_CPU_QUEUE", str(CPU_WORKERS * 4)))
+IO_WORKERS = int(os.environ.get("EXECUTOR_IO_WORKERS", "32"))
+IO_QUEUE = int(os.environ.get("EXECUTOR_IO_QUEUE", str(IO_WORKERS * 4)))
+QUEUE_TIMEOUT = float(os.environ.get("EXECUTOR_QUEUE_TIMEOUT", "10"))
+
+
+def _init_cpu_worker():
+    """Inicialização de cada worker de CPU: efemérides prontas antes da primeira tarefa."""
+    if CPU_POOL_KIND == "thread":
+        init_ephemeris()
+    else:
+        init_worker()
+
+
+class BoundedPool:
+    """
+    Executor com limite de tarefas simultâneas (em execução + na fila).
+    """
+
+    def __init__(self, name: str, factory, max_pending: int, queue_timeout: float = QUEUE_TIMEOUT):
+        self.name = name
+        self._factory = factory
+        self._executor = None
+        self.max_pending = max_pending
+        self.queue_timeout = queue_timeout
+        self._semaphore = None
+        self.running = 0
+        self.waiting = 0
+        self.completed = 0
+        self.rejected = 0
+        self.restarts = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = self._factory()
+        return self._executor
+
+    async def run(self, fn, *args, **kwargs):
+        """Executa fn(*args, **kwargs) no pool e aguarda o resultado sem bloquear o loop."""
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail=f"Servidor ocupado ({self.name}). Tente novamente em instantes.")
+        finally:
+            self.waiting -= 1
+        self.running += 1
+        executor = self.executor
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+        except BrokenProcessPool:
+            # Um worker morreu (ou devolveu algo que não dá para desserializar) e o
+            # pool não aceita mais tarefas: descarta e deixa a próxima chamada criar outro
+            self._reset(executor)
+            raise HTTPException(status_code=503, detail=f"Falha em um worker ({self.name}). Tente novamente em instantes.")
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self._semaphore.release()
+
+    def _reset(self, broken):
+        """Troca o executor quebrado (só uma vez, mesmo com várias tarefas falhando juntas)."""
+        if self._executor is broken:
+            self._executor = None
+            self.restarts += 1
+            broken.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._semaphore = None
+
+    def stats(self) -> dict:
+        return {
+            "max_pending": self.max_pending,
+            "running": self.running,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "restarts": self.restarts,
+        }
+
+
+def _cpu_factory():
+    if CPU_POOL_KIND == "thread":
+        return ThreadPoolExecutor(max_workers=CPU_WORKERS, thread_name_prefix="cpu", initializer=_init_cpu_worker)
+    return ProcessPoolExecutor(max_workers=CPU_WORKERS, initializer=_init_cpu_worker)
+
+
+cpu_pool = BoundedPool("cpu", _cpu_factory, CPU_QUEUE)
+io_pool = BoundedPool(
+    "io",
+    lambda: ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io"),
+    IO_QUEUE,
+)
+
+
+async def run_cpu(fn, *args, **kwargs):
+    """Trabalho CPU-bound (efemérides). fn precisa ser importável (pool de processos)."""
+    return await cpu_pool.run(fn, *args, **kwargs)
+
+
+async def run_io(fn, *args, **kwargs):
+    """Trabalho bloqueante de I/O (rede, banco, bcrypt)."""
+    return await io_pool.run(fn, *args, **kwargs)
+
+
+async def map_cpu(fn, calls: Iterable[tuple], window: int = CPU_WORKERS,
+                  return_exceptions: bool = False) -> AsyncIterator:
+    """
+    fn(*args) no pool de CPU para cada args de calls, com no máximo `window`
+    em andamento; devolve os resultados na ordem de calls, cada um assim que
+    fica pronto, e só então dispara o próximo. Pedidos longos (muitos blocos)
+    não enchem a fila do pool, que daria 503 a um bloco que podia esperar.
+    return_exceptions=True devolve a exceção de um bloco no lugar do resultado.
+    """
+    calls = iter(calls)
+    running = deque()
+
+    def submit():
+        args = next(calls, None)
+        if args is not None:
+            running.append(asyncio.ensure_future(run_cpu(fn, *args)))
+
+    for _ in range(max(1, window)):
+        submit()
+    try:
+        while running:
+            future = running.popleft()
+            try:
+                result = await future
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                result = e
+            submit()
+            yield result
+    finally:
+        # Consumidor parou (cliente desconectou ou erro): não deixa blocos rodando à toa
+        for future in running:
+            future.cancel()
+
+
+def shutdown():
+    cpu_pool.shutdown()
+    io_pool.shutdown()
+
+
+def stats() -> dict:
+    return {"cpu_pool": CPU_POOL_KIND, "cpu": cpu_pool.stats(), "io": io_pool.stats()}
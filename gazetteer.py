@@ -0,0 +1,335 @@
+# gazetteer.py - Gazetteer Offline (GeoNames)
+
+"""
+Índice offline de cidades construído a partir de um dump do GeoNames
+(cities500.txt, cities1000.txt, cities15000.txt...).
+
+O índice é gerado uma vez e gravado em arquivos que são abertos com mmap:
+- city_*.npy       colunas da tabela de cidades (id, lat, lon, população, país, fuso)
+- name_offsets.npy início de cada nome de exibição em names.bin (+ sentinela)
+- names.bin        nomes de exibição (com acento)
+- key_offsets.npy  início de cada chave normalizada em keys.bin (ordenadas, + sentinela)
+- key_cities.npy   linha da cidade de cada chave
+- keys.bin         texto das chaves (sem acento, minúsculas)
+- meta.json        lista de fusos e aliases de país
+
+As colunas são lidas via memoryview, que devolve int/float do Python sem
+criar escalares numpy: uma busca exata leva poucos microssegundos.
+
+Busca exata e por prefixo são feitas com bisect sobre as chaves ordenadas,
+sem acesso à rede.
+
+Gerar o índice:
+    python gazetteer.py build cities15000.txt [countryInfo.txt] [--alternate-names]
+"""
+
+from bisect import bisect_left
+from typing import List, Optional, NamedTuple
+import json
+import mmap
+import os
+import sys
+
+import numpy as np
+
+from geocoding import normalize_text
+
+GAZETTEER_DIR = os.environ.get("GAZETTEER_DIR", "./gazetteer")
+
+# Colunas da tabela de cidades (país = 2 letras ASCII empacotadas em um uint16)
+CITY_COLUMNS = {
+    "id": "<i4",
+    "lat": "<f8",
+    "lon": "<f8",
+    "population": "<i8",
+    "country": "<u2",
+    "tz": "<i2",
+}
+
+
+def _pack_country(code: str) -> int:
+    code = (code or "  ").encode("ascii")[:2].ljust(2)
+    return code[0] | (code[1] << 8)
+
+
+def _unpack_country(value: int) -> str:
+    return bytes((value & 0xFF, value >> 8)).decode("ascii").strip()
+
+# Nomes de país mais usados pelos clientes que não aparecem no countryInfo.txt (em inglês)
+COUNTRY_ALIASES = {
+    "brasil": "BR", "brazil": "BR",
+    "portugal": "PT",
+    "estados unidos": "US", "eua": "US", "usa": "US", "estados unidos da america": "US",
+    "argentina": "AR", "uruguai": "UY", "paraguai": "PY", "chile": "CL",
+    "bolivia": "BO", "peru": "PE", "colombia": "CO", "venezuela": "VE",
+    "mexico": "MX", "canada": "CA",
+    "alemanha": "DE", "franca": "FR", "espanha": "ES", "italia": "IT",
+    "inglaterra": "GB", "reino unido": "GB", "escocia": "GB",
+    "holanda": "NL", "paises baixos": "NL", "belgica": "BE", "suica": "CH",
+    "irlanda": "IE", "austria": "AT", "suecia": "SE", "noruega": "NO",
+    "japao": "JP", "china": "CN", "india": "IN", "russia": "RU",
+    "australia": "AU", "angola": "AO", "mocambique": "MZ", "cabo verde": "CV",
+}
+
+
+class City(NamedTuple):
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+    timezone: Optional[str]
+
+
+class _KeyView:
+    """Sequência (para bisect) sobre as chaves gravadas em keys.bin."""
+
+    def __init__(self, offsets: np.ndarray, blob):
+        # memoryview devolve int Python direto, bem mais rápido que escalares numpy
+        self._off = memoryview(offsets)
+        self._blob = blob
+
+    def __len__(self):
+        return len(self._off) - 1
+
+    def __getitem__(self, i):
+        return self._blob[self._off[i]:self._off[i + 1]]
+
+
+def _open_blob(path: str):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class Gazetteer:
+    """
+    Índice de cidades somente leitura, aberto via mmap.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        load = lambda name: np.load(os.path.join(directory, name), mmap_mode="r")
+        self.columns = {name: load(f"city_{name}.npy") for name in CITY_COLUMNS}
+        self.key_cities = load("key_cities.npy")
+        self._key_view = _KeyView(load("key_offsets.npy"), _open_blob(os.path.join(directory, "keys.bin")))
+        self._name_view = _KeyView(load("name_offsets.npy"), _open_blob(os.path.join(directory, "names.bin")))
+        self._col = {name: memoryview(arr) for name, arr in self.columns.items()}
+        self._key_city = memoryview(self.key_cities)
+        with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        self.timezones: List[str] = meta["timezones"]
+        self.countries = dict(COUNTRY_ALIASES)
+        self.countries.update(meta.get("countries", {}))
+        self.row_by_id = {}
+
+    @classmethod
+    def open(cls, directory: str = GAZETTEER_DIR) -> Optional["Gazetteer"]:
+        """Abre o índice se ele já foi gerado; caso contrário retorna None."""
+        if not os.path.exists(os.path.join(directory, "meta.json")):
+            return None
+        return cls(directory)
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    # ----- Conversões -----
+
+    def country_code(self, country: str) -> Optional[str]:
+        """Converte "Brasil", "Brazil" ou "BR" no código ISO de 2 letras."""
+        norm = normalize_text(country)
+        if len(norm) == 2:
+            return norm.upper()
+        return self.countries.get(norm)
+
+    def _city(self, row: int) -> City:
+        col = self._col
+        tz_idx = col["tz"][row]
+        return City(
+            id=col["id"][row],
+            name=self._name_view[row].decode("utf-8"),
+            country=_unpack_country(col["country"][row]),
+            lat=col["lat"][row],
+            lon=col["lon"][row],
+            population=col["population"][row],
+            timezone=self.timezones[tz_idx] if tz_idx >= 0 else None,
+        )
+
+    def _range(self, prefix: bytes, exact: bool = False):
+        """Intervalo [lo, hi) das chaves que começam com (ou são iguais a) prefix."""
+        lo = bisect_left(self._key_view, prefix)
+        # 0xFF nunca aparece em UTF-8, então prefix + 0xFF é maior que qualquer extensão
+        upper = prefix + b"\x00" if exact else prefix + b"\xff"
+        hi = bisect_left(self._key_view, upper, lo)
+        return lo, hi
+
+    def _rows(self, lo: int, hi: int, country_code: Optional[str]) -> np.ndarray:
+        rows = np.unique(self.key_cities[lo:hi])
+        if country_code:
+            rows = rows[self.columns["country"][rows] == _pack_country(country_code)]
+        return rows
+
+    # ----- Consultas -----
+
+    def lookup(self, city: str, country: Optional[str] = None) -> Optional[City]:
+        """
+        Busca exata (sem acentos, sem diferenciar maiúsculas).
+        Havendo homônimos no país, retorna a cidade mais populosa.
+        """
+        code = None
+        if country:
+            code = self.country_code(country)
+            if code is None:
+                return None
+        lo, hi = self._range(normalize_text(city).encode("utf-8"), exact=True)
+        # Poucos homônimos por chave: laço simples é mais rápido que numpy aqui
+        packed = _pack_country(code) if code else None
+        countries, populations = self._col["country"], self._col["population"]
+        best, best_pop = None, -1
+        for i in range(lo, hi):
+            row = self._key_city[i]
+            if packed is not None and countries[row] != packed:
+                continue
+            pop = populations[row]
+            if pop > best_pop:
+                best, best_pop = row, pop
+        return self._city(best) if best is not None else None
+
+    def suggest(self, prefix: str, country: Optional[str] = None, limit: int = 10) -> List[City]:
+        """
+        Autocomplete: cidades cujo nome começa com o prefixo, ordenadas por população.
+        """
+        norm = normalize_text(prefix)
+        if not norm:
+            return []
+        code = self.country_code(country) if country else None
+        if country and code is None:
+            return []
+        lo, hi = self._range(norm.encode("utf-8"))
+        if lo == hi:
+            return []
+        rows = self._rows(lo, hi, code)
+        population = self.columns["population"]
+        if len(rows) > limit:
+            rows = rows[np.argpartition(-population[rows], limit - 1)[:limit]]
+        rows = rows[np.argsort(-population[rows], kind="stable")]
+        return [self._city(int(r)) for r in rows]
+
+    def by_id(self, geonameid: int) -> Optional[City]:
+        """Busca pelo geonameid (tabela de ids montada na primeira chamada)."""
+        if not self.row_by_id:
+            self.row_by_id = {g: i for i, g in enumerate(self.columns["id"].tolist())}
+        row = self.row_by_id.get(int(geonameid))
+        return self._city(row) if row is not None else None
+
+
+# ========= Construção do Índice =========
+
+def _load_country_info(path: str) -> dict:
+    """countryInfo.txt do GeoNames -> {nome normalizado: código ISO}."""
+    countries = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.startswith("#") or not line.strip():
+                continue
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) > 4 and cols[0] and cols[4]:
+                countries[normalize_text(cols[4])] = cols[0]
+    return countries
+
+
+def build_index(dump_path: str, out_dir: str = GAZETTEER_DIR,
+                country_info_path: Optional[str] = None,
+                alternate_names: bool = False) -> int:
+    """
+    Lê um dump de cidades do GeoNames (TSV) e grava o índice em out_dir.
+    Retorna o número de cidades indexadas.
+    """
+    timezones = {}
+    columns = {name: [] for name in CITY_COLUMNS}
+    names = bytearray()
+    name_offsets = []
+    entries = []  # (chave, linha)
+
+    with open(dump_path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 18:
+                continue
+            row = len(name_offsets)
+            tz = cols[17]
+            columns["id"].append(int(cols[0]))
+            columns["lat"].append(float(cols[4]))
+            columns["lon"].append(float(cols[5]))
+            columns["population"].append(int(cols[14] or 0))
+            columns["country"].append(_pack_country(cols[8]))
+            columns["tz"].append(timezones.setdefault(tz, len(timezones)) if tz else -1)
+            name_offsets.append(len(names))
+            names += cols[1].encode("utf-8")
+
+            variants = {cols[1], cols[2]}
+            if alternate_names and cols[3]:
+                variants.update(cols[3].split(","))
+            for key in {normalize_text(v) for v in variants}:
+                if key:
+                    entries.append((key.encode("utf-8"), row))
+
+    entries.sort()
+    key_blob = bytearray()
+    key_offsets = np.zeros(len(entries) + 1, dtype="<u4")
+    key_cities = np.zeros(len(entries), dtype="<u4")
+    for i, (key, row) in enumerate(entries):
+        key_offsets[i] = len(key_blob)
+        key_cities[i] = row
+        key_blob += key
+    key_offsets[-1] = len(key_blob)
+
+    name_offsets.append(len(names))
+
+    os.makedirs(out_dir, exist_ok=True)
+    for name, dtype in CITY_COLUMNS.items():
+        np.save(os.path.join(out_dir, f"city_{name}.npy"), np.array(columns[name], dtype=dtype))
+    np.save(os.path.join(out_dir, "name_offsets.npy"), np.array(name_offsets, dtype="<u4"))
+    np.save(os.path.join(out_dir, "key_offsets.npy"), key_offsets)
+    np.save(os.path.join(out_dir, "key_cities.npy"), key_cities)
+    with open(os.path.join(out_dir, "keys.bin"), "wb") as f:
+        f.write(key_blob)
+    with open(os.path.join(out_dir, "names.bin"), "wb") as f:
+        f.write(names)
+
+    meta = {
+        "source": os.path.basename(dump_path),
+        "timezones": sorted(timezones, key=timezones.get),
+        "countries": _load_country_info(country_info_path) if country_info_path else {},
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return len(name_offsets) - 1
+
+
+_gazetteer = None
+_gazetteer_loaded = False
+
+
+def get_gazetteer() -> Optional[Gazetteer]:
+    """Índice compartilhado pelo processo (None se ainda não foi gerado)."""
+    global _gazetteer, _gazetteer_loaded
+    if not _gazetteer_loaded:
+        _gazetteer = Gazetteer.open(GAZETTEER_DIR)
+        _gazetteer_loaded = True
+    return _gazetteer
+
+
+if __name__ == "__main__":
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+    if len(args) < 2 or args[0] != "build":
+        print("Uso: python gazetteer.py build <cities.txt> [countryInfo.txt] [--alternate-names]")
+        sys.exit(1)
+    total = build_index(
+        args[1],
+        country_info_path=args[2] if len(args) > 2 else None,
+        alternate_names="--alternate-names" in sys.argv,
+    )
+    print(f"✅ {total} cidades indexadas em {GAZETTEER_DIR}")
@@ -0,0 +1,199 @@
+# geocoding.py - Cache de Geocodificação
+
+"""
+Cache de geocodificação na frente do Nominatim.
+
+Camadas:
+1. LRU em memória (por processo)
+2. Tabela geocode_cache no banco (SQLite/PostgreSQL de database.py)
+3. Nominatim (só quando as duas anteriores falham)
+
+Cidades não encontradas também são guardadas (cache negativo) por um tempo
+limitado, para não repetir a mesma busca inútil a cada requisição.
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+import threading
+import unicodedata
+import os
+
+import requests
+
+from database import SessionLocal
+import models
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+NOMINATIM_HEADERS = {"User-Agent": "AstroAPI/1.0"}
+NOMINATIM_TIMEOUT = float(os.environ.get("GEOCODE_TIMEOUT_SECONDS", "10"))
+
+LRU_SIZE = int(os.environ.get("GEOCODE_LRU_SIZE", "4096"))
+MISS_TTL = timedelta(seconds=int(os.environ.get("GEOCODE_MISS_TTL_SECONDS", str(6 * 3600))))
+
+# Marcador para "já sabemos que não existe" dentro do LRU
+_NOT_FOUND = object()
+
+
+def normalize_text(text: str) -> str:
+    """Remove acentos, converte para minúscula e colapsa espaços ("  São  Paulo" -> "sao paulo")."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.casefold().split())
+
+
+def normalize_place(city: str, country: str) -> str:
+    """
+    Chave canônica de (cidade, país).
+    "  São  Paulo", "BRASIL" -> "sao paulo|brasil"
+    """
+    return f"{normalize_text(city)}|{normalize_text(country)}"
+
+
+def _fetch_nominatim(city: str, country: str):
+    """
+    Consulta o Nominatim.
+    Retorna (lat, lon), None se o lugar não existe, ou levanta exceção em erro de rede/servidor.
+    """
+    params = {"city": city, "country": country, "format": "json"}
+    response = requests.get(NOMINATIM_URL, params=params, headers=NOMINATIM_HEADERS, timeout=NOMINATIM_TIMEOUT)
+    response.raise_for_status()
+    results = response.json()
+    if not results:
+        return None
+    return float(results[0]["lat"]), float(results[0]["lon"])
+
+
+class GeocodingCache:
+    """
+    LRU em memória + tabela no banco, com cache negativo e contadores.
+    """
+
+    def __init__(self, maxsize: int = LRU_SIZE, miss_ttl: timedelta = MISS_TTL):
+        self.maxsize = maxsize
+        self.miss_ttl = miss_ttl
+        self._lru = OrderedDict()  # key -> ((lat, lon) | _NOT_FOUND, expires_at | None)
+        self._lock = threading.Lock()
+        self.lru_hits = 0
+        self.db_hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.errors = 0
+
+    # ----- LRU -----
+
+    def _lru_get(self, key: str):
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= datetime.utcnow():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            return value
+
+    def _lru_put(self, key: str, value, expires_at: Optional[datetime]):
+        with self._lock:
+            self._lru[key] = (value, expires_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    # ----- Banco -----
+
+    def _db_get(self, key: str):
+        db = SessionLocal()
+        try:
+            row = db.query(models.GeocodeCache).filter(models.GeocodeCache.query_key == key).first()
+            if row is None:
+                return None
+            if row.expires_at is not None and row.expires_at <= datetime.utcnow():
+                return None
+            if not row.found:
+                return _NOT_FOUND, row.expires_at
+            return (row.latitude, row.longitude), None
+        except Exception:
+            # Banco indisponível não pode derrubar o cálculo do mapa
+            self.errors += 1
+            return None
+        finally:
+            db.close()
+
+    def _db_put(self, key: str, city: str, country: str, coords, expires_at: Optional[datetime]):
+        db = SessionLocal()
+        try:
+            row = db.query(models.GeocodeCache).filter(models.GeocodeCache.query_key == key).first()
+            if row is None:
+                row = models.GeocodeCache(query_key=key)
+                db.add(row)
+            row.city = city
+            row.country = country
+            row.found = coords is not None
+            row.latitude = coords[0] if coords else None
+            row.longitude = coords[1] if coords else None
+            row.expires_at = expires_at
+            row.created_at = datetime.utcnow()
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.errors += 1
+        finally:
+            db.close()
+
+    # ----- API pública -----
+
+    def lookup(self, city: str, country: str) -> Optional[Tuple[float, float]]:
+        """
+        Retorna (lat, lon) ou None se a localização não existe.
+        Erros de rede do Nominatim são propagados e NÃO entram no cache.
+        """
+        key = normalize_place(city, country)
+
+        value = self._lru_get(key)
+        if value is not None:
+            if value is _NOT_FOUND:
+                self.negative_hits += 1
+                return None
+            self.lru_hits += 1
+            return value
+
+        stored = self._db_get(key)
+        if stored is not None:
+            value, expires_at = stored
+            self._lru_put(key, value, expires_at)
+            if value is _NOT_FOUND:
+                self.negative_hits += 1
+                return None
+            self.db_hits += 1
+            return value
+
+        self.misses += 1
+        coords = _fetch_nominatim(city, country)
+        expires_at = None if coords is not None else datetime.utcnow() + self.miss_ttl
+        self._lru_put(key, coords if coords is not None else _NOT_FOUND, expires_at)
+        self._db_put(key, city, country, coords, expires_at)
+        return coords
+
+    def clear(self):
+        """Limpa apenas o LRU em memória (a tabela no banco é mantida)."""
+        with self._lock:
+            self._lru.clear()
+
+    def stats(self) -> dict:
+        hits = self.lru_hits + self.db_hits + self.negative_hits
+        total = hits + self.misses
+        return {
+            "lru_size": len(self._lru),
+            "lru_hits": self.lru_hits,
+            "db_hits": self.db_hits,
+            "negative_hits": self.negative_hits,
+            "nominatim_calls": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+# Instância única usada pela API
+geocode_cache = GeocodingCache()
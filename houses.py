@@ -0,0 +1,106 @@
+# houses.py - Tabela de Casas (busca binária)
+
+"""
+Atribuição de casas por busca binária.
+
+As 12 cúspides são "desenroladas" a partir do Ascendente (cúspide 1 = 0°,
+demais em ordem crescente até < 360°), então a volta em 0° Áries deixa de
+existir e um único bisect encontra a casa nominal. A regra do orbe de
+transição (planeta a até 8° da cúspide 1/10 ou 6° das demais conta na casa
+seguinte) vem de uma tabela pré-calculada por casa.
+
+Resultado idêntico à varredura linear original (find_house_nominal /
+find_house_with_orb, guardadas como referência em test_houses.py). Para um
+mapa só, HouseTable.house (bisect escalar por corpo) é o caminho mais rápido;
+houses() e assign_houses_batch valem a pena em lotes de mapas.
+"""
+
+from bisect import bisect_right
+from typing import Sequence
+
+import numpy as np
+
+# Orbe para a cúspide seguinte: 8° para as angulares 1 e 10, 6° para as demais
+ANGULAR_ORB = 8
+DEFAULT_ORB = 6
+
+# NEXT_HOUSE[i]: casa seguinte à casa i+1; NEXT_ORB[i]: orbe até a cúspide dela
+NEXT_HOUSE = np.array([(i + 1) % 12 + 1 for i in range(12)], dtype=np.int8)
+NEXT_ORB = np.array([ANGULAR_ORB if h in (1, 10) else DEFAULT_ORB for h in NEXT_HOUSE.tolist()], dtype=np.float64)
+_NEXT_HOUSE = NEXT_HOUSE.tolist()
+_NEXT_ORB = NEXT_ORB.tolist()
+
+
+def unroll_cusps(cusps: np.ndarray) -> np.ndarray:
+    """Cúspides relativas à cúspide 1: (..., 12) -> (..., 12), de 0 a < 360 em ordem crescente."""
+    cusps = np.asarray(cusps, dtype=np.float64)
+    return np.mod(cusps - cusps[..., :1], 360.0)
+
+
+def _distance_to_next(cusps: np.ndarray, idx: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Distância até a cúspide seguinte, com a mesma aritmética da varredura linear original."""
+    nxt = (idx + 1) % 12
+    end = cusps[nxt] if cusps.ndim == 1 else np.take_along_axis(cusps, nxt, axis=-1)
+    return np.where(end >= longitudes, end - longitudes, (end + 360) - longitudes)
+
+
+class HouseTable:
+    """
+    Cúspides de um mapa prontas para consulta.
+
+    cusps: as 12 cúspides (longitude) como saem de swe.houses
+    """
+
+    __slots__ = ("cusps", "origin", "unrolled", "_cusps_list", "_unrolled_list")
+
+    def __init__(self, cusps: Sequence[float]):
+        self.cusps = np.asarray(cusps, dtype=np.float64)[:12]
+        self.origin = float(self.cusps[0])
+        self.unrolled = unroll_cusps(self.cusps)
+        # Listas para as consultas escalares (bisect em lista é mais rápido que em array)
+        self._cusps_list = self.cusps.tolist()
+        self._unrolled_list = self.unrolled.tolist()
+
+    def house(self, longitude: float, orb: bool = True) -> int:
+        """Casa de uma longitude (orb=False: casa nominal, sem orbe de transição)."""
+        i = bisect_right(self._unrolled_list, (longitude - self.origin) % 360.0) - 1
+        if not orb:
+            return i + 1
+        end = self._cusps_list[(i + 1) % 12]
+        dist = end - longitude if end >= longitude else (end + 360) - longitude
+        if 0 < dist <= _NEXT_ORB[i]:
+            return _NEXT_HOUSE[i]
+        return i + 1
+
+    def houses(self, longitudes: Sequence[float], orb=True) -> np.ndarray:
+        """
+        Casas de vários corpos de uma vez.
+        orb: bool para todos, ou array booleano por corpo (ex.: Nodos sem orbe).
+        """
+        lon = np.asarray(longitudes, dtype=np.float64)
+        idx = np.searchsorted(self.unrolled, np.mod(lon - self.origin, 360.0), side="right") - 1
+        return _apply_orb(self.cusps, idx, lon, orb)
+
+
+def _apply_orb(cusps: np.ndarray, idx: np.ndarray, lon: np.ndarray, orb) -> np.ndarray:
+    """Casa nominal (idx + 1) ou a seguinte, quando dentro do orbe da próxima cúspide."""
+    nominal = (idx + 1).astype(np.int8)
+    if orb is False:
+        return nominal
+    dist = _distance_to_next(cusps, idx, lon)
+    shift = (dist > 0) & (dist <= NEXT_ORB[idx]) & np.asarray(orb, dtype=bool)
+    return np.where(shift, NEXT_HOUSE[idx], nominal)
+
+
+def assign_houses_batch(cusps: np.ndarray, longitudes: np.ndarray, orb=True) -> np.ndarray:
+    """
+    Casas de um lote de mapas sem laço em Python.
+    cusps: (B, 12), longitudes: (B, N) -> (B, N) casas
+    """
+    cusps = np.asarray(cusps, dtype=np.float64)[..., :12]
+    lon = np.asarray(longitudes, dtype=np.float64)
+    unrolled = unroll_cusps(cusps)
+    rel = np.mod(lon - cusps[..., :1], 360.0)
+    # Busca binária por linha equivale a contar quantas cúspides ficam <= posição
+    idx = np.count_nonzero(unrolled[..., None, :] <= rel[..., :, None], axis=-1) - 1
+    return _apply_orb(cusps, idx, lon, orb)
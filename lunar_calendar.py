@@ -0,0 +1,237 @@
+# lunar_calendar.py - Calendário Lunar
+
+"""
+Fases da Lua, ingressos da Lua nos signos e períodos fora de curso de um ano.
+
+A Lua nunca fica retrógrada e anda entre ~11,8 e ~15,4 graus/dia, sempre
+muito mais rápido que qualquer planeta. Então qualquer ângulo que dependa
+dela (longitude, elongação ao Sol, distância a um planeta) cresce de forma
+monótona e cada alvo é cruzado uma vez por ciclo. O buscador daqui usa isso:
+chute pela velocidade média e Newton com a velocidade do próprio Swiss
+Ephemeris (2-4 chamadas por evento), sem varredura nem colchete.
+
+Fora de curso: do último aspecto maior exato da Lua (conjunção, sextil,
+quadratura, trígono, oposição) a Sol..Plutão até a saída do signo. A partir
+da distância de cada planeta no instante do ingresso seguinte já se sabe
+qual foi o último aspecto e mais ou menos quando; só esses candidatos são
+refinados.
+
+O ano inteiro (no fuso pedido) fica em cache por (ano, fuso).
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, List, NamedTuple, Optional, Tuple
+import threading
+
+import pytz
+import swisseph as swe
+
+from chart_core import PLANETS_SWEPH, zodiac_signs
+from ephemeris_tables import datetime_to_jd
+
+FLAGS = swe.FLG_SWIEPH | swe.FLG_SPEED
+
+# Velocidades médias (graus/dia) para o primeiro chute
+MOON_MEAN_SPEED = 13.176
+ELONGATION_MEAN_SPEED = 12.191
+
+# Precisão do Newton (dias): ~0,1 s
+TIME_TOLERANCE = 1e-6
+MAX_ITERATIONS = 12
+
+PHASES = {
+    0: "Lua Nova",
+    90: "Quarto Crescente",
+    180: "Lua Cheia",
+    270: "Quarto Minguante",
+}
+
+# Planetas considerados no fora de curso (tradicionais + modernos)
+VOID_BODIES = ["Sol", "Mercúrio", "Vênus", "Marte", "Júpiter", "Saturno", "Urano", "Netuno", "Plutão"]
+VOID_ASPECTS = {
+    0: "Conjunção", 60: "Sextil", 90: "Quadratura", 120: "Trígono", 180: "Oposição",
+    240: "Trígono", 270: "Quadratura", 300: "Sextil",
+}
+
+LUNAR_CACHE_SIZE = 64
+
+PHASE = "phase"
+INGRESS = "ingress"
+VOID_OF_COURSE = "void_of_course"
+
+
+class LunarEvent(NamedTuple):
+    kind: str             # PHASE / INGRESS / VOID_OF_COURSE
+    jd: float             # JD (UT) do evento ou do início do período
+    label: str
+    sign: str             # signo da Lua
+    end_jd: Optional[float] = None  # fim do fora de curso (ingresso seguinte)
+
+
+def _wrap180(x: float) -> float:
+    return (x + 180.0) % 360.0 - 180.0
+
+
+def _position(jd: float, code: int) -> Tuple[float, float]:
+    pos, _ = swe.calc_ut(jd, code, FLAGS)
+    return pos[0], pos[3]
+
+
+def moon_longitude(jd: float) -> Tuple[float, float]:
+    return _position(jd, swe.MOON)
+
+
+def elongation(jd: float) -> Tuple[float, float]:
+    """Lua - Sol (0..360) e sua velocidade."""
+    moon, moon_speed = _position(jd, swe.MOON)
+    sun, sun_speed = _position(jd, swe.SUN)
+    return (moon - sun) % 360.0, moon_speed - sun_speed
+
+
+def relative_to(code: int) -> Callable[[float], Tuple[float, float]]:
+    """Lua - planeta (0..360) e sua velocidade."""
+    def angle(jd: float):
+        moon, moon_speed = _position(jd, swe.MOON)
+        body, body_speed = _position(jd, code)
+        return (moon - body) % 360.0, moon_speed - body_speed
+    return angle
+
+
+def solve(angle: Callable[[float], Tuple[float, float]], target: float, jd_guess: float) -> float:
+    """Newton: instante perto de jd_guess em que o ângulo (sempre crescente) vale target."""
+    jd = jd_guess
+    for _ in range(MAX_ITERATIONS):
+        value, speed = angle(jd)
+        step = _wrap180(value - target) / speed
+        jd -= step
+        if abs(step) < TIME_TOLERANCE:
+            break
+    return jd
+
+
+def phases(jd_start: float, jd_end: float) -> List[LunarEvent]:
+    """Lua Nova, quartos e Lua Cheia em [jd_start, jd_end)."""
+    value, _ = elongation(jd_start)
+    target = (int(value // 90) + 1) * 90 % 360
+    jd = jd_start + ((target - value) % 360.0) / ELONGATION_MEAN_SPEED
+    events = []
+    while True:
+        jd = solve(elongation, target, jd)
+        if jd >= jd_end:
+            return events
+        if jd >= jd_start:
+            events.append(LunarEvent(PHASE, jd, PHASES[target], zodiac_signs[int(moon_longitude(jd)[0] // 30)]))
+        target = (target + 90) % 360
+        jd += 90.0 / ELONGATION_MEAN_SPEED
+
+
+def ingresses(jd_start: float, jd_end: float) -> List[float]:
+    """
+    Instantes de ingresso da Lua: o último antes de jd_start, todos no intervalo
+    e o primeiro depois de jd_end (para fechar o signo em que o ano termina).
+    """
+    lon, _ = moon_longitude(jd_start)
+    boundary = (lon // 30) * 30.0
+    jd = solve(moon_longitude, boundary, jd_start - (lon - boundary) / MOON_MEAN_SPEED)
+    times = [jd]
+    while jd < jd_end:
+        boundary = (boundary + 30.0) % 360.0
+        jd = solve(moon_longitude, boundary, jd + 30.0 / MOON_MEAN_SPEED)
+        times.append(jd)
+    return times
+
+
+def last_aspect(sign_start: float, sign_end: float) -> Optional[Tuple[float, str]]:
+    """Último aspecto exato da Lua a VOID_BODIES no signo [sign_start, sign_end): (jd, rótulo)."""
+    best = None
+    moon, moon_speed = moon_longitude(sign_end)
+    for name in VOID_BODIES:
+        code = PLANETS_SWEPH[name]
+        body, body_speed = _position(sign_end, code)
+        rel = (moon - body) % 360.0
+        # Aspecto mais recente: o ângulo da tabela logo abaixo da distância atual
+        angle = max((a for a in VOID_ASPECTS if a <= rel), default=0)
+        guess = sign_end - (rel - angle) / (moon_speed - body_speed)
+        if guess < sign_start - 0.5:
+            continue
+        jd = solve(relative_to(code), angle, guess)
+        if sign_start <= jd <= sign_end and (best is None or jd > best[0]):
+            best = (jd, f"{VOID_ASPECTS[angle]} a {name}")
+    return best
+
+
+def void_of_course(ingress_times: List[float], jd_start: float, jd_end: float) -> List[LunarEvent]:
+    """Períodos fora de curso que tocam [jd_start, jd_end)."""
+    events = []
+    for sign_start, sign_end in zip(ingress_times, ingress_times[1:]):
+        if sign_end < jd_start or sign_start >= jd_end:
+            continue
+        found = last_aspect(sign_start, sign_end)
+        start, aspect = found if found else (sign_start, None)
+        if sign_end <= jd_start or start >= jd_end:
+            continue
+        sign = zodiac_signs[int(moon_longitude((sign_start + sign_end) / 2)[0] // 30)]
+        label = f"Lua fora de curso (após {aspect})" if aspect else "Lua fora de curso (signo inteiro)"
+        events.append(LunarEvent(VOID_OF_COURSE, start, label, sign, sign_end))
+    return events
+
+
+def lunar_year(jd_start: float, jd_end: float) -> List[LunarEvent]:
+    """Fases, ingressos e fora de curso em [jd_start, jd_end), em ordem cronológica."""
+    times = ingresses(jd_start, jd_end)
+    events = phases(jd_start, jd_end)
+    for jd in times:
+        if jd_start <= jd < jd_end:
+            sign = zodiac_signs[int(((moon_longitude(jd)[0] + 15) % 360) // 30)]
+            events.append(LunarEvent(INGRESS, jd, f"Lua entra em {sign}", sign))
+    events += void_of_course(times, jd_start, jd_end)
+    events.sort(key=lambda e: e.jd)
+    return events
+
+
+def local_year_range(year: int, tz_name: str) -> Tuple[float, float]:
+    """JD (UT) de 1º de janeiro 00:00 no fuso até 1º de janeiro do ano seguinte."""
+    tz = pytz.timezone(tz_name)
+    start = tz.localize(datetime(year, 1, 1))
+    end = tz.localize(datetime(year + 1, 1, 1))
+    return datetime_to_jd(start), datetime_to_jd(end)
+
+
+def compute_lunar_year(year: int, tz_name: str) -> List[LunarEvent]:
+    return lunar_year(*local_year_range(year, tz_name))
+
+
+class LunarCalendarCache:
+    """LRU de anos calculados, por (ano, fuso)."""
+
+    def __init__(self, maxsize: int = LUNAR_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, year: int, tz_name: str):
+        with self._lock:
+            value = self._lru.get((year, tz_name))
+            if value is None:
+                self.misses += 1
+                return None
+            self._lru.move_to_end((year, tz_name))
+            self.hits += 1
+            return value
+
+    def put(self, year: int, tz_name: str, value):
+        with self._lock:
+            self._lru[(year, tz_name)] = value
+            self._lru.move_to_end((year, tz_name))
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"years": len(self._lru), "hits": self.hits, "misses": self.misses}
+
+
+lunar_cache = LunarCalendarCache()
@@ -1,25 +1,94 @@
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
+from sqlalchemy import func
 import swisseph as swe
+import numpy as np
 import requests
+import asyncio
 from datetime import datetime, timedelta
-from timezonefinder import TimezoneFinder
 import pytz
 import json
 import os
+import time
 
 # Importar Google Gemini para IA
 import google.generativeai as genai
 
 # Importar database, models e auth
-from database import get_db, engine, Base
+from database import get_db, engine, Base, SessionLocal
 import models
 import auth
 
+# Cache de geocodificação (LRU + banco na frente do Nominatim)
+from geocoding import geocode_cache, normalize_place, normalize_text
+from gazetteer import get_gazetteer
+from timezones import tz_resolver
+
+# Inicialização do Swiss Ephemeris (caminho + aquecimento dos arquivos)
+from ephemeris_setup import init_ephemeris, ephemeris_status
+
+# Motor de aspectos vetorizado
+from aspects import AspectTable, DEFAULT_TABLE, MAJOR_ASPECTS, MINOR_ASPECTS, find_aspects
+
+# Representação interna do mapa (longitudes brutas em arrays)
+from chart_core import zodiac_signs, PLANETS_SWEPH, CHART_BODIES, HOUSE_SYSTEM, ChartArrays, compute_chart
+
+# Tabelas de efemérides pré-calculadas e motor de trânsitos
+from ephemeris_tables import get_ephemeris_tables, datetime_to_jd, jd_to_datetime
+from transits import TRANSIT_BODIES, TRANSIT_ORB, search_transits
+
+# Momento exato de aspectos/ingressos (colchete por velocidade + Brent)
+from events import find_events, resolve_body, aspect_targets, ingress_targets
+from solar_return import MAX_YEARS as SOLAR_RETURN_MAX_YEARS, solar_return_jds
+
+# Índice pré-calculado de estações e ingressos (busca binária)
+from station_index import get_station_index, year_range
+
+# Calendário lunar (fases, ingressos e fora de curso), em cache por ano e fuso
+from lunar_calendar import compute_lunar_year, lunar_cache
+
+# Busca eletiva (janelas de tempo que satisfazem condições)
+import electional
+
+# Retificação da hora de nascimento
+import rectification
+
+# Progressões secundárias e arco solar (uma varredura de efemérides por série)
+from progressions import METHODS as PROGRESSION_METHODS, MAX_YEARS as PROGRESSION_MAX_YEARS
+from progressions import PROGRESSION_TABLE, TROPICAL_YEAR, progression_frames, sweep as progression_sweep
+
+# Sinastria (matriz de aspectos cruzados + sobreposição de casas)
+from synastry import synastry
+
+# Ranking de compatibilidade contra os mapas salvos do usuário
+from compatibility import compatibility_index, score_matrix, top_k
+
+# Mapas de relacionamento (Composto e Davison)
+from relationship import composite_charts, davison_moment
+
+# Cache de mapas calculados (memória + banco)
+from chart_cache import ChartCache
+
+# Cache de relatórios da IA (mapa, nome, pergunta, versão do prompt, modelo)
+from report_cache import report_cache
+
+# Relatório gerado por seções em paralelo
+from report_prompt import SECTION_TITLES, get_section_prompt, report_section_keys
+from report_pipeline import generate_sections
+
+# Pools para trabalho bloqueante (efemérides, rede, bcrypt)
+import executor
+from executor import map_cpu, run_cpu, run_io
+
+# Streaming das respostas da IA (SSE) e modelo local de teste
+from chat_stream import sse, stream_stats
+from ai_gateway import ai_gateway
+
 # Importar módulo de geração de SVG
 from views.chart_svg import generate_chart_svg_from_birth_data, CustomChartColors
 
@@ -28,6 +97,11 @@ GOOGLE_API_KEY = os.environ.get("GOOGLE_API_KEY") or "AIzaSyCYLid7hqKnsD_dPsz1gA
 if GOOGLE_API_KEY:
     genai.configure(api_key=GOOGLE_API_KEY)
 
+# Modelos usados por cada rota de IA (clientes reutilizados pelo ai_gateway)
+CHAT_MODEL = 'gemini-2.5-flash'
+CONVERSATION_MODEL = 'gemini-2.0-flash-exp'
+REPORT_MODEL = 'gemini-2.5-flash'
+
 app = FastAPI(
     title="API de Mapa Astral",
     description="API com Quíron, Lilith, Nodos, retrogradação, casas com orbe, aspectos, elementos, quadruplicidades e Chat IA.",
@@ -50,6 +124,21 @@ app.add_middleware(
 # Criar tabelas do banco de dados ao iniciar
 Base.metadata.create_all(bind=engine)
 
+# Carregar o TimezoneFinder uma única vez (compartilhado por todas as requisições)
+tz_resolver.load()
+
+@app.on_event("startup")
+def purge_chart_cache():
+    # Remove do banco mapas calculados com efemérides/configurações antigas
+    chart_cache.purge_stale()
+    # ...e relatórios expirados ou de versões antigas do prompt
+    report_cache.purge_stale()
+
+@app.on_event("shutdown")
+def shutdown_pools():
+    executor.shutdown()
+    ai_gateway.reset()
+
 # ========= Modelos de Dados =========
 
 class BirthData(BaseModel):
@@ -85,6 +174,9 @@ class MapResult(BaseModel):
     elements: Dict[str, int]
     quadruplicities: Dict[str, int]  # <-- ADICIONAMOS AQUI
 
+# Cache de mapas: valor em memória é o ChartArrays (longitudes brutas); no banco, o JSON dele
+chart_cache = ChartCache(encode=lambda c: c.to_dict(), decode=ChartArrays.from_dict)
+
 class ReportRequest(BaseModel):
     name: str
     date: str      # Formato DD/MM/AAAA ou YYYY-MM-DD
@@ -92,13 +184,10 @@ class ReportRequest(BaseModel):
     city: str
     country: str
     question: Optional[str] = None  # Pergunta opcional do usuário
+    refresh: bool = False           # Ignora o cache e gera o relatório de novo
 
-# ========= Configurações de Signos, Elementos e Quadruplicidades =========
-
-zodiac_signs = [
-    "Áries", "Touro", "Gêmeos", "Câncer", "Leão", "Virgem",
-    "Libra", "Escorpião", "Sagitário", "Capricórnio", "Aquário", "Peixes"
-]
+# ========= Configurações de Elementos e Quadruplicidades =========
+# (signos, corpos e sistema de casas ficam em chart_core.py)
 
 element_map = {
     "Áries": "Fogo", "Leão": "Fogo", "Sagitário": "Fogo",
@@ -113,46 +202,45 @@ quad_map = {
     "Gêmeos": "Mutável", "Virgem": "Mutável", "Sagitário": "Mutável", "Peixes": "Mutável"
 }
 
-# ========= Corpos Principais (Quíron, Lilith, Nodos etc.) =========
-
-PLANETS_SWEPH = {
-    "Sol": swe.SUN,
-    "Lua": swe.MOON,
-    "Mercúrio": swe.MERCURY,
-    "Vênus": swe.VENUS,
-    "Marte": swe.MARS,
-    "Júpiter": swe.JUPITER,
-    "Saturno": swe.SATURN,
-    "Urano": swe.URANUS,
-    "Netuno": swe.NEPTUNE,
-    "Plutão": swe.PLUTO,
-    "Quíron": swe.CHIRON,
-    "Lilith": swe.MEAN_APOG,
-    "NóduloNorte": swe.TRUE_NODE
-    # NóduloSul = +180° do NóduloNorte manualmente
-}
+# Efemérides: caminho definido uma vez e arquivos .se1 aquecidos com um mapa de exemplo
+init_ephemeris(PLANETS_SWEPH.values(), HOUSE_SYSTEM)
 
 # ========= Geocodificação e Fuso Horário =========
 
-def get_coordinates(city: str, country: str):
-    url = "https://nominatim.openstreetmap.org/search"
-    params = {"city": city, "country": country, "format": "json"}
-    headers = {"User-Agent": "AstroAPI/1.0"}
-    response = requests.get(url, params=params, headers=headers)
-    if response.status_code == 200 and response.json():
-        location = response.json()[0]
-        return float(location["lat"]), float(location["lon"])
+def geocode_online(city: str, country: str):
+    # Cache LRU + banco na frente do Nominatim (ver geocoding.py)
+    try:
+        coords = geocode_cache.lookup(city, country)
+    except requests.RequestException:
+        coords = None
+    if coords:
+        return coords
     else:
         raise HTTPException(status_code=404, detail="Localização não encontrada")
 
 def get_timezone(latitude: float, longitude: float):
-    tf = TimezoneFinder()
-    timezone_str = tf.timezone_at(lat=latitude, lng=longitude)
+    timezone_str = tz_resolver.at(latitude, longitude)
     if timezone_str:
         return timezone_str
     else:
         raise HTTPException(status_code=500, detail="Não foi possível determinar o fuso horário.")
 
+def get_location(city: str, country: str):
+    """
+    Retorna (lat, lon, fuso). Cidades do gazetteer já trazem o fuso do
+    GeoNames, sem passar pelo TimezoneFinder.
+    """
+    gaz = get_gazetteer()
+    found = gaz.lookup(city, country) if gaz is not None else None
+    if found:
+        tz_str = tz_resolver.for_city(found)
+        if tz_str:
+            return found.lat, found.lon, tz_str
+        lat, lon = found.lat, found.lon
+    else:
+        lat, lon = geocode_online(city, country)
+    return lat, lon, get_timezone(lat, lon)
+
 def convert_to_ut(date_str: str, time_str: str, timezone_str: str):
     try:
         local_tz = pytz.timezone(timezone_str)
@@ -167,78 +255,22 @@ def convert_to_ut(date_str: str, time_str: str, timezone_str: str):
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao converter horário: {e}")
 
-# ========= Funções para Casas, Orbe de Transição e Aspectos =========
-
-def find_house_with_orb(planet_long: float, houses: List[float]) -> int:
-    for i in range(12):
-        cusp_start = houses[i]
-        cusp_end = houses[(i + 1) % 12]
-        if cusp_start <= cusp_end:
-            if cusp_start <= planet_long < cusp_end:
-                nominal_house = i + 1
-                dist_next = cusp_end - planet_long
-                next_house_id = ((i + 1) % 12) + 1
-                orb = 8 if next_house_id in [1, 10] else 6
-                if dist_next <= orb:
-                    return next_house_id
-                return nominal_house
-        else:
-            if planet_long >= cusp_start or planet_long < cusp_end:
-                nominal_house = i + 1
-                if planet_long >= cusp_start:
-                    dist_next = (cusp_end + 360) - planet_long if cusp_end < planet_long else 0
-                else:
-                    dist_next = cusp_end - planet_long
-                next_house_id = ((i + 1) % 12) + 1
-                orb = 8 if next_house_id in [1, 10] else 6
-                if 0 < dist_next <= orb:
-                    return next_house_id
-                return nominal_house
-    return 1
-
-def find_house_nominal(planet_long: float, houses: List[float]) -> int:
-    for i in range(12):
-        cusp_start = houses[i]
-        cusp_end = houses[(i + 1) % 12]
-        if cusp_start <= cusp_end:
-            if cusp_start <= planet_long < cusp_end:
-                return i + 1
-        else:
-            if planet_long >= cusp_start or planet_long < cusp_end:
-                return i + 1
-    return 1
-
-def calculate_aspects(positions: List[PlanetPosition]) -> List[Aspect]:
-    aspect_defs = [
-        ("Conjunção", 0, 8),
-        ("Oposição", 180, 8),
-        ("Quadratura", 90, 8),
-        ("Trígono", 120, 8),
-        ("Sextil", 60, 6)
+# ========= Funções para Aspectos, Elementos e Quadruplicidades =========
+
+def calculate_aspects(chart: ChartArrays, table: AspectTable = DEFAULT_TABLE) -> List[Aspect]:
+    # Matriz de distâncias de todos os pares de uma vez (ver aspects.py), sobre as longitudes brutas
+    bodies = chart.bodies
+    hits = find_aspects(chart.longitude, bodies, table)
+    return [
+        Aspect(
+            planet1=bodies[h.i],
+            planet2=bodies[h.j],
+            aspect_type=h.aspect,
+            angle=h.angle,
+            orb=h.orb
+        )
+        for h in hits
     ]
-    def to_360(p: PlanetPosition) -> float:
-        sign_idx = zodiac_signs.index(p.sign)
-        return sign_idx*30 + p.degree
-    aspects = []
-    n = len(positions)
-    for i in range(n):
-        for j in range(i+1, n):
-            p1 = positions[i]
-            p2 = positions[j]
-            deg1 = to_360(p1)
-            deg2 = to_360(p2)
-            diff = abs(deg1 - deg2)
-            diff = min(diff, 360 - diff)
-            for asp_name, asp_angle, orb in aspect_defs:
-                if abs(diff - asp_angle) <= orb:
-                    aspects.append(Aspect(
-                        planet1=p1.planet,
-                        planet2=p2.planet,
-                        aspect_type=asp_name,
-                        angle=round(diff, 2),
-                        orb=round(abs(diff - asp_angle), 2)
-                    ))
-    return aspects
 
 def calculate_elements(positions: List[PlanetPosition]) -> Dict[str, int]:
     counts = {"Fogo": 0, "Terra": 0, "Ar": 0, "Água": 0}
@@ -264,108 +296,208 @@ def calculate_quadruplicities(positions: List[PlanetPosition]) -> Dict[str, int]
 
 # ========= Função Principal que Calcula Mapa =========
 
-def calculate_map(birth_data: BirthData) -> MapResult:
+def resolve_birth_moment(birth_data: BirthData):
+    """
+    Parte de I/O do cálculo: geocodificação, fuso e conversão para UT.
+    Retorna (jd, lat, lon).
+    """
     # 1) Geocodificação e Fuso
-    lat, lon = get_coordinates(birth_data.city, birth_data.country)
-    tz_str = get_timezone(lat, lon)
+    lat, lon, tz_str = get_location(birth_data.city, birth_data.country)
     # 2) Converter data/hora local p/ UT
     dt_ut = convert_to_ut(birth_data.date, birth_data.time, tz_str)
     day, month, year = dt_ut.day, dt_ut.month, dt_ut.year
     ut_hour = dt_ut.hour + dt_ut.minute/60.0
     # 3) JD
     jd = swe.julday(year, month, day, ut_hour)
-    swe.set_ephe_path("./ephemeris")
-    # 4) Casas (Placidus) e asc_mc
-    houses, asc_mc = swe.houses(jd, lat, lon, b'P')
-    # Montar infos de casas
-    house_list = []
-    for i, cusp in enumerate(houses, start=1):
-        sign_idx = int(cusp // 30)
-        sign = zodiac_signs[sign_idx]
-        deg = cusp % 30
-        house_list.append(HouseInfo(
-            house=i,
-            sign=sign,
-            degree=round(deg, 2)
-        ))
-    # 5) Calcular posições
-    positions = []
-    for planet_name, code in PLANETS_SWEPH.items():
-        pos, ret = swe.calc(jd, code)
-        if ret < 0:
-            raise HTTPException(status_code=500, detail=f"Erro ao calcular {planet_name}")
-        longitude = pos[0]
-        speed_long = pos[3]
-        is_retro = (speed_long < 0)
-        if planet_name == "NóduloNorte":
-            planet_house = find_house_nominal(longitude, houses)
-        else:
-            planet_house = find_house_with_orb(longitude, houses)
-        sign_idx = int(longitude // 30)
-        sign = zodiac_signs[sign_idx]
-        deg = longitude % 30
-        positions.append(PlanetPosition(
-            planet=planet_name,
-            sign=sign,
-            degree=round(deg, 2),
-            house=planet_house,
-            retrograde=is_retro
-        ))
-    # NóduloSul = NóduloNorte + 180°
-    nodo_norte = next((p for p in positions if p.planet == "NóduloNorte"), None)
-    if nodo_norte:
-        nn_deg = zodiac_signs.index(nodo_norte.sign)*30 + nodo_norte.degree
-        south_deg = (nn_deg + 180) % 360
-        south_sign_idx = int(south_deg // 30)
-        south_sign = zodiac_signs[south_sign_idx]
-        south_deg_in_sign = south_deg % 30
-        nodo_sul_house = find_house_nominal(south_deg, houses)
-        positions.append(PlanetPosition(
-            planet="NóduloSul",
-            sign=south_sign,
-            degree=round(south_deg_in_sign, 2),
-            house=nodo_sul_house,
-            retrograde=False
-        ))
-    # Ascendente
-    asc_long = asc_mc[0]
-    asc_sign_idx = int(asc_long // 30)
-    asc_sign = zodiac_signs[asc_sign_idx]
-    asc_deg = asc_long % 30
-    positions.append(PlanetPosition(
-        planet="Ascendente",
-        sign=asc_sign,
-        degree=round(asc_deg, 2),
-        house=1,
-        retrograde=False
-    ))
-    # MeioCéu
-    mc_long = asc_mc[1]
-    mc_sign_idx = int(mc_long // 30)
-    mc_sign = zodiac_signs[mc_sign_idx]
-    mc_deg = mc_long % 30
-    positions.append(PlanetPosition(
-        planet="MeioCéu",
-        sign=mc_sign,
-        degree=round(mc_deg, 2),
-        house=10,
-        retrograde=False
-    ))
-    # 6) Calcular aspectos
-    aspects_list = calculate_aspects(positions)
-    # 7) Elementos
-    elements_count = calculate_elements(positions)
-    # 8) Quadruplicidades
-    quads_count = calculate_quadruplicities(positions)
-    # Retorno final
+    return jd, lat, lon
+
+def get_chart(jd: float, lat: float, lon: float) -> ChartArrays:
+    """Mapa interno (longitudes brutas), do cache ou calculado."""
+    key = chart_cache.key(jd, lat, lon, HOUSE_SYSTEM)
+    chart = chart_cache.get(key)
+    if chart is None:
+        try:
+            chart = compute_chart(jd, lat, lon)
+        except RuntimeError as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        chart_cache.put(key, chart)
+    return chart
+
+async def get_chart_async(jd: float, lat: float, lon: float) -> ChartArrays:
+    """
+    Mesmo que get_chart, sem bloquear o event loop:
+    banco no pool de I/O e efemérides no pool de CPU.
+    """
+    key = chart_cache.key(jd, lat, lon, HOUSE_SYSTEM)
+    chart = chart_cache.get_memory(key)
+    if chart is None:
+        chart = await run_io(chart_cache.get_db, key)
+    if chart is None:
+        try:
+            chart = await run_cpu(compute_chart, jd, lat, lon)
+        except RuntimeError as e:
+            # Erro das efemérides (compute_chart não conhece HTTP: roda no pool de processos)
+            raise HTTPException(status_code=500, detail=str(e))
+        await run_io(chart_cache.put, key, chart)
+    return chart
+
+def calculate_map(birth_data: BirthData) -> MapResult:
+    jd, lat, lon = resolve_birth_moment(birth_data)
+    return build_map_result(get_chart(jd, lat, lon))
+
+async def calculate_map_async(birth_data: BirthData) -> MapResult:
+    """
+    Mesmo que calculate_map, sem bloquear o event loop:
+    geocodificação no pool de I/O e efemérides no pool de CPU.
+    """
+    jd, lat, lon = await run_io(resolve_birth_moment, birth_data)
+    return build_map_result(await get_chart_async(jd, lat, lon))
+
+def build_map_result(chart: ChartArrays) -> MapResult:
+    """
+    Borda da API: converte o mapa interno em signo/grau arredondado (PlanetPosition, HouseInfo).
+    Aspectos usam as longitudes brutas; o arredondamento é só de apresentação.
+    """
+    house_list = [
+        HouseInfo(house=i, sign=zodiac_signs[int(cusp // 30)], degree=round(cusp % 30, 2))
+        for i, cusp in enumerate(chart.cusps.tolist(), start=1)
+    ]
+    positions = [
+        PlanetPosition(
+            planet=name,
+            sign=zodiac_signs[int(longitude // 30)],
+            degree=round(longitude % 30, 2),
+            house=house,
+            retrograde=retro
+        )
+        for name, longitude, house, retro in zip(
+            chart.bodies, chart.longitude.tolist(), chart.house.tolist(), chart.retrograde.tolist()
+        )
+    ]
     return MapResult(
         positions=positions,
         houses=house_list,
-        aspects=aspects_list,
-        elements=elements_count,
-        quadruplicities=quads_count
+        aspects=calculate_aspects(chart),
+        elements=calculate_elements(positions),
+        quadruplicities=calculate_quadruplicities(positions)
     )
 
+# ========= Cálculo em Lote =========
+
+BATCH_MAX_ITEMS = int(os.environ.get("BATCH_MAX_ITEMS", "1000"))
+BATCH_CHUNK_SIZE = int(os.environ.get("BATCH_CHUNK_SIZE", "25"))
+
+class BatchRequest(BaseModel):
+    items: List[BirthData]
+
+def julian_days_ut(moments_ut: List[datetime]) -> np.ndarray:
+    """
+    JD (UT) de vários instantes de uma vez: JD = 2440587.5 + segundos Unix / 86400.
+    Equivalente a swe.julday para o calendário gregoriano.
+    """
+    seconds = np.array([m.timestamp() for m in moments_ut], dtype=np.float64)
+    return 2440587.5 + seconds / 86400.0
+
+def compute_map_batch(jobs: List[tuple]) -> List[dict]:
+    """
+    Calcula um bloco de mapas [(jd, lat, lon), ...] num único worker.
+    Cada item traz o resultado da API e o mapa interno (para o cache).
+    Erros são devolvidos por item, sem derrubar o bloco inteiro.
+    """
+    results = []
+    for jd, lat, lon in jobs:
+        try:
+            chart = compute_chart(jd, lat, lon)
+            results.append({"result": build_map_result(chart).model_dump(), "chart": chart})
+        except Exception as e:  # RuntimeError do compute_chart, swe.Error...
+            results.append({"error": str(e)})
+    return results
+
+async def calculate_map_batch_stream(items: List[BirthData]):
+    """
+    Pipeline do lote:
+    1. Geocodificação + fuso uma vez por cidade distinta (em paralelo no pool de I/O)
+    2. Conversão para UT e JD de todos os itens numa passada
+    3. Efemérides em blocos distribuídos pelo pool de CPU (janela de CPU_WORKERS blocos)
+    4. Resultados emitidos em NDJSON na ordem de entrada, assim que cada bloco termina
+    """
+    # 1) Locais distintos
+    places = {}
+    for item in items:
+        places.setdefault(normalize_place(item.city, item.country), item)
+    keys = list(places)
+    located = await asyncio.gather(
+        *(run_io(get_location, places[k].city, places[k].country) for k in keys),
+        return_exceptions=True
+    )
+    locations = dict(zip(keys, located))
+
+    # 2) UT + JD
+    errors = {}
+    valid = []  # (índice, lat, lon, instante UT)
+    for i, item in enumerate(items):
+        loc = locations[normalize_place(item.city, item.country)]
+        if isinstance(loc, BaseException):
+            errors[i] = loc.detail if isinstance(loc, HTTPException) else str(loc)
+            continue
+        lat, lon, tz_str = loc
+        try:
+            valid.append((i, lat, lon, convert_to_ut(item.date, item.time, tz_str)))
+        except HTTPException as e:
+            errors[i] = e.detail
+    jds = julian_days_ut([v[3] for v in valid]) if valid else []
+
+    # 3) Cache de mapas: só o que não está em cache vai para o pool de CPU
+    slots = [None] * len(items)
+    for i, detail in errors.items():
+        slots[i] = {"error": detail}
+    keys = [chart_cache.key(float(jd), lat, lon, HOUSE_SYSTEM) for (_, lat, lon, _), jd in zip(valid, jds)]
+    cached = await run_io(chart_cache.get_many, keys) if keys else {}
+    pending = {}  # chave -> ((jd, lat, lon), [índices]); mapas repetidos no lote são calculados uma vez
+    for (i, lat, lon, _), jd, key in zip(valid, jds, keys):
+        if key in cached:
+            slots[i] = {"result": build_map_result(cached[key]).model_dump()}
+        else:
+            pending.setdefault(key, ((float(jd), lat, lon), []))[1].append(i)
+    pending = list(pending.items())
+
+    # Blocos de efemérides: até CPU_WORKERS em andamento, o próximo sai quando o stream chega nele
+    chunk_of = {}
+    pending_key = {}
+    blocks = []
+    for k in range(0, len(pending), BATCH_CHUNK_SIZE):
+        block = pending[k:k + BATCH_CHUNK_SIZE]
+        for pos, (key, (_, indices)) in enumerate(block):
+            for i in indices:
+                chunk_of[i] = (len(blocks), pos)
+                pending_key[i] = key
+        blocks.append(([job for _, (job, _) in block],))
+    block_results = map_cpu(compute_map_batch, blocks, return_exceptions=True)
+
+    # 4) Emitir em ordem de entrada, aguardando cada bloco só quando necessário
+    computed = {}
+    done = []  # resultados dos blocos já recebidos, na ordem
+    try:
+        for i in range(len(items)):
+            if slots[i] is None:
+                b, pos = chunk_of[i]
+                while len(done) <= b:
+                    done.append(await block_results.__anext__())
+                if isinstance(done[b], Exception):
+                    e = done[b]
+                    slots[i] = {"error": e.detail if isinstance(e, HTTPException) else str(e)}
+                else:
+                    slots[i] = dict(done[b][pos])
+                    if "chart" in slots[i]:
+                        computed[pending_key[i]] = slots[i].pop("chart")
+            yield json.dumps({"index": i, **slots[i]}, ensure_ascii=False) + "\n"
+            slots[i] = None
+    finally:
+        # Cliente desconectou: não desperdiçar os blocos restantes
+        await block_results.aclose()
+    if computed:
+        await run_io(chart_cache.put_many, computed)
+
 # ========= Modelos Adicionais para Chat/IA =========
 
 class ChatMessage(BaseModel):
@@ -405,6 +537,43 @@ Para cada posicionamento planetário, sempre inclua:
 ✓ Orientações práticas para integração
 """
 
+def build_chat_history(map_data: Optional[Dict], history: List[ChatMessage], brief: bool = False) -> List[dict]:
+    """
+    Histórico no formato do Gemini: instruções do sistema, dados do mapa (se
+    houver) e mensagens anteriores. brief: confirmações curtas, como nas conversas salvas.
+    """
+    chat_history = []
+
+    # Adicionar instruções do sistema
+    chat_history.append({"role": "user", "parts": [INSTRUCOES_SISTEMA]})
+    chat_history.append({"role": "model", "parts": ["Entendido." if brief else "Entendido. Sou o Astro IA e seguirei todas as diretrizes fornecidas para análises astrológicas profundas e técnicas."]})
+
+    # Se houver dados do mapa, adicionar ao contexto
+    if map_data:
+        if brief:
+            contexto_mapa = f"DADOS DO MAPA:\\n{json.dumps(map_data, ensure_ascii=False, indent=2)}"
+        else:
+            contexto_mapa = f"""
+            DADOS TÉCNICOS DO MAPA NATAL:
+            {json.dumps(map_data, ensure_ascii=False, indent=2)}
+            
+            Use estes dados para fornecer análises precisas e contextualizadas.
+            """
+        chat_history.append({"role": "user", "parts": [contexto_mapa]})
+        chat_history.append({"role": "model", "parts": ["Dados recebidos." if brief else "Dados do mapa recebidos. Pronto para análise."]})
+
+    # Adicionar histórico de mensagens anteriores
+    for msg in history:
+        role = "model" if msg.role == "assistant" else "user"
+        chat_history.append({"role": role, "parts": [msg.content]})
+    return chat_history
+
+def ai_user(http_request: Request, user: Optional[models.User] = None) -> str:
+    """Chave do limite por usuário no ai_gateway: id de quem está logado, senão o IP."""
+    if user is not None:
+        return f"user:{user.id}"
+    return f"ip:{http_request.client.host if http_request.client else 'desconhecido'}"
+
 # ========= Endpoints =========
 
 @app.post("/calculate", response_model=MapResult)
@@ -412,10 +581,21 @@ async def calculate_map_endpoint(birth_data: BirthData):
     """
     Calcula o mapa astral completo baseado nos dados de nascimento.
     """
-    return calculate_map(birth_data)
+    return await calculate_map_async(birth_data)
+
+@app.post("/calculate/batch")
+async def calculate_map_batch_endpoint(request: BatchRequest):
+    """
+    Calcula vários mapas numa única chamada.
+    Resposta em NDJSON (uma linha por item, na ordem de entrada):
+    {"index": 0, "result": {...}} ou {"index": 1, "error": "..."}
+    """
+    if len(request.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Máximo de {BATCH_MAX_ITEMS} mapas por lote")
+    return StreamingResponse(calculate_map_batch_stream(request.items), media_type="application/x-ndjson")
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat_endpoint(request: ChatRequest):
+async def chat_endpoint(request: ChatRequest, http_request: Request):
     """
     Endpoint de chat com IA para análise astrológica.
     Aceita mensagem do usuário, dados do mapa (se disponível) e histórico de conversa.
@@ -424,41 +604,34 @@ async def chat_endpoint(request: ChatRequest):
         raise HTTPException(status_code=503, detail="Serviço de IA não configurado. Configure GOOGLE_API_KEY.")
     
     try:
-        # Criar o modelo
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        
-        # Preparar histórico de conversa
-        chat_history = []
-        
-        # Adicionar instruções do sistema
-        chat_history.append({"role": "user", "parts": [INSTRUCOES_SISTEMA]})
-        chat_history.append({"role": "model", "parts": ["Entendido. Sou o Astro IA e seguirei todas as diretrizes fornecidas para análises astrológicas profundas e técnicas."]})
-        
-        # Se houver dados do mapa, adicionar ao contexto
-        if request.map_data:
-            contexto_mapa = f"""
-            DADOS TÉCNICOS DO MAPA NATAL:
-            {json.dumps(request.map_data, ensure_ascii=False, indent=2)}
-            
-            Use estes dados para fornecer análises precisas e contextualizadas.
-            """
-            chat_history.append({"role": "user", "parts": [contexto_mapa]})
-            chat_history.append({"role": "model", "parts": ["Dados do mapa recebidos. Pronto para análise."]})
-        
-        # Adicionar histórico de mensagens anteriores
-        for msg in request.history:
-            role = "model" if msg.role == "assistant" else "user"  
-            chat_history.append({"role": role, "parts": [msg.content]})
-        
-        # Iniciar chat e enviar mensagem
-        chat = model.start_chat(history=chat_history)
-        response = chat.send_message(request.message)
-        
-        return ChatResponse(response=response.text)
+        # Enviar mensagem pelo gateway (limites de concorrência e 429)
+        text = await ai_gateway.chat(
+            CHAT_MODEL, build_chat_history(request.map_data, request.history), request.message, ai_user(http_request)
+        )
+        return ChatResponse(response=text)
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao processar resposta da IA: {str(e)}")
 
+# Sem buffer em proxies (nginx) para os eventos chegarem na hora
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+@app.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """
+    Mesmo que /chat, com a resposta em server-sent events à medida que a IA gera:
+    eventos "token" ({"text"}), e no fim "done" com as métricas
+    (ttft_ms, duration_ms, tokens, tokens_per_second) ou "error".
+    """
+    if not GOOGLE_API_KEY:
+        raise HTTPException(status_code=503, detail="Serviço de IA não configurado. Configure GOOGLE_API_KEY.")
+    lease, events = await ai_gateway.stream_chat(
+        CHAT_MODEL, build_chat_history(request.map_data, request.history), request.message, ai_user(http_request)
+    )
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS, background=BackgroundTask(lease.release))
+
 @app.get("/")
 async def read_root():
     """
@@ -471,7 +644,9 @@ async def read_root():
             "/docs": "Documentação interativa da API",
             "/calculate": "POST - Calcular mapa astral",
             "/chat": "POST - Chat com IA astrológica",
-            "/generate-report": "POST - Gerar relatório completo em PDF"
+            "/chat/stream": "POST - Chat com IA astrológica em server-sent events",
+            "/generate-report": "POST - Gerar relatório completo em PDF",
+            "/generate-report/stream": "POST - Relatório em server-sent events, seção por seção"
         }
     }
     
@@ -483,9 +658,655 @@ async def health_check():
     return {
         "status": "healthy",
         "gemini_configured": GOOGLE_API_KEY is not None,
-        "database": "connected"
+        "database": "connected",
+        "geocoding_cache": geocode_cache.stats(),
+        "gazetteer_cities": len(get_gazetteer() or []),
+        "timezone_cache": tz_resolver.stats(),
+        "executor": executor.stats(),
+        "chart_cache": chart_cache.stats(),
+        "compatibility_index": compatibility_index.stats(),
+        "ephemeris": ephemeris_status(),
+        "ephemeris_tables": get_ephemeris_tables().stats() if get_ephemeris_tables() else None,
+        "station_index": get_station_index().stats() if get_station_index() else None,
+        "lunar_cache": lunar_cache.stats(),
+        "chat_stream": stream_stats.stats(),
+        "ai_gateway": ai_gateway.stats(),
+        "report_cache": report_cache.stats()
     }
 
+# ========= Autocomplete de Cidades (Gazetteer Offline) =========
+
+class CitySuggestion(BaseModel):
+    id: int
+    name: str
+    country: str
+    lat: float
+    lon: float
+    population: int
+    timezone: Optional[str] = None
+
+@app.get("/geocode/suggest", response_model=List[CitySuggestion])
+async def geocode_suggest(q: str, country: Optional[str] = None, limit: int = 10):
+    """
+    Autocomplete de cidades pelo índice offline (aceita "Sao Paulo" ou "São Paulo").
+    """
+    gaz = get_gazetteer()
+    if gaz is None:
+        raise HTTPException(status_code=503, detail="Gazetteer offline não disponível. Gere com: python gazetteer.py build <cities.txt>")
+    limit = max(1, min(limit, 50))
+    return [CitySuggestion(**c._asdict()) for c in gaz.suggest(q, country, limit)]
+
+# ========= Trânsitos =========
+
+TRANSITS_MAX_DAYS = int(os.environ.get("TRANSITS_MAX_DAYS", "731"))
+
+class TransitRequest(BaseModel):
+    birth_data: BirthData
+    start: str     # Formato DD/MM/AAAA ou YYYY-MM-DD (UTC)
+    end: str       # Inclusive
+    orb: float = TRANSIT_ORB
+    planets: Optional[List[str]] = None  # Corpos em trânsito (padrão: todos)
+
+class TransitEvent(BaseModel):
+    transit_planet: str
+    natal_planet: str
+    aspect_type: str
+    entry: Optional[datetime]  # None = já no orbe no início do período
+    exact: List[datetime]      # Mais de um quando há retrogradação
+    exit: Optional[datetime]   # None = ainda no orbe no fim do período
+
+def parse_date(date_str: str) -> datetime:
+    for fmt in ("%d/%m/%Y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(date_str, fmt)
+        except ValueError:
+            continue
+    raise HTTPException(status_code=400, detail=f"Data inválida: {date_str}")
+
+@app.post("/transits", response_model=List[TransitEvent])
+async def transits_endpoint(request: TransitRequest):
+    """
+    Aspectos dos planetas em trânsito sobre o mapa natal no período,
+    com entrada no orbe, momento(s) exato(s) e saída (UTC).
+    """
+    tables = get_ephemeris_tables()
+    if tables is None:
+        raise HTTPException(status_code=503, detail="Tabelas de efemérides não disponíveis. Gere com: python ephemeris_tables.py build")
+    jd_start = datetime_to_jd(parse_date(request.start))
+    jd_end = datetime_to_jd(parse_date(request.end)) + 1
+    if jd_end <= jd_start:
+        raise HTTPException(status_code=400, detail="A data final deve ser igual ou posterior à inicial")
+    if jd_end - jd_start > TRANSITS_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Período máximo de {TRANSITS_MAX_DAYS} dias")
+    if not tables.covers(jd_start, jd_end):
+        raise HTTPException(status_code=400, detail=f"Período fora das tabelas de efemérides ({tables.stats()['from']} a {tables.stats()['to']})")
+    if not 0 < request.orb <= 10:
+        raise HTTPException(status_code=400, detail="O orbe deve estar entre 0 e 10 graus")
+    unknown = set(request.planets or []) - set(TRANSIT_BODIES)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Corpos desconhecidos: {', '.join(sorted(unknown))}")
+
+    jd, lat, lon = await run_io(resolve_birth_moment, request.birth_data)
+    natal = await get_chart_async(jd, lat, lon)
+    found = await run_cpu(search_transits, natal.longitude, natal.bodies, jd_start, jd_end,
+                          request.orb, request.planets)
+    return [
+        TransitEvent(
+            transit_planet=t.transit,
+            natal_planet=t.natal,
+            aspect_type=t.aspect,
+            entry=jd_to_datetime(t.entry) if t.entry is not None else None,
+            exact=[jd_to_datetime(e) for e in t.exact],
+            exit=jd_to_datetime(t.exit) if t.exit is not None else None
+        )
+        for t in found
+    ]
+
+# ========= Eventos (Aspecto Exato / Ingresso) =========
+
+class EventHit(BaseModel):
+    label: str
+    time: datetime
+    longitude: float
+    retrograde: bool
+
+class EventsResponse(BaseModel):
+    body: str
+    target: str
+    events: List[EventHit]
+    ephemeris_calls: int
+
+ASPECTS_BY_NAME = {normalize_text(a.name): a for a in MAJOR_ASPECTS + MINOR_ASPECTS}
+
+@app.get("/events/next", response_model=EventsResponse)
+async def next_events_endpoint(
+    body: str,
+    target: str,
+    aspect: str = "Conjunção",
+    after: Optional[str] = None,
+    count: int = 1,
+    date: Optional[str] = None,
+    time: Optional[str] = None,
+    city: Optional[str] = None,
+    country: Optional[str] = None,
+):
+    """
+    Próximo(s) instante(s) exato(s) em que `body` atinge o alvo.
+
+    target:
+    - natal:<corpo>  aspecto ao ponto natal (exige date, time, city, country)
+    - sign:<signo>   ingresso no signo (sign:any = qualquer signo)
+    - <graus>        longitude eclíptica
+
+    Um laço retrógrado sobre o mesmo grau aparece como até três eventos (use count).
+    """
+    name = resolve_body(body)
+    if name is None:
+        raise HTTPException(status_code=400, detail=f"Corpo desconhecido: {body}")
+    count = max(1, min(count, 10))
+    jd_start = datetime_to_jd(parse_date(after)) if after else datetime_to_jd(datetime.utcnow())
+
+    kind, _, value = target.partition(":")
+    kind = kind.strip().lower()
+    if kind == "sign":
+        sign = next((s for s in zodiac_signs if normalize_text(s) == normalize_text(value)), None)
+        if value.strip().lower() not in ("any", "todos") and sign is None:
+            raise HTTPException(status_code=400, detail=f"Signo desconhecido: {value}")
+        ingress = ingress_targets(sign)
+        labels, targets = list(ingress), list(ingress.values())
+    else:
+        asp = ASPECTS_BY_NAME.get(normalize_text(aspect))
+        if asp is None:
+            raise HTTPException(status_code=400, detail=f"Aspecto desconhecido: {aspect}")
+        if kind == "natal":
+            if not (date and time and city and country):
+                raise HTTPException(status_code=400, detail="Alvo natal exige date, time, city e country")
+            jd, lat, lon = await run_io(resolve_birth_moment, BirthData(date=date, time=time, city=city, country=country))
+            natal = await get_chart_async(jd, lat, lon)
+            point = resolve_body(value) or next((b for b in natal.bodies if normalize_text(b) == normalize_text(value)), None)
+            if point is None:
+                raise HTTPException(status_code=400, detail=f"Ponto natal desconhecido: {value}")
+            base, base_label = float(natal.longitude[natal.index(point)]), f"{point} natal"
+        else:
+            try:
+                base = float(target) % 360.0
+            except ValueError:
+                raise HTTPException(status_code=400, detail=f"Alvo inválido: {target}")
+            base_label = f"{base:.2f}°"
+        targets = aspect_targets(base, asp.angle)
+        labels = [f"{asp.name} a {base_label}"] * len(targets)
+
+    found, calls = await run_cpu(find_events, PLANETS_SWEPH[name], targets, jd_start, count, None, labels)
+    return EventsResponse(
+        body=name,
+        target=target,
+        events=[
+            EventHit(label=e.label, time=jd_to_datetime(e.jd), longitude=round(e.longitude, 4), retrograde=e.retrograde)
+            for e in found
+        ],
+        ephemeris_calls=calls
+    )
+
+# ========= Índice de Estações e Ingressos =========
+
+class RetrogradePeriodResponse(BaseModel):
+    planet: str
+    station_retrograde: datetime
+    station_direct: Optional[datetime]  # None = fora do intervalo do índice
+    retrograde_sign: str
+    retrograde_degree: float
+    direct_sign: Optional[str]
+    direct_degree: Optional[float]
+
+class IngressResponse(BaseModel):
+    planet: str
+    sign: str
+    time: datetime
+    retrograde: bool
+
+def index_period(year: Optional[int], start: Optional[str], end: Optional[str]):
+    """(jd início, jd fim) a partir de year ou de start/end (inclusive); sem nada = índice inteiro."""
+    if year is not None:
+        return year_range(year)
+    jd_start = datetime_to_jd(parse_date(start)) if start else -np.inf
+    jd_end = datetime_to_jd(parse_date(end)) + 1 if end else np.inf
+    return jd_start, jd_end
+
+def resolve_index_body(planet: str) -> str:
+    name = resolve_body(planet)
+    if name is None:
+        raise HTTPException(status_code=400, detail=f"Corpo desconhecido: {planet}")
+    return name
+
+def require_station_index():
+    index = get_station_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Índice de estações não disponível. Gere com: python station_index.py build")
+    return index
+
+@app.get("/retrogrades", response_model=List[RetrogradePeriodResponse])
+async def retrogrades_endpoint(planet: str, year: Optional[int] = None,
+                               start: Optional[str] = None, end: Optional[str] = None):
+    """
+    Períodos retrógrados do corpo (estação retrógrada -> estação direta) que tocam o período.
+    Ex.: /retrogrades?planet=Mercúrio&year=2027
+    """
+    index = require_station_index()
+    name = resolve_index_body(planet)
+    jd_start, jd_end = index_period(year, start, end)
+    return [
+        RetrogradePeriodResponse(
+            planet=name,
+            station_retrograde=jd_to_datetime(p.start),
+            station_direct=jd_to_datetime(p.end) if p.end is not None else None,
+            retrograde_sign=zodiac_signs[int(p.start_longitude // 30)],
+            retrograde_degree=round(p.start_longitude % 30, 2),
+            direct_sign=zodiac_signs[int(p.end_longitude // 30)] if p.end is not None else None,
+            direct_degree=round(p.end_longitude % 30, 2) if p.end is not None else None
+        )
+        for p in index.retrograde_periods(name, jd_start, jd_end)
+    ]
+
+@app.get("/ingresses", response_model=List[IngressResponse])
+async def ingresses_endpoint(planet: str, sign: Optional[str] = None, year: Optional[int] = None,
+                             start: Optional[str] = None, end: Optional[str] = None):
+    """
+    Ingressos do corpo em signos (opcionalmente só num signo), em ordem cronológica.
+    Ex.: /ingresses?planet=Plutão&sign=Aquário
+    """
+    index = require_station_index()
+    name = resolve_index_body(planet)
+    sign_name = None
+    if sign:
+        sign_name = next((s for s in zodiac_signs if normalize_text(s) == normalize_text(sign)), None)
+        if sign_name is None:
+            raise HTTPException(status_code=400, detail=f"Signo desconhecido: {sign}")
+    jd_start, jd_end = index_period(year, start, end)
+    return [
+        IngressResponse(planet=name, sign=zodiac_signs[int(r["sign"])], time=jd_to_datetime(float(r["jd"])), retrograde=bool(r["speed"] < 0))
+        for r in index.ingresses(name, jd_start, jd_end, sign_name)
+    ]
+
+# ========= Calendário Lunar =========
+
+class LunarEventResponse(BaseModel):
+    type: str                      # phase / ingress / void_of_course
+    label: str
+    sign: str
+    time: datetime                 # no fuso pedido
+    end: Optional[datetime] = None  # fim do fora de curso
+
+class LunarCalendarResponse(BaseModel):
+    year: int
+    timezone: str
+    events: List[LunarEventResponse]
+
+@app.get("/lunar-calendar", response_model=LunarCalendarResponse)
+async def lunar_calendar_endpoint(year: Optional[int] = None, timezone: Optional[str] = None,
+                                  city: Optional[str] = None, country: Optional[str] = None):
+    """
+    Calendário lunar do ano: Lua Nova, quartos, Lua Cheia, ingressos da Lua nos
+    signos e períodos fora de curso, no fuso de `timezone` ou da cidade (padrão: UTC).
+    """
+    year = year or datetime.utcnow().year
+    if not 1900 <= year <= 2100:
+        raise HTTPException(status_code=400, detail="Ano fora do intervalo 1900-2100")
+    if timezone is None and city:
+        _, _, timezone = await run_io(get_location, city, country or "")
+    timezone = timezone or "UTC"
+    try:
+        tz = pytz.timezone(timezone)
+    except pytz.UnknownTimeZoneError:
+        raise HTTPException(status_code=400, detail=f"Fuso desconhecido: {timezone}")
+
+    cached = lunar_cache.get(year, tz.zone)
+    if cached is not None:
+        return cached
+    events = await run_cpu(compute_lunar_year, year, tz.zone)
+    response = LunarCalendarResponse(
+        year=year,
+        timezone=tz.zone,
+        events=[
+            LunarEventResponse(
+                type=e.kind,
+                label=e.label,
+                sign=e.sign,
+                time=jd_to_datetime(e.jd).astimezone(tz),
+                end=jd_to_datetime(e.end_jd).astimezone(tz) if e.end_jd is not None else None
+            )
+            for e in events
+        ]
+    )
+    lunar_cache.put(year, tz.zone, response)
+    return response
+
+# ========= Busca Eletiva =========
+
+class ElectionalCondition(BaseModel):
+    type: str                         # sign / retrograde / aspect / house
+    body: str                         # corpo do mapa ou "*" (qualquer planeta, em aspectos)
+    values: List[str] = []            # signos, casas ou aspectos ("hard"/"tensos", "soft"/"harmônicos")
+    other: Optional[str] = None       # segundo corpo do aspecto
+    orb: Optional[float] = None
+    negate: bool = False
+
+class ElectionalRequest(BaseModel):
+    city: str
+    country: str
+    start: Optional[str] = None       # DD/MM/AAAA ou YYYY-MM-DD (padrão: hoje)
+    days: int = 90
+    conditions: List[ElectionalCondition]
+    min_duration_minutes: float = 0
+
+class ElectionalWindow(BaseModel):
+    start: datetime   # no fuso do local
+    end: datetime
+    duration_minutes: float
+
+def resolve_chart_body(name: str) -> str:
+    """Nome em CHART_BODIES (planetas, Nodo Sul e ângulos) ou "*"."""
+    if name.strip() == "*":
+        return "*"
+    found = resolve_body(name) or next((b for b in CHART_BODIES if normalize_text(b) == normalize_text(name)), None)
+    if found is None:
+        raise HTTPException(status_code=400, detail=f"Corpo desconhecido: {name}")
+    return found
+
+def build_condition(c: ElectionalCondition) -> electional.Condition:
+    values = c.values
+    if c.type == "sign":
+        values = [next((z for z in zodiac_signs if normalize_text(z) == normalize_text(v)), v) for v in values]
+    elif c.type == "aspect":
+        values = [next((a for a in electional.ASPECT_DEFS if normalize_text(a) == normalize_text(v)), v) for v in values]
+    try:
+        return electional.validate(electional.Condition(
+            c.type, resolve_chart_body(c.body), tuple(values),
+            resolve_chart_body(c.other) if c.other else None, c.orb, c.negate
+        ))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@app.post("/electional", response_model=List[ElectionalWindow])
+async def electional_endpoint(request: ElectionalRequest):
+    """
+    Janelas de tempo no local em que todas as condições valem ao mesmo tempo.
+    Ex.: Lua em Touro, Vênus direto, nenhum aspecto tenso a Marte:
+    [{"type": "sign", "body": "Lua", "values": ["Touro"]},
+     {"type": "retrograde", "body": "Vênus", "negate": true},
+     {"type": "aspect", "body": "*", "other": "Marte", "values": ["hard"], "negate": true}]
+    Períodos longos são divididos em blocos calculados em paralelo.
+    """
+    if not request.conditions:
+        raise HTTPException(status_code=400, detail="Informe ao menos uma condição")
+    if not 1 <= request.days <= electional.MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"days deve estar entre 1 e {electional.MAX_DAYS}")
+    conditions = [build_condition(c) for c in request.conditions]
+    lat, lon, tz_str = await run_io(get_location, request.city, request.country)
+    local_tz = pytz.timezone(tz_str)
+    start = local_tz.localize(parse_date(request.start)) if request.start else datetime.now(local_tz)
+    jd_start = datetime_to_jd(start)
+    jd_end = jd_start + request.days
+
+    # Blocos em paralelo, até CPU_WORKERS por vez
+    found = [
+        chunk async for chunk in map_cpu(
+            electional.search,
+            ((conditions, a, b, lat, lon) for a, b in electional.search_chunks(jd_start, jd_end))
+        )
+    ]
+    windows = electional.merge_windows([w for chunk in found for w in chunk])
+    return [
+        ElectionalWindow(
+            start=jd_to_datetime(a).astimezone(local_tz),
+            end=jd_to_datetime(b).astimezone(local_tz),
+            duration_minutes=round((b - a) * 1440, 1)
+        )
+        for a, b in windows
+        if (b - a) * 1440 >= request.min_duration_minutes
+    ]
+
+# ========= Retificação da Hora de Nascimento =========
+
+class RectificationRequest(BaseModel):
+    date: str                   # DD/MM/AAAA ou YYYY-MM-DD
+    city: str
+    country: str
+    start_time: str = "00:00"   # HH:MM locais
+    end_time: str = "23:59"
+    step_minutes: int = 1
+
+class RectificationSegment(BaseModel):
+    start: str                  # HH:MM locais do primeiro candidato do trecho
+    end: str                    # HH:MM locais do último candidato do trecho
+    ascendant: str              # signo
+    ascendant_degrees: List[float]  # grau no signo no início e no fim do trecho
+    midheaven: str
+    moon: str
+    houses: Dict[str, int]
+    changes: List[str] = []     # o que mudou em relação ao trecho anterior
+
+class RectificationResponse(BaseModel):
+    timezone: str
+    candidates: int
+    ephemeris_calls: int
+    segments: List[RectificationSegment]
+
+def rectification_segments(local_times: List[datetime], jds: np.ndarray, lat: float, lon: float) -> tuple:
+    """Varredura e tabela de trechos (no worker de CPU)."""
+    result = rectification.sweep(jds, lat, lon)
+    sn = CHART_BODIES.index("NóduloSul")
+    asc, mc, moon = (CHART_BODIES.index(b) for b in ("Ascendente", "MeioCéu", "Lua"))
+    segments = []
+    previous = None
+    for a, b in rectification.segment_bounds(result):
+        lon_a = result.longitude[a]
+        houses = {body: int(h) for body, h in zip(CHART_BODIES[:sn + 1], result.house[a])}
+        segment = RectificationSegment(
+            start=local_times[a].strftime("%H:%M"),
+            end=local_times[b].strftime("%H:%M"),
+            ascendant=zodiac_signs[int(lon_a[asc] // 30)],
+            ascendant_degrees=[round(lon_a[asc] % 30, 2), round(result.longitude[b, asc] % 30, 2)],
+            midheaven=zodiac_signs[int(lon_a[mc] // 30)],
+            moon=zodiac_signs[int(lon_a[moon] // 30)],
+            houses=houses
+        )
+        if previous is not None:
+            for label, field in (("Ascendente", "ascendant"), ("MeioCéu", "midheaven"), ("Lua", "moon")):
+                if getattr(previous, field) != getattr(segment, field):
+                    segment.changes.append(f"{label}: {getattr(previous, field)} → {getattr(segment, field)}")
+            segment.changes += [
+                f"{body}: casa {previous.houses[body]} → {house}"
+                for body, house in houses.items() if previous.houses[body] != house
+            ]
+        segments.append(segment)
+        previous = segment
+    return segments, result.ephemeris_calls
+
+@app.post("/rectification/sweep", response_model=RectificationResponse)
+async def rectification_sweep_endpoint(request: RectificationRequest):
+    """
+    Todos os horários candidatos de um dia (ex.: minuto a minuto) num local,
+    resumidos em trechos: cada linha é um intervalo em que signo do Ascendente,
+    do MC, da Lua e a casa de cada corpo não mudam, com o que mudou em relação
+    à linha anterior.
+    """
+    day = parse_date(request.date)
+    try:
+        start = datetime.combine(day.date(), datetime.strptime(request.start_time, "%H:%M").time())
+        end = datetime.combine(day.date(), datetime.strptime(request.end_time, "%H:%M").time())
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Horário inválido (use HH:MM)")
+    if request.step_minutes < 1:
+        raise HTTPException(status_code=400, detail="step_minutes deve ser ao menos 1")
+    if end < start:
+        raise HTTPException(status_code=400, detail="end_time deve ser depois de start_time")
+
+    lat, lon, tz_str = await run_io(get_location, request.city, request.country)
+    local_times, jds = rectification.candidate_times(start, end, request.step_minutes, tz_str)
+    segments, calls = await run_cpu(rectification_segments, local_times, jds, lat, lon)
+    return RectificationResponse(timezone=tz_str, candidates=len(jds), ephemeris_calls=calls, segments=segments)
+
+# ========= Revolução Solar =========
+
+class SolarReturnRequest(BaseModel):
+    birth_data: BirthData
+    year: Optional[int] = None          # Padrão: ano atual
+    years: Optional[List[int]] = None   # Vários anos numa chamada (até 100)
+    city: Optional[str] = None          # Local da revolução (padrão: local de nascimento)
+    country: Optional[str] = None
+
+class SolarReturnResult(BaseModel):
+    year: int
+    moment_utc: datetime
+    local_time: str
+    chart: MapResult
+
+def compute_solar_returns(natal_jd: float, years: List[int], lat: float, lon: float) -> List[tuple]:
+    """
+    Revoluções de vários anos num único worker: instante exato de cada uma
+    e o mapa completo nesse instante, no local escolhido.
+    """
+    jds = solar_return_jds(natal_jd, years)
+    return [(year, jd, build_map_result(compute_chart(jd, lat, lon))) for year, jd in zip(years, jds)]
+
+@app.post("/solar-return", response_model=List[SolarReturnResult])
+async def solar_return_endpoint(request: SolarReturnRequest):
+    """
+    Revolução Solar: momento exato em que o Sol volta à posição natal e o mapa desse momento.
+    """
+    years = request.years or [request.year or datetime.utcnow().year]
+    if len(years) > SOLAR_RETURN_MAX_YEARS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {SOLAR_RETURN_MAX_YEARS} anos por chamada")
+    natal_jd, _, _ = await run_io(resolve_birth_moment, request.birth_data)
+    birth_year = int(swe.revjul(natal_jd)[0])
+    invalid = [y for y in years if not birth_year <= y <= birth_year + 150]
+    if invalid:
+        raise HTTPException(status_code=400, detail=f"Anos fora do intervalo {birth_year}-{birth_year + 150}: {invalid}")
+
+    lat, lon, tz_str = await run_io(
+        get_location,
+        request.city or request.birth_data.city,
+        request.country or request.birth_data.country
+    )
+    local_tz = pytz.timezone(tz_str)
+    try:
+        results = await run_cpu(compute_solar_returns, natal_jd, years, lat, lon)
+    except (ValueError, RuntimeError) as e:
+        # Revolução não encontrada (o ano já foi validado) ou erro das efemérides no compute_chart
+        raise HTTPException(status_code=500, detail=str(e))
+    return [
+        SolarReturnResult(
+            year=year,
+            moment_utc=jd_to_datetime(jd),
+            local_time=jd_to_datetime(jd).astimezone(local_tz).strftime("%d/%m/%Y %H:%M:%S"),
+            chart=chart
+        )
+        for year, jd, chart in results
+    ]
+
+# ========= Progressões (Secundária e Arco Solar) =========
+
+# Meses calculados por tarefa no pool de CPU (cada bloco vira linhas NDJSON assim que termina)
+PROGRESSION_CHUNK_MONTHS = int(os.environ.get("PROGRESSION_CHUNK_MONTHS", "120"))
+
+class ProgressionRequest(BaseModel):
+    birth_data: BirthData
+    start: Optional[str] = None   # DD/MM/AAAA ou YYYY-MM-DD (padrão: mês do nascimento)
+    years: int = 90
+    step_months: int = 1
+    methods: List[str] = list(PROGRESSION_METHODS)
+
+def month_starts(start: datetime, years: int, step_months: int) -> List[datetime]:
+    """Primeiro dia de cada mês (UTC) a partir do mês de start, de step_months em step_months."""
+    first = start.year * 12 + start.month - 1
+    return [
+        datetime(m // 12, m % 12 + 1, 1)
+        for m in range(first, first + years * 12, step_months)
+    ]
+
+def compute_progression_chunk(natal: ChartArrays, series, dates: List[datetime], methods: List[str]) -> List[dict]:
+    """
+    Linhas da série para um bloco de meses (roda no pool de CPU):
+    posições progredidas e aspectos com o natal de cada método.
+    """
+    jds = np.array([datetime_to_jd(d) for d in dates])
+    rows = [
+        {"date": d.date().isoformat(), "age": round((jd - natal.jd) / TROPICAL_YEAR, 2)}
+        for d, jd in zip(dates, jds.tolist())
+    ]
+    names = PROGRESSION_TABLE.names
+    for method, frame, (t, i, j, k, angle, orb) in progression_frames(natal, series, jds, methods):
+        per_month = [[] for _ in dates]
+        for tt, ii, jj, kk, a, o in zip(t.tolist(), i.tolist(), j.tolist(), k.tolist(), angle.tolist(), orb.tolist()):
+            per_month[tt].append({
+                "planet1": natal.bodies[ii], "planet2": natal.bodies[jj],
+                "aspect_type": names[kk], "angle": round(a, 2), "orb": round(o, 2)
+            })
+        for n, row in enumerate(rows):
+            row[method] = {
+                "arc": round(float(frame.arc[n]), 4),
+                "positions": [
+                    {
+                        "planet": body,
+                        "sign": zodiac_signs[int(lon // 30)],
+                        "degree": round(lon % 30, 2),
+                        "house": house,
+                        "retrograde": speed < 0 and body in PLANETS_SWEPH,
+                    }
+                    for body, lon, house, speed in zip(
+                        natal.bodies, frame.longitude[n].tolist(), frame.house[n].tolist(), frame.speed[n].tolist()
+                    )
+                ],
+                "aspects": per_month[n],  # planet1 = progredido, planet2 = natal
+            }
+    return rows
+
+async def progression_stream(natal: ChartArrays, dates: List[datetime], methods: List[str]):
+    """
+    Uma varredura diária de efemérides cobre a série inteira; os blocos de meses
+    vão para o pool de CPU (até CPU_WORKERS por vez) e são emitidos em ordem,
+    cada um assim que fica pronto.
+    """
+    series = await run_cpu(progression_sweep, natal.jd, datetime_to_jd(dates[-1]))
+    chunks = map_cpu(compute_progression_chunk, (
+        (natal, series, dates[k:k + PROGRESSION_CHUNK_MONTHS], methods)
+        for k in range(0, len(dates), PROGRESSION_CHUNK_MONTHS)
+    ))
+    try:
+        async for rows in chunks:
+            for row in rows:
+                yield json.dumps(row, ensure_ascii=False) + "\n"
+    finally:
+        await chunks.aclose()
+
+@app.post("/progressions")
+async def progressions_endpoint(request: ProgressionRequest):
+    """
+    Série de progressões secundárias e/ou direções por arco solar, mês a mês.
+    Resposta em NDJSON, uma linha por data, em ordem cronológica:
+    {"date": "2020-01-01", "age": 30.5, "secondary": {"arc", "positions", "aspects"}, "solar_arc": {...}}
+    Aspectos são progredido (planet1) -> natal (planet2), com orbe de 1°.
+    """
+    unknown = set(request.methods) - set(PROGRESSION_METHODS)
+    if not request.methods or unknown:
+        raise HTTPException(status_code=400, detail=f"methods deve conter {' e/ou '.join(PROGRESSION_METHODS)}")
+    if not 1 <= request.years <= PROGRESSION_MAX_YEARS:
+        raise HTTPException(status_code=400, detail=f"years deve estar entre 1 e {PROGRESSION_MAX_YEARS}")
+    if not 1 <= request.step_months <= 12:
+        raise HTTPException(status_code=400, detail="step_months deve estar entre 1 e 12")
+
+    jd, lat, lon = await run_io(resolve_birth_moment, request.birth_data)
+    natal = await get_chart_async(jd, lat, lon)
+    birth = jd_to_datetime(jd).replace(tzinfo=None)
+    start = parse_date(request.start) if request.start else birth
+    if start < birth.replace(day=1, hour=0, minute=0, second=0):
+        raise HTTPException(status_code=400, detail="O início da série não pode ser anterior ao nascimento")
+    dates = [d for d in month_starts(start, request.years, request.step_months) if datetime_to_jd(d) >= jd]
+    if not dates:
+        raise HTTPException(status_code=400, detail="Série vazia")
+    return StreamingResponse(progression_stream(natal, dates, list(dict.fromkeys(request.methods))),
+                             media_type="application/x-ndjson")
+
 # ==================== NOVOS ENDPOINTS ====================
 
 # ========= Modelos Pydantic para Request/Response =========
@@ -580,7 +1401,7 @@ async def register(user_data: UserRegister, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Username já cadastrado")
     
     # Criar novo usuário
-    hashed_password = auth.get_password_hash(user_data.password)
+    hashed_password = await run_io(auth.get_password_hash, user_data.password)
     new_user = models.User(
         email=user_data.email,
         username=user_data.username,
@@ -598,7 +1419,7 @@ async def login(credentials: UserLogin, db: Session = Depends(get_db)):
     """
     Login e geração de token JWT
     """
-    user = auth.authenticate_user(db, credentials.email, credentials.password)
+    user = await run_io(auth.authenticate_user, db, credentials.email, credentials.password)
     if not user:
         raise HTTPException(
             status_code=401,
@@ -641,8 +1462,13 @@ async def create_birth_chart(
     )
     
     try:
-        calculated_map = calculate_map(birth_data)
-        chart_data_json = calculated_map.dict()
+        jd, lat, lon = await run_io(resolve_birth_moment, birth_data)
+        chart = await get_chart_async(jd, lat, lon)
+        # Longitudes brutas junto do mapa: usadas pelo ranking de compatibilidade
+        chart_data_json = {
+            **build_map_result(chart).model_dump(),
+            "longitudes": dict(zip(chart.bodies, chart.longitude.tolist()))
+        }
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao calcular mapa: {str(e)}")
     
@@ -659,6 +1485,7 @@ async def create_birth_chart(
     db.add(new_chart)
     db.commit()
     db.refresh(new_chart)
+    compatibility_index.invalidate(current_user.id)
     
     return new_chart
 
@@ -713,9 +1540,235 @@ async def delete_birth_chart(
     
     db.delete(chart)
     db.commit()
+    compatibility_index.invalidate(current_user.id)
     
     return {"message": "Mapa deletado com sucesso"}
 
+# ========= Sinastria =========
+
+SYNASTRY_MAX_PARTNERS = int(os.environ.get("SYNASTRY_MAX_PARTNERS", "50"))
+
+class SynastryPerson(BaseModel):
+    name: Optional[str] = None
+    birth_data: Optional[BirthData] = None
+    chart_id: Optional[int] = None  # BirthChart salvo (exige login)
+
+class SynastryRequest(BaseModel):
+    person: SynastryPerson
+    partners: List[SynastryPerson]
+
+class HouseOverlay(BaseModel):
+    planet: str
+    house: int
+
+class SynastryResponse(BaseModel):
+    partner: str
+    aspects: List[Aspect]                      # planet1 = pessoa, planet2 = parceiro
+    person_in_partner_houses: List[HouseOverlay]
+    partner_in_person_houses: List[HouseOverlay]
+
+async def resolve_person_chart(person: SynastryPerson, current_user: Optional[models.User], db: Session) -> ChartArrays:
+    """Mapa interno (do cache) a partir de dados de nascimento ou de um BirthChart salvo."""
+    if person.chart_id is not None:
+        if current_user is None:
+            raise HTTPException(status_code=401, detail="Login necessário para usar mapas salvos")
+        row = db.query(models.BirthChart).filter(
+            models.BirthChart.id == person.chart_id,
+            models.BirthChart.user_id == current_user.id
+        ).first()
+        if not row:
+            raise HTTPException(status_code=404, detail=f"Mapa {person.chart_id} não encontrado")
+        birth_data = BirthData(date=row.birth_date, time=row.birth_time, city=row.birth_city, country=row.birth_country)
+    elif person.birth_data is not None:
+        birth_data = person.birth_data
+    else:
+        raise HTTPException(status_code=400, detail="Informe birth_data ou chart_id")
+    jd, lat, lon = await run_io(resolve_birth_moment, birth_data)
+    return await get_chart_async(jd, lat, lon)
+
+@app.post("/synastry", response_model=List[SynastryResponse])
+async def synastry_endpoint(
+    request: SynastryRequest,
+    current_user: Optional[models.User] = Depends(auth.get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """
+    Sinastria de uma pessoa com um ou vários parceiros: aspectos entre os
+    mapas e em que casa do outro cai cada planeta.
+    """
+    if not request.partners:
+        raise HTTPException(status_code=400, detail="Informe ao menos um parceiro")
+    if len(request.partners) > SYNASTRY_MAX_PARTNERS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {SYNASTRY_MAX_PARTNERS} parceiros por chamada")
+    charts = await asyncio.gather(
+        *(resolve_person_chart(p, current_user, db) for p in [request.person, *request.partners])
+    )
+    person, partners = charts[0], charts[1:]
+    results = await run_cpu(synastry, person, partners)
+
+    def overlays(bodies, houses):
+        return [HouseOverlay(planet=b, house=h) for b, h in zip(bodies, houses.tolist())]
+
+    return [
+        SynastryResponse(
+            partner=p.name or (f"mapa {p.chart_id}" if p.chart_id is not None else f"parceiro {n + 1}"),
+            aspects=[
+                Aspect(planet1=person.bodies[h.i], planet2=chart.bodies[h.j], aspect_type=h.aspect, angle=h.angle, orb=h.orb)
+                for h in result.aspects
+            ],
+            person_in_partner_houses=overlays(person.bodies, result.person_in_partner),
+            partner_in_person_houses=overlays(chart.bodies, result.partner_in_person)
+        )
+        for n, (p, chart, result) in enumerate(zip(request.partners, partners, results))
+    ]
+
+# ========= Ranking de Compatibilidade =========
+
+COMPATIBILITY_MAX_K = 100
+
+class CompatibilityRequest(BaseModel):
+    chart_id: Optional[int] = None         # Mapa salvo usado como referência
+    birth_data: Optional[BirthData] = None  # ou dados de nascimento
+    top_k: int = 10
+
+class CompatibilityMatch(BaseModel):
+    chart_id: int
+    name: Optional[str]
+    score: float
+    harmony: float
+    tension: float
+
+def rank_user_charts(user_id: int, query_lon: np.ndarray, exclude_id: Optional[int], k: int) -> List[tuple]:
+    """
+    Pontua o mapa consultado contra todos os mapas salvos do usuário e devolve o top-k
+    como tuplas (id, nome, pontuação, harmonia, tensão).
+    Roda no pool de I/O: consulta o banco e o NumPy libera o GIL no cálculo.
+    """
+    db = SessionLocal()
+    try:
+        user_charts = db.query(models.BirthChart).filter(models.BirthChart.user_id == user_id)
+        # O SQLite reaproveita o maior id apagado: a soma dos ids e o created_at mais
+        # recente mudam mesmo quando contagem e maior id voltam a ser os mesmos
+        fingerprint = tuple(user_charts.with_entities(
+            func.count(models.BirthChart.id), func.max(models.BirthChart.id),
+            func.sum(models.BirthChart.id), func.max(models.BirthChart.created_at)
+        ).one())
+        index = compatibility_index.get(
+            user_id, fingerprint,
+            lambda: user_charts.with_entities(
+                models.BirthChart.id, models.BirthChart.name, models.BirthChart.chart_data
+            ).all()
+        )
+    finally:
+        db.close()
+
+    score, harmony, tension = score_matrix(query_lon, index.longitudes)
+    if exclude_id is not None:
+        score[index.ids == exclude_id] = -np.inf
+    best = [i for i in top_k(score, k).tolist() if np.isfinite(score[i])]
+    return [
+        (int(index.ids[i]), index.names[i], round(float(score[i]), 2),
+         round(float(harmony[i]), 2), round(float(tension[i]), 2))
+        for i in best
+    ]
+
+@app.post("/charts/compatibility", response_model=List[CompatibilityMatch])
+async def charts_compatibility(
+    request: CompatibilityRequest,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Ranking dos mapas salvos do usuário por compatibilidade com um mapa
+    (salvo ou por dados de nascimento). Funciona com milhares de mapas por conta.
+    """
+    k = max(1, min(request.top_k, COMPATIBILITY_MAX_K))
+    query = await resolve_person_chart(
+        SynastryPerson(chart_id=request.chart_id, birth_data=request.birth_data), current_user, db
+    )
+    best = await run_io(rank_user_charts, current_user.id, query.longitude, request.chart_id, k)
+    return [
+        CompatibilityMatch(chart_id=i, name=name, score=score, harmony=harmony, tension=tension)
+        for i, name, score, harmony, tension in best
+    ]
+
+# ========= Mapas de Relacionamento (Composto e Davison) =========
+
+RELATIONSHIP_MAX_PAIRS = int(os.environ.get("RELATIONSHIP_MAX_PAIRS", "200"))
+RELATIONSHIP_KINDS = ("composite", "davison")
+
+class RelationshipPair(BaseModel):
+    person_a: SynastryPerson
+    person_b: SynastryPerson
+
+class RelationshipRequest(BaseModel):
+    pairs: List[RelationshipPair]
+    kinds: List[str] = list(RELATIONSHIP_KINDS)
+
+class RelationshipResult(BaseModel):
+    index: int
+    composite: Optional[MapResult] = None
+    davison: Optional[MapResult] = None
+    error: Optional[str] = None
+
+def build_composite_maps(charts_a: List[ChartArrays], charts_b: List[ChartArrays]) -> List[dict]:
+    """Compostos de todos os pares numa passada (roda no pool de CPU)."""
+    return [build_map_result(c).model_dump() for c in composite_charts(charts_a, charts_b)]
+
+@app.post("/relationship/batch", response_model=List[RelationshipResult])
+async def relationship_batch_endpoint(
+    request: RelationshipRequest,
+    current_user: Optional[models.User] = Depends(auth.get_current_user_optional),
+    db: Session = Depends(get_db)
+):
+    """
+    Mapas Composto e/ou Davison de vários casais numa chamada.
+    Composto: pontos médios dos mapas natais (do cache, sem efemérides novas).
+    Davison: um mapa no instante e local médios de cada casal.
+    Erros são devolvidos por par, sem derrubar o lote.
+    """
+    if not request.pairs:
+        raise HTTPException(status_code=400, detail="Informe ao menos um par")
+    if len(request.pairs) > RELATIONSHIP_MAX_PAIRS:
+        raise HTTPException(status_code=400, detail=f"Máximo de {RELATIONSHIP_MAX_PAIRS} pares por chamada")
+    kinds = set(request.kinds)
+    if not kinds or not kinds <= set(RELATIONSHIP_KINDS):
+        raise HTTPException(status_code=400, detail=f"kinds deve conter {' e/ou '.join(RELATIONSHIP_KINDS)}")
+
+    # Mapas natais (cache), dois por par
+    people = [p for pair in request.pairs for p in (pair.person_a, pair.person_b)]
+    natal = await asyncio.gather(
+        *(resolve_person_chart(p, current_user, db) for p in people), return_exceptions=True
+    )
+    results = [RelationshipResult(index=n) for n in range(len(request.pairs))]
+    valid = []  # (índice, mapa A, mapa B)
+    for n in range(len(request.pairs)):
+        a, b = natal[2 * n], natal[2 * n + 1]
+        failed = next((x for x in (a, b) if isinstance(x, BaseException)), None)
+        if failed is not None:
+            results[n].error = failed.detail if isinstance(failed, HTTPException) else str(failed)
+        else:
+            valid.append((n, a, b))
+    if not valid:
+        return results
+
+    if "composite" in kinds:
+        composites = await run_cpu(build_composite_maps, [a for _, a, _ in valid], [b for _, _, b in valid])
+        for (n, _, _), composite in zip(valid, composites):
+            results[n].composite = MapResult(**composite)
+
+    if "davison" in kinds:
+        davisons = await asyncio.gather(
+            *(get_chart_async(*davison_moment(a, b)) for _, a, b in valid), return_exceptions=True
+        )
+        for (n, _, _), chart in zip(valid, davisons):
+            if isinstance(chart, BaseException):
+                results[n].error = chart.detail if isinstance(chart, HTTPException) else str(chart)
+            else:
+                results[n].davison = build_map_result(chart)
+
+    return results
+
 # ========= Endpoints de Conversas =========
 
 @app.post("/conversations", response_model=ConversationResponse)
@@ -771,15 +1824,10 @@ async def get_conversation(
     
     return conversation
 
-@app.post("/conversations/{conversation_id}/messages", response_model=MessageResponse)
-async def send_message(
-    conversation_id: int,
-    message_data: MessageCreate,
-    current_user: models.User = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
-):
+def prepare_conversation_message(conversation_id: int, message: str, current_user: models.User, db: Session):
     """
-    Enviar mensagem em uma conversa e receber resposta da IA
+    Salva a mensagem do usuário e monta o contexto da IA.
+    Retorna (conversa, mensagem do usuário, histórico anterior, dados do mapa).
     """
     # Verificar se a conversa existe e pertence ao usuário
     conversation = db.query(models.Conversation).filter(
@@ -794,7 +1842,7 @@ async def send_message(
     user_message = models.Message(
         conversation_id=conversation_id,
         role="user",
-        content=message_data.message
+        content=message
     )
     db.add(user_message)
     db.commit()
@@ -813,55 +1861,98 @@ async def send_message(
         if chart:
             map_data = chart.chart_data
     
-    # Chamar IA (usando o endpoint /chat interno)
+    history = [ChatMessage(role=msg.role, content=msg.content) for msg in messages[:-1]]  # Exclude last message
+    return conversation, user_message, history, map_data
+
+def discard_message(db: Session, message: models.Message):
+    """
+    Apaga a mensagem do usuário quando a IA não respondeu (429, erro): senão ela
+    fica sem resposta e vai como histórico na próxima chamada.
+    """
+    db.delete(message)
+    db.commit()
+
+def save_assistant_message(db: Session, conversation_id: int, content: str) -> models.Message:
+    """Salva a resposta da IA e atualiza o timestamp da conversa."""
+    assistant_message = models.Message(
+        conversation_id=conversation_id,
+        role="assistant",
+        content=content
+    )
+    db.add(assistant_message)
+    db.query(models.Conversation).filter(models.Conversation.id == conversation_id).update(
+        {"updated_at": datetime.utcnow()}
+    )
+    db.commit()
+    db.refresh(assistant_message)
+    return assistant_message
+
+def save_streamed_message(conversation_id: int, content: str) -> int:
+    """save_assistant_message numa sessão própria (a do request já fechou quando o stream termina)."""
+    db = SessionLocal()
     try:
-        history = [ChatMessage(role=msg.role, content=msg.content) for msg in messages[:-1]]  # Exclude last message
-        
-        chat_request = ChatRequest(
-            message=message_data.message,
-            map_data=map_data,
-            history=history
-        )
-        
-        # Chamar função de chat diretamente
-        if not GOOGLE_API_KEY:
-            raise HTTPException(status_code=503, detail="IA não configurada")
-        
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
-        chat_history = []
-        chat_history.append({"role": "user", "parts": [INSTRUCOES_SISTEMA]})
-        chat_history.append({"role": "model", "parts": ["Entendido."]})
-        
-        if map_data:
-            contexto_mapa = f"DADOS DO MAPA:\\n{json.dumps(map_data, ensure_ascii=False, indent=2)}"
-            chat_history.append({"role": "user", "parts": [contexto_mapa]})
-            chat_history.append({"role": "model", "parts": ["Dados recebidos."]})
-        
-        for msg in history:
-            role = "model" if msg.role == "assistant" else "user"
-            chat_history.append({"role": role, "parts": [msg.content]})
-        
-        chat = model.start_chat(history=chat_history)
-        response = chat.send_message(message_data.message)
-        
-        # Salvar resposta da IA
-        assistant_message = models.Message(
-            conversation_id=conversation_id,
-            role="assistant",
-            content=response.text
+        return save_assistant_message(db, conversation_id, content).id
+    finally:
+        db.close()
+
+@app.post("/conversations/{conversation_id}/messages", response_model=MessageResponse)
+async def send_message(
+    conversation_id: int,
+    message_data: MessageCreate,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Enviar mensagem em uma conversa e receber resposta da IA
+    """
+    if not GOOGLE_API_KEY:
+        raise HTTPException(status_code=503, detail="IA não configurada")
+    _, user_message, history, map_data = prepare_conversation_message(conversation_id, message_data.message, current_user, db)
+    
+    # Chamar IA
+    try:
+        text = await ai_gateway.chat(
+            CONVERSATION_MODEL, build_chat_history(map_data, history, brief=True), message_data.message, ai_user(None, current_user)
         )
-        db.add(assistant_message)
-        
-        # Atualizar timestamp da conversa
-        conversation.updated_at = datetime.utcnow()
-        
-        db.commit()
-        db.refresh(assistant_message)
-        
-        return assistant_message
-        
+    except HTTPException:
+        discard_message(db, user_message)
+        raise
     except Exception as e:
+        discard_message(db, user_message)
         raise HTTPException(status_code=500, detail=f"Erro ao processar resposta da IA: {str(e)}")
+    
+    # Salvar resposta da IA
+    return save_assistant_message(db, conversation_id, text)
+
+@app.post("/conversations/{conversation_id}/messages/stream")
+async def send_message_stream(
+    conversation_id: int,
+    message_data: MessageCreate,
+    current_user: models.User = Depends(auth.get_current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Mesmo que /conversations/{id}/messages, com a resposta em server-sent events.
+    A mensagem da IA é salva quando o stream termina; o evento "done" traz o
+    message_id junto com as métricas. Se o cliente desconectar antes, nada é salvo.
+    """
+    if not GOOGLE_API_KEY:
+        raise HTTPException(status_code=503, detail="IA não configurada")
+    _, user_message, history, map_data = prepare_conversation_message(conversation_id, message_data.message, current_user, db)
+
+    async def save(text: str) -> dict:
+        return {"message_id": await run_io(save_streamed_message, conversation_id, text)}
+
+    try:
+        lease, events = await ai_gateway.stream_chat(
+            CONVERSATION_MODEL, build_chat_history(map_data, history, brief=True), message_data.message,
+            ai_user(None, current_user), save
+        )
+    except Exception:
+        # Sem vaga (429) ou falha ao abrir o chat: a pergunta não fica órfã na conversa
+        discard_message(db, user_message)
+        raise
+    return StreamingResponse(events, media_type="text/event-stream", headers=SSE_HEADERS, background=BackgroundTask(lease.release))
 
 @app.delete("/conversations/{conversation_id}")
 async def delete_conversation(
@@ -887,8 +1978,8 @@ async def delete_conversation(
 
 # ========= Endpoint de Geração de Relatório (JSON) =========
 
-from report_prompt import get_report_prompt
-import re
+# Conteúdo das seções que não puderam ser geradas (o cliente pode pedir de novo só elas)
+FAILED_SECTION_HTML = "<p>Não foi possível gerar esta seção agora. Tente novamente em instantes.</p>"
 
 class AnalysisResponse(BaseModel):
     name: str
@@ -896,107 +1987,144 @@ class AnalysisResponse(BaseModel):
     map_data: Dict
     sections: Dict[str, str]
     question: Optional[str] = None
+    cached: bool = False
+    generated_at: Optional[datetime] = None
+    failed_sections: List[str] = []
+
+async def load_report(request: ReportRequest):
+    """
+    Instante/local (geocodificação em cache), chave do relatório e o que já
+    existe no cache: {"map_data", "sections", "generated_at"}. Sem cache (ou
+    com refresh) o mapa é calculado e as seções começam vazias.
+    Retorna (birth_data, chave, entrada).
+    """
+    birth_data = BirthData(
+        date=request.date,
+        time=request.time,
+        city=request.city,
+        country=request.country
+    )
+    jd, lat, lon = await run_io(resolve_birth_moment, birth_data)
+    report_key = report_cache.key(chart_cache.key(jd, lat, lon, HOUSE_SYSTEM), request.name, request.question, REPORT_MODEL)
+    if not request.refresh:
+        entry = report_cache.get_memory(report_key) or await run_io(report_cache.get_db, report_key)
+        if entry is not None:
+            return birth_data, report_key, {**entry, "sections": dict(entry["sections"])}
+
+    map_result = build_map_result(await get_chart_async(jd, lat, lon))
+    map_data = {
+        "positions": [p.dict() for p in map_result.positions],
+        "houses": [h.dict() for h in map_result.houses],
+        "aspects": [a.dict() for a in map_result.aspects],
+        "elements": map_result.elements,
+        "quadruplicities": map_result.quadruplicities
+    }
+    return birth_data, report_key, {"map_data": map_data, "sections": {}, "generated_at": None}
+
+def missing_sections(request: ReportRequest, entry: dict) -> List[str]:
+    return [k for k in report_section_keys(request.question) if k not in entry["sections"]]
+
+async def generate_report_sections(request: ReportRequest, report_key: str, entry: dict, lease):
+    """
+    Gera em paralelo as seções que faltam na entrada (dentro da vaga do
+    usuário no ai_gateway). Cada seção pronta já vai para o cache, então uma
+    nova chamada depois de uma falha só gera o que faltou.
+    """
+    prompts = {
+        k: get_section_prompt(request.name, entry["map_data"], k, request.question)
+        for k in missing_sections(request, entry)
+    }
+    try:
+        async for result in generate_sections(lambda prompt: ai_gateway.generate(REPORT_MODEL, prompt, None, within=lease), prompts):
+            if result.html is not None:
+                entry["sections"][result.key] = result.html
+                entry["generated_at"] = datetime.utcnow().isoformat()
+                await run_io(
+                    report_cache.put, report_key, {**entry, "sections": dict(entry["sections"])},
+                    REPORT_MODEL, request.refresh and len(entry["sections"]) == 1
+                )
+            yield result
+    finally:
+        lease.release()
 
 @app.post("/generate-report", response_model=AnalysisResponse)
-async def generate_report_endpoint(request: ReportRequest):
+async def generate_report_endpoint(request: ReportRequest, http_request: Request):
     """
     Gera análise astrológica completa e retorna JSON.
     
     Fluxo:
-    1. Calcula mapa astral
-    2. Gera análise completa com IA (9 seções)
-    3. Retorna JSON estruturado para exibição no frontend
+    1. Procura o relatório no cache (mapa, nome, pergunta, versão do prompt, modelo)
+    2. Gera com IA só as seções que faltam, em paralelo (uma chamada menor por seção)
+    3. Retorna JSON estruturado para exibição no frontend; seções que falharam
+       mesmo depois das novas tentativas vêm em failed_sections
     """
     if not GOOGLE_API_KEY:
         raise HTTPException(status_code=503, detail="Serviço de IA não configurado. Configure GOOGLE_API_KEY.")
     
     try:
-        # 1. Calcular mapa astral
-        birth_data = BirthData(
-            date=request.date,
-            time=request.time,
-            city=request.city,
-            country=request.country
-        )
-        map_result = calculate_map(birth_data)
-        
-        # 2. Preparar dados para a IA
-        map_data_dict = {
-            "positions": [p.dict() for p in map_result.positions],
-            "houses": [h.dict() for h in map_result.houses],
-            "aspects": [a.dict() for a in map_result.aspects],
-            "elements": map_result.elements,
-            "quadruplicities": map_result.quadruplicities
-        }
-        
-        # 3. Gerar prompt estruturado
-        prompt = get_report_prompt(request.name, map_data_dict, request.question)
-        
-        # 4. Enviar para IA e obter análise completa
-        model = genai.GenerativeModel('gemini-2.5-flash')
-        response = model.generate_content(prompt)
-        
-        # 5. Parsear resposta da IA em seções
-        analysis_text = response.text
-        
-        # Extrair seções do HTML retornado pela IA
-        sections = {
-            'visao_geral': extract_section(analysis_text, 'VISÃO GERAL', 'ANÁLISE DA TRÍADE'),
-            'triade_principal': extract_section(analysis_text, 'TRÍADE PRINCIPAL', 'PLANETAS PESSOAIS'),
-            'planetas_pessoais': extract_section(analysis_text, 'PLANETAS PESSOAIS', 'JÚPITER E SATURNO'),
-            'jupiter_saturno': extract_section(analysis_text, 'JÚPITER E SATURNO', 'MEIO-CÉU'),
-            'meio_ceu': extract_section(analysis_text, 'MEIO-CÉU', 'CASAS ASTROLÓGICAS'),
-            'casas': extract_section(analysis_text, 'CASAS ASTROLÓGICAS', 'PRINCIPAIS ASPECTOS'),
-            'aspectos': extract_section(analysis_text, 'PRINCIPAIS ASPECTOS', 'PONTOS KÁRMICOS'),
-            'pontos_karmicos': extract_section(analysis_text, 'PONTOS KÁRMICOS', 'RESPOSTA À PERGUNTA' if request.question else None),
-        }
+        birth_data, report_key, entry = await load_report(request)
+        missing = missing_sections(request, entry)
+        failed = []
+        if missing:
+            lease = await ai_gateway.acquire(ai_user(http_request), global_slot=False)
+            failed = [r.key async for r in generate_report_sections(request, report_key, entry, lease) if r.html is None]
         
-        if request.question:
-            sections['resposta_pergunta'] = extract_section(analysis_text, 'RESPOSTA À PERGUNTA', None)
-        
-        # 6. Retornar JSON estruturado
         return AnalysisResponse(
             name=request.name,
-            birth_data={
-                "date": request.date,
-                "time": request.time,
-                "city": request.city,
-                "country": request.country
-            },
-            map_data=map_data_dict,
-            sections=sections,
-            question=request.question
+            birth_data=birth_data.dict(),
+            map_data=entry["map_data"],
+            sections={k: entry["sections"].get(k, FAILED_SECTION_HTML) for k in report_section_keys(request.question)},
+            question=request.question,
+            cached=not missing,
+            generated_at=entry["generated_at"],
+            failed_sections=failed
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório: {str(e)}")
 
-def extract_section(text: str, start_marker: str, end_marker: str = None) -> str:
+async def report_stream(request: ReportRequest, report_key: str, entry: dict, lease):
+    """Eventos SSE do relatório: start, section / section_error (na ordem em que ficam prontas) e done."""
+    start = time.perf_counter()
+    keys = report_section_keys(request.question)
+    yield sse("start", {"map_data": entry["map_data"], "sections": [{"key": k, "title": SECTION_TITLES[k]} for k in keys]})
+    for k in keys:
+        if k in entry["sections"]:
+            yield sse("section", {"key": k, "title": SECTION_TITLES[k], "html": entry["sections"][k], "cached": True, "attempts": 0})
+    failed = []
+    if lease is not None:
+        async for r in generate_report_sections(request, report_key, entry, lease):
+            if r.html is None:
+                failed.append(r.key)
+                yield sse("section_error", {"key": r.key, "title": SECTION_TITLES[r.key], "detail": r.error, "attempts": r.attempts})
+            else:
+                yield sse("section", {"key": r.key, "title": SECTION_TITLES[r.key], "html": r.html, "cached": False, "attempts": r.attempts})
+    yield sse("done", {
+        "failed_sections": failed,
+        "generated_at": entry["generated_at"],
+        "duration_ms": round((time.perf_counter() - start) * 1000, 1)
+    })
+
+@app.post("/generate-report/stream")
+async def generate_report_stream_endpoint(request: ReportRequest, http_request: Request):
     """
-    Extrai uma seção do texto da IA baseado em marcadores
+    Mesmo que /generate-report, em server-sent events: "start" (dados do mapa e
+    lista de seções), um "section" para cada seção assim que fica pronta (as do
+    cache vêm primeiro) ou "section_error" se esgotou as tentativas, e "done".
+    Chamar de novo gera só as seções que faltaram.
     """
-    try:
-        # Procurar pelo marcador de início (case insensitive)
-        start_pattern = re.compile(re.escape(start_marker), re.IGNORECASE)
-        start_match = start_pattern.search(text)
-        
-        if not start_match:
-            return f"<p>Seção {start_marker} não encontrada na análise.</p>"
-        
-        start_pos = start_match.end()
-        
-        # Se houver marcador de fim, procurar por ele
-        if end_marker:
-            end_pattern = re.compile(re.escape(end_marker), re.IGNORECASE)
-            end_match = end_pattern.search(text, start_pos)
-            if end_match:
-                return text[start_pos:end_match.start()].strip()
-        
-        # Se não houver marcador de fim, pegar até o final
-        return text[start_pos:].strip()
-        
-    except Exception as e:
-        return f"<p>Erro ao extrair seção: {str(e)}</p>"
+    if not GOOGLE_API_KEY:
+        raise HTTPException(status_code=503, detail="Serviço de IA não configurado. Configure GOOGLE_API_KEY.")
+    _, report_key, entry = await load_report(request)
+    lease = None
+    if missing_sections(request, entry):
+        lease = await ai_gateway.acquire(ai_user(http_request), global_slot=False)
+    return StreamingResponse(
+        report_stream(request, report_key, entry, lease), media_type="text/event-stream", headers=SSE_HEADERS,
+        background=BackgroundTask(lease.release) if lease else None
+    )
 
 # ========= Endpoint de Geração de SVG do Mapa Astral =========
 
@@ -1028,7 +2156,8 @@ async def generate_chart_svg_endpoint(request: ChartSVGRequest):
             colors.water_color = "#4682B4"
         
         # Gerar SVG
-        svg_content = generate_chart_svg_from_birth_data(
+        svg_content = await run_io(
+            generate_chart_svg_from_birth_data,
             name=request.name,
             date=request.date,
             time=request.time,
@@ -1,6 +1,6 @@
 # models.py - Modelos do Banco de Dados
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Boolean, JSON, Float
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -68,3 +68,40 @@ class Message(Base):
     
     # Relacionamentos
     conversation = relationship("Conversation", back_populates="messages")
+
+
+class GeocodeCache(Base):
+    __tablename__ = "geocode_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    query_key = Column(String, unique=True, index=True, nullable=False)  # "cidade|pais" normalizado
+    city = Column(String, nullable=False)
+    country = Column(String, nullable=False)
+    latitude = Column(Float, nullable=True)
+    longitude = Column(Float, nullable=True)
+    found = Column(Boolean, default=True)  # False = cache negativo (lugar não encontrado)
+    expires_at = Column(DateTime, nullable=True)  # None = não expira
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ChartCache(Base):
+    __tablename__ = "chart_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)  # sha256 de (jd, lat, lon, casas, config)
+    settings_hash = Column(String, index=True, nullable=False)  # versão do cálculo + arquivos de efemérides
+    chart_data = Column(JSON, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False)
+
+
+class ReportCache(Base):
+    __tablename__ = "report_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)  # sha256 de (mapa, nome, pergunta, versão do prompt, modelo)
+    prompt_version = Column(String, nullable=False)
+    model = Column(String, nullable=False)
+    report_data = Column(JSON, nullable=False)  # seções e dados do mapa
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
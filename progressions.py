@@ -0,0 +1,146 @@
+# progressions.py - Progressões Secundárias e Arco Solar
+
+"""
+Séries de progressões ao longo da vida, sem uma chamada ao Swiss Ephemeris
+por data.
+
+Progressão secundária: um dia depois do nascimento equivale a um ano de
+vida (JD progredido = JD natal + idade em anos). Noventa anos de vida são
+só ~90 dias de efemérides, então os corpos são amostrados uma vez por dia
+nesse intervalo (uma varredura) e cada mês da série é interpolado
+(Hermite com as velocidades, EphemerisSeries de ephemeris_tables.py).
+O MeioCéu progride pelo arco solar e o Ascendente sai do MC progredido
+com swe.houses_armc na latitude natal.
+
+Arco solar: todos os pontos natais avançam o mesmo arco, a distância que
+o Sol progredido já percorreu desde o natal (sai da mesma varredura).
+
+Aspectos progredido -> natal usam orbe de 1° e a mesma matriz de
+distâncias do motor de aspectos (meses x corpos x corpos numa operação).
+"""
+
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+import swisseph as swe
+
+from aspects import MAJOR_ASPECTS, AspectDef, AspectTable, angular_distance, aspect_mask
+from chart_core import CHART_BODIES, HOUSE_ORB_MASK, PLANETS_SWEPH, ChartArrays
+from ephemeris_tables import EphemerisSeries, wrap180
+from houses import HouseTable
+
+TROPICAL_YEAR = 365.242199
+
+METHODS = ("secondary", "solar_arc")
+
+MAX_YEARS = 120
+
+# Orbe usual em progressões: 1° para todos os aspectos maiores
+PROGRESSION_ORB = 1.0
+PROGRESSION_TABLE = AspectTable([AspectDef(a.name, a.angle, PROGRESSION_ORB) for a in MAJOR_ASPECTS])
+
+_NN = CHART_BODIES.index("NóduloNorte")
+_SN = CHART_BODIES.index("NóduloSul")
+_ASC = CHART_BODIES.index("Ascendente")
+_MC = CHART_BODIES.index("MeioCéu")
+_SUN = CHART_BODIES.index("Sol")
+
+
+class ProgressedFrame(NamedTuple):
+    """Posições progredidas de vários meses (T = meses, N = corpos)."""
+    longitude: np.ndarray  # (T, N)
+    speed: np.ndarray      # (T, N) graus/dia progredido (0 no arco solar)
+    house: np.ndarray      # (T, N) casa natal onde cai cada ponto
+    arc: np.ndarray        # (T,) arco solar em graus
+
+
+def progressed_jd(natal_jd: float, jds) -> np.ndarray:
+    """JD progredido (um dia por ano de vida) para datas reais em JD."""
+    return natal_jd + (np.asarray(jds, dtype=np.float64) - natal_jd) / TROPICAL_YEAR
+
+
+def sweep(natal_jd: float, jd_end: float) -> EphemerisSeries:
+    """
+    Varredura diária dos corpos do Swiss Ephemeris do nascimento até o JD
+    progredido de jd_end (uma amostra a mais em cada ponta para a interpolação).
+    Usa swe.calc como compute_chart, para que a idade 0 coincida com o mapa natal.
+    """
+    jd0 = np.floor(natal_jd) - 1.0
+    days = int(np.ceil(progressed_jd(natal_jd, jd_end) - jd0)) + 2
+    codes = list(PLANETS_SWEPH.values())
+    lon = np.empty((days, len(codes)))
+    speed = np.empty((days, len(codes)))
+    for d in range(days):
+        for c, code in enumerate(codes):
+            pos, _ = swe.calc(jd0 + d, code)
+            lon[d, c], speed[d, c] = pos[0], pos[3]
+    return EphemerisSeries(jd0, 1.0, lon, speed)
+
+
+def _obliquity(jd: float) -> float:
+    pos, _ = swe.calc(jd, swe.ECL_NUT)
+    return pos[0]
+
+
+def _ascendant_from_mc(mc: np.ndarray, lat: float, eps: float, house_system: str) -> np.ndarray:
+    """Ascendente de cada MC na latitude natal (ARMC a partir do MC e da obliquidade)."""
+    mc_rad = np.radians(mc)
+    armc = np.degrees(np.arctan2(np.sin(mc_rad) * np.cos(np.radians(eps)), np.cos(mc_rad))) % 360.0
+    return np.array([swe.houses_armc(a, lat, eps, house_system.encode())[1][0] for a in armc.tolist()])
+
+
+def secondary(natal: ChartArrays, series: EphemerisSeries, jds) -> ProgressedFrame:
+    """Progressão secundária em cada data (JD) de jds."""
+    pjd = progressed_jd(natal.jd, jds)
+    pos = (pjd - series.jd0) / series.step
+    index = np.clip(np.floor(pos).astype(np.int64), 0, len(series) - 2)
+    lon_sw, speed_sw = series.interval(index, (pos - index)[:, None])
+
+    n_sw = lon_sw.shape[1]
+    longitude = np.zeros((len(pjd), len(CHART_BODIES)))
+    speed = np.zeros_like(longitude)
+    longitude[:, :n_sw], speed[:, :n_sw] = lon_sw, speed_sw
+    longitude[:, _SN] = (longitude[:, _NN] + 180.0) % 360.0
+    speed[:, _SN] = speed[:, _NN]
+
+    # O Sol nunca retrograda e anda ~1° por ano: o arco fica entre 0 e ~120°
+    arc = np.clip(wrap180(longitude[:, _SUN] - natal.longitude[_SUN]), 0.0, None)
+    longitude[:, _MC] = (natal.midheaven + arc) % 360.0
+    longitude[:, _ASC] = _ascendant_from_mc(longitude[:, _MC], natal.lat, _obliquity(natal.jd), natal.house_system)
+    return ProgressedFrame(longitude, speed, _natal_houses(natal, longitude), arc)
+
+
+def solar_arc(natal: ChartArrays, sun_frame: ProgressedFrame) -> ProgressedFrame:
+    """Direções por arco solar, com o arco da progressão secundária das mesmas datas."""
+    longitude = (natal.longitude[None, :] + sun_frame.arc[:, None]) % 360.0
+    return ProgressedFrame(longitude, np.zeros_like(longitude), _natal_houses(natal, longitude), sun_frame.arc)
+
+
+def _natal_houses(natal: ChartArrays, longitude: np.ndarray) -> np.ndarray:
+    house = np.empty(longitude.shape, dtype=np.int8)
+    house[:, :_SN + 1] = HouseTable(natal.cusps).houses(longitude[:, :_SN + 1], orb=HOUSE_ORB_MASK)
+    house[:, _ASC:] = HouseTable(natal.cusps).houses(longitude[:, _ASC:], orb=True)
+    return house
+
+
+def progressed_aspects(frame: ProgressedFrame, natal: ChartArrays, table: AspectTable = PROGRESSION_TABLE):
+    """
+    Aspectos progredido -> natal de todos os meses numa operação.
+    Retorna arrays paralelos (mês, i progredido, j natal, aspecto, ângulo, orbe).
+    """
+    dist = angular_distance(frame.longitude, natal.longitude[None, :])  # (T, N, N)
+    mask = aspect_mask(dist, table.orb_matrix(CHART_BODIES, natal.bodies), table)
+    t, i, j, k = np.nonzero(mask)
+    angle = dist[t, i, j]
+    return t, i, j, k, angle, np.abs(angle - table.angles[k])
+
+
+def progression_frames(natal: ChartArrays, series: EphemerisSeries, jds,
+                       methods: Sequence[str] = METHODS) -> List[tuple]:
+    """[(método, ProgressedFrame, aspectos), ...] para as datas de jds."""
+    sec = secondary(natal, series, jds)
+    frames = []
+    for method in methods:
+        frame = sec if method == "secondary" else solar_arc(natal, sec)
+        frames.append((method, frame, progressed_aspects(frame, natal)))
+    return frames
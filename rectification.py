@@ -0,0 +1,106 @@
+# rectification.py - Retificação da Hora de Nascimento
+
+"""
+Varredura de horários candidatos de nascimento (ex.: minuto a minuto num dia).
+
+Num mesmo dia só a Lua, os ângulos e as casas mudam de forma relevante.
+Então, em vez de um compute_chart completo por minuto:
+
+- Corpos lentos (todos menos a Lua): swe.calc só nas pontas da janela; os
+  minutos no meio saem do Hermite cúbico com as velocidades (erro de
+  milésimos de segundo de arco em 24 h).
+- Lua: swe.calc em cada candidato.
+- Casas e ângulos: swe.houses em cada candidato (dependem do local e da hora).
+- Casas dos corpos: assign_houses_batch para todos os candidatos de uma vez.
+
+Geocodificação e fuso são resolvidos uma vez pelo chamador. O resultado é
+compactado em trechos (segments) em que signo do Ascendente, do MC, da Lua
+e a casa de cada corpo ficam iguais.
+"""
+
+from datetime import datetime, timedelta
+from typing import List, NamedTuple, Tuple
+
+import numpy as np
+import pytz
+import swisseph as swe
+
+from chart_core import CHART_BODIES, HOUSE_ORB_MASK, HOUSE_SYSTEM, PLANETS_SWEPH
+from ephemeris_tables import datetime_to_jd, hermite, wrap180
+from houses import assign_houses_batch
+
+_MOON = CHART_BODIES.index("Lua")
+_NN = CHART_BODIES.index("NóduloNorte")
+_SN = CHART_BODIES.index("NóduloSul")
+_ASC = CHART_BODIES.index("Ascendente")
+_MC = CHART_BODIES.index("MeioCéu")
+
+
+def candidate_times(start: datetime, end: datetime, step_minutes: int, tz_name: str) -> Tuple[List[datetime], np.ndarray]:
+    """Horários locais de start a end (inclusive) a cada step_minutes e seus JDs (UT)."""
+    tz = pytz.timezone(tz_name)
+    local = []
+    moment = start
+    while moment <= end:
+        local.append(tz.localize(moment))
+        moment += timedelta(minutes=step_minutes)
+    return local, np.array([datetime_to_jd(m) for m in local])
+
+
+class SweepResult(NamedTuple):
+    jd: np.ndarray         # (T,)
+    longitude: np.ndarray  # (T, N) em CHART_BODIES
+    house: np.ndarray      # (T, N)
+    cusps: np.ndarray      # (T, 12)
+    ephemeris_calls: int   # swe.calc + swe.houses
+
+
+def sweep(jds: np.ndarray, lat: float, lon: float, house_system: str = HOUSE_SYSTEM) -> SweepResult:
+    """Posições e casas em cada JD candidato (mesmas convenções de compute_chart)."""
+    jds = np.asarray(jds, dtype=np.float64)
+    n = len(CHART_BODIES)
+    longitude = np.zeros((len(jds), n))
+    calls = 0
+
+    # Lentos: pontas da janela + Hermite
+    jd0, jd1 = float(jds.min()), float(jds.max())
+    span = max(jd1 - jd0, 1e-9)
+    t = (jds - jd0) / span
+    for col, code in enumerate(PLANETS_SWEPH.values()):
+        if col == _MOON:
+            continue
+        (p0, _, _, m0, _, _), _ = swe.calc(jd0, code)
+        (p1, _, _, m1, _, _), _ = swe.calc(jd1, code)
+        calls += 2
+        value, _ = hermite(p0, p0 + wrap180(p1 - p0), m0 * span, m1 * span, t)
+        longitude[:, col] = value % 360.0
+
+    # Lua e casas em cada candidato
+    cusps = np.empty((len(jds), 12))
+    hsys = house_system.encode()
+    for i, jd in enumerate(jds.tolist()):
+        pos, _ = swe.calc(jd, swe.MOON)
+        longitude[i, _MOON] = pos[0]
+        c, ascmc = swe.houses(jd, lat, lon, hsys)
+        cusps[i] = c[:12]
+        longitude[i, _ASC], longitude[i, _MC] = ascmc[0], ascmc[1]
+    calls += 2 * len(jds)
+
+    longitude[:, _SN] = (longitude[:, _NN] + 180.0) % 360.0
+    house = np.zeros((len(jds), n), dtype=np.int8)
+    house[:, :_SN + 1] = assign_houses_batch(cusps, longitude[:, :_SN + 1], orb=HOUSE_ORB_MASK)
+    house[:, _ASC], house[:, _MC] = 1, 10
+    return SweepResult(jds, longitude, house, cusps, calls)
+
+
+def segment_bounds(result: SweepResult) -> List[Tuple[int, int]]:
+    """
+    Trechos [a, b] (índices inclusivos) em que signo do Ascendente, do MC, da
+    Lua e a casa de cada corpo não mudam.
+    """
+    signs = (result.longitude[:, [_ASC, _MC, _MOON]] // 30).astype(np.int8)
+    state = np.concatenate([signs, result.house[:, :_SN + 1]], axis=1)
+    changed = np.any(state[1:] != state[:-1], axis=1)
+    starts = np.concatenate(([0], np.flatnonzero(changed) + 1))
+    ends = np.concatenate((starts[1:] - 1, [len(state) - 1]))
+    return list(zip(starts.tolist(), ends.tolist()))
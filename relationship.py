@@ -0,0 +1,81 @@
+# relationship.py - Mapas de Relacionamento (Composto e Davison)
+
+"""
+Mapas do casal a partir de dois mapas natais.
+
+Composto (pontos médios): cada corpo fica no ponto médio do arco mais curto
+entre as duas longitudes natais. Sai direto dos ChartArrays já calculados
+(cache), sem nenhuma chamada nova ao Swiss Ephemeris, e vários casais são
+calculados de uma vez com os arrays empilhados (P x N).
+As cúspides usam o ponto médio dos Ascendentes e a média da distância de
+cada cúspide ao próprio Ascendente, o que mantém a ordem das casas mesmo
+quando os Ascendentes estão quase opostos.
+
+Davison (ponto médio no tempo e no espaço): um mapa comum calculado no JD
+médio e no local médio (latitude média, longitude pelo arco mais curto).
+É uma única avaliação de compute_chart por casal e passa pelo cache de mapas.
+"""
+
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+from chart_core import CHART_BODIES, HOUSE_ORB_MASK, ChartArrays
+from houses import assign_houses_batch
+
+
+def midpoint(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Ponto médio do arco mais curto entre longitudes (graus, qualquer forma)."""
+    diff = (np.asarray(b) - np.asarray(a) + 180.0) % 360.0 - 180.0
+    return (np.asarray(a) + diff / 2.0) % 360.0
+
+
+def composite_cusps(cusps_a: np.ndarray, cusps_b: np.ndarray) -> np.ndarray:
+    """
+    Cúspides compostas (P, 12): Ascendente no ponto médio, demais cúspides na
+    média das distâncias ao Ascendente de cada mapa (sempre em ordem crescente).
+    """
+    asc = midpoint(cusps_a[..., 0], cusps_b[..., 0])
+    offset_a = (cusps_a - cusps_a[..., :1]) % 360.0
+    offset_b = (cusps_b - cusps_b[..., :1]) % 360.0
+    return (asc[..., None] + (offset_a + offset_b) / 2.0) % 360.0
+
+
+def composite_charts(charts_a: Sequence[ChartArrays], charts_b: Sequence[ChartArrays]) -> List[ChartArrays]:
+    """Mapas compostos de cada par (charts_a[n], charts_b[n]), todos numa passada."""
+    lon_a = np.stack([c.longitude for c in charts_a])
+    lon_b = np.stack([c.longitude for c in charts_b])
+    longitude = midpoint(lon_a, lon_b)
+    latitude = (np.stack([c.latitude for c in charts_a]) + np.stack([c.latitude for c in charts_b])) / 2.0
+    speed = (np.stack([c.speed for c in charts_a]) + np.stack([c.speed for c in charts_b])) / 2.0
+    cusps = composite_cusps(np.stack([c.cusps for c in charts_a]), np.stack([c.cusps for c in charts_b]))
+
+    # Nodo Sul oposto ao Nodo Norte composto; Ascendente e MeioCéu coerentes com as cúspides
+    nn = CHART_BODIES.index("NóduloNorte")
+    sn = CHART_BODIES.index("NóduloSul")
+    asc = CHART_BODIES.index("Ascendente")
+    mc = CHART_BODIES.index("MeioCéu")
+    longitude[:, sn] = (longitude[:, nn] + 180.0) % 360.0
+    longitude[:, asc] = cusps[:, 0]
+    longitude[:, mc] = cusps[:, 9]
+
+    house = np.zeros(longitude.shape, dtype=np.int8)
+    house[:, :sn + 1] = assign_houses_batch(cusps, longitude[:, :sn + 1], orb=HOUSE_ORB_MASK)
+    house[:, asc], house[:, mc] = 1, 10
+
+    result = []
+    for n, (a, b) in enumerate(zip(charts_a, charts_b)):
+        jd, lat, lon = davison_moment(a, b)
+        result.append(ChartArrays(
+            jd, lat, lon, a.house_system, CHART_BODIES,
+            longitude[n], latitude[n], speed[n], house[n], cusps[n]
+        ))
+    return result
+
+
+def davison_moment(a: ChartArrays, b: ChartArrays) -> Tuple[float, float, float]:
+    """(jd, lat, lon) do mapa Davison: instante médio e local médio."""
+    lon = float(midpoint(a.lon % 360.0, b.lon % 360.0))
+    if lon > 180.0:
+        lon -= 360.0
+    return (a.jd + b.jd) / 2.0, (a.lat + b.lat) / 2.0, lon
@@ -0,0 +1,169 @@
+# report_cache.py - Cache de Relatórios Gerados pela IA
+
+"""
+Relatórios do /generate-report guardados por
+(mapa, nome, pergunta normalizada, versão do prompt, modelo).
+
+O mapa entra pela chave canônica do chart_cache (jd, lat, lon, casas e
+configurações de efemérides). O nome também entra na chave porque aparece no
+texto gerado. A pergunta é normalizada (acentos, caixa, espaços e pontuação
+final), então "Qual minha vocação?" e "qual minha vocacao" dão o mesmo relatório.
+
+O valor guarda as seções já geradas: um relatório em que alguma seção falhou
+fica no cache com as demais, e a chamada seguinte só gera o que faltou.
+
+Mesmo esquema do chart_cache: LRU em memória com TTL e tabela report_cache no
+banco. Mudar REPORT_PROMPT_VERSION ou o modelo muda as chaves sozinho;
+purge_stale() apaga do banco o que expirou ou ficou de versões antigas.
+
+Configuração (variáveis de ambiente):
+    REPORT_CACHE_SIZE          relatórios em memória por processo (padrão: 256)
+    REPORT_CACHE_TTL_SECONDS   validade (padrão: 30 dias)
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+import hashlib
+import os
+import threading
+
+from database import SessionLocal
+from geocoding import normalize_text
+from report_prompt import REPORT_PROMPT_VERSION
+import models
+
+REPORT_CACHE_SIZE = int(os.environ.get("REPORT_CACHE_SIZE", "256"))
+REPORT_CACHE_TTL = timedelta(seconds=int(os.environ.get("REPORT_CACHE_TTL_SECONDS", str(30 * 24 * 3600))))
+
+
+def normalize_question(question: Optional[str]) -> str:
+    """Sem acentos, minúscula, espaços colapsados e sem pontuação no fim."""
+    return normalize_text(question or "").rstrip(" ?!.;:")
+
+
+class ReportCache:
+    """LRU + TTL em memória e tabela report_cache no banco (valores em JSON)."""
+
+    def __init__(self, maxsize: int = REPORT_CACHE_SIZE, ttl: timedelta = REPORT_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lru = OrderedDict()  # key -> (valor, expira_em)
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def key(self, chart_key: str, name: str, question: Optional[str], model: str) -> str:
+        canonical = f"{chart_key}|{normalize_text(name)}|{normalize_question(question)}|{REPORT_PROMPT_VERSION}|{model}"
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    # ----- Memória -----
+
+    def get_memory(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= datetime.utcnow():
+                del self._lru[key]
+                return None
+            self._lru.move_to_end(key)
+            self.memory_hits += 1
+            return value
+
+    def _put_memory(self, key: str, value: dict, expires_at: datetime):
+        with self._lock:
+            self._lru[key] = (value, expires_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
+
+    # ----- Banco -----
+
+    def get_db(self, key: str) -> Optional[dict]:
+        """Busca no banco (bloqueante) e promove para a memória."""
+        db = SessionLocal()
+        try:
+            row = db.query(models.ReportCache).filter(models.ReportCache.cache_key == key).first()
+            if row is None or row.expires_at <= datetime.utcnow():
+                self.misses += 1
+                return None
+            self._put_memory(key, row.report_data, row.expires_at)
+            self.db_hits += 1
+            return row.report_data
+        except Exception:
+            self.errors += 1
+            return None
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[dict]:
+        """Memória e depois banco."""
+        value = self.get_memory(key)
+        if value is None:
+            value = self.get_db(key)
+        return value
+
+    def put(self, key: str, value: dict, model: str, refresh: bool = False):
+        """Grava (ou substitui, no refresh) o relatório."""
+        expires_at = datetime.utcnow() + self.ttl
+        self._put_memory(key, value, expires_at)
+        if refresh:
+            self.refreshes += 1
+        db = SessionLocal()
+        try:
+            row = db.query(models.ReportCache).filter(models.ReportCache.cache_key == key).first()
+            if row is None:
+                row = models.ReportCache(cache_key=key)
+                db.add(row)
+            row.prompt_version = REPORT_PROMPT_VERSION
+            row.model = model
+            row.report_data = value
+            row.created_at = datetime.utcnow()
+            row.expires_at = expires_at
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.errors += 1
+        finally:
+            db.close()
+
+    # ----- Invalidação -----
+
+    def purge_stale(self) -> int:
+        """Apaga do banco relatórios expirados ou de outra versão do prompt."""
+        db = SessionLocal()
+        try:
+            deleted = db.query(models.ReportCache).filter(
+                (models.ReportCache.prompt_version != REPORT_PROMPT_VERSION)
+                | (models.ReportCache.expires_at <= datetime.utcnow())
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        except Exception:
+            db.rollback()
+            self.errors += 1
+            return 0
+        finally:
+            db.close()
+
+    def stats(self) -> dict:
+        hits = self.memory_hits + self.db_hits
+        total = hits + self.misses
+        return {
+            "prompt_version": REPORT_PROMPT_VERSION,
+            "memory_size": len(self._lru),
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "errors": self.errors,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+        }
+
+
+report_cache = ReportCache()
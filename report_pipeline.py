@@ -0,0 +1,86 @@
+# report_pipeline.py - Relatório Gerado por Seções em Paralelo
+
+"""
+Em vez de um único prompt com as 9 seções (latência = soma de todas, e uma
+falha perde o relatório inteiro), cada seção vira um prompt menor
+(report_prompt.get_section_prompt) e elas rodam ao mesmo tempo, até
+SECTION_CONCURRENCY por relatório.
+
+generate_sections devolve cada seção assim que fica pronta (para o stream
+mandar ao cliente na hora). Uma seção que falha é tentada de novo sozinha,
+com espera crescente, sem refazer as outras; se esgotar as tentativas volta
+com error e o relatório segue com as demais.
+
+Configuração (variáveis de ambiente):
+    REPORT_SECTION_CONCURRENCY  seções gerando ao mesmo tempo por relatório (padrão: 4)
+    REPORT_SECTION_RETRIES      novas tentativas de uma seção que falhou (padrão: 2)
+    REPORT_SECTION_TIMEOUT      segundos por tentativa (padrão: 120)
+    REPORT_RETRY_BACKOFF        espera antes da 1ª nova tentativa, dobrando a cada uma (padrão: 1)
+"""
+
+from typing import AsyncIterator, Awaitable, Callable, Dict, NamedTuple, Optional
+import asyncio
+import os
+import re
+
+from fastapi import HTTPException
+
+SECTION_CONCURRENCY = int(os.environ.get("REPORT_SECTION_CONCURRENCY", "4"))
+SECTION_RETRIES = int(os.environ.get("REPORT_SECTION_RETRIES", "2"))
+SECTION_TIMEOUT = float(os.environ.get("REPORT_SECTION_TIMEOUT", "120"))
+RETRY_BACKOFF = float(os.environ.get("REPORT_RETRY_BACKOFF", "1"))
+
+# Cercas de código que o modelo às vezes coloca em volta do HTML
+_FENCE = re.compile(r"^```(?:html)?\s*|\s*```$", re.IGNORECASE)
+
+
+class SectionResult(NamedTuple):
+    key: str
+    html: Optional[str]   # None quando todas as tentativas falharam
+    error: Optional[str]
+    attempts: int
+
+
+def clean_section(text: str) -> str:
+    return _FENCE.sub("", (text or "").strip()).strip()
+
+
+async def generate_sections(
+    generate: Callable[[str], Awaitable[str]],
+    prompts: Dict[str, str],
+    concurrency: int = SECTION_CONCURRENCY,
+    retries: int = SECTION_RETRIES,
+) -> AsyncIterator[SectionResult]:
+    """
+    Gera {seção: prompt} em paralelo e devolve cada SectionResult na ordem
+    em que terminam. generate(prompt) -> texto (ex.: ai_gateway.generate).
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(key: str, prompt: str) -> SectionResult:
+        error = None
+        for attempt in range(1, retries + 2):
+            if attempt > 1:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 2))
+            try:
+                async with semaphore:
+                    html = clean_section(await asyncio.wait_for(generate(prompt), SECTION_TIMEOUT))
+                if html:
+                    return SectionResult(key, html, None, attempt)
+                error = "Resposta vazia da IA"
+            except asyncio.TimeoutError:
+                error = "Tempo esgotado gerando a seção"
+            except HTTPException as e:
+                error = e.detail
+            except Exception as e:
+                error = str(e) or type(e).__name__
+        return SectionResult(key, None, error, retries + 1)
+
+    tasks = [asyncio.create_task(run(key, prompt)) for key, prompt in prompts.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            yield await finished
+    finally:
+        # Cliente desconectou no meio do stream: não deixa seções gerando à toa
+        for task in tasks:
+            task.cancel()
@@ -1,44 +1,20 @@
 """
 Prompt estruturado para geração de relatório astrológico completo
 Seguindo as 9 seções definidas pela usuária
-"""
 
-def get_report_prompt(name: str, map_data: dict, question: str = None) -> str:
-    """
-    Gera o prompt estruturado para a IA criar análise completa
-    
-    Args:
-        name: Nome do cliente
-        map_data: Dados do mapa astral calculado
-        question: Pergunta opcional do usuário
-    
-    Returns:
-        String com prompt completo
-    """
-    
-    question_section = ""
-    if question:
-        question_section = f"""
-        
-9. RESPOSTA À PERGUNTA DO CLIENTE:
-   Pergunta: "{question}"
-   
-   Responda à pergunta do cliente de forma profunda, conectando com TODA a análise do mapa astral.
-   Use os insights das seções anteriores para dar uma resposta completa e personalizada.
-   Seja específico e prático nas orientações.
+get_report_prompt monta o relatório inteiro num prompt só. get_section_prompt
+monta um prompt menor para uma seção, só com os dados do mapa que ela usa, e
+é o que o report_pipeline usa para gerar as seções em paralelo.
 """
-    
-    prompt = f"""
-Você é um astrólogo profissional especializado em análises profundas de mapas astrais.
 
-Crie uma análise astrológica COMPLETA e PROFUNDA para {name}, seguindo EXATAMENTE esta estrutura:
-
-DADOS DO MAPA NATAL:
-{json.dumps(map_data, ensure_ascii=False, indent=2)}
+import json
 
-ESTRUTURA DA ANÁLISE (siga rigorosamente):
+# Aumentar quando o prompt mudar: faz parte da chave do cache de relatórios
+REPORT_PROMPT_VERSION = "2"
 
-1. VISÃO GERAL:
+# Instruções de cada seção, na ordem do relatório
+REPORT_SECTIONS = {
+    "visao_geral": """1. VISÃO GERAL:
    
    a) Elemento Predominante:
    - Analise a soma dos planetas por elemento (Fogo, Terra, Ar, Água)
@@ -49,9 +25,9 @@ ESTRUTURA DA ANÁLISE (siga rigorosamente):
    b) Quadruplicidade:
    - Analise Cardinais, Fixos e Mutáveis
    - Destaque padrões de ação
-   - Sugestões para equilibrar desafios
+   - Sugestões para equilibrar desafios""",
 
-2. ANÁLISE DA TRÍADE PRINCIPAL:
+    "triade_principal": """2. ANÁLISE DA TRÍADE PRINCIPAL:
    
    Analise DE FORMA PROFUNDA:
    - Sol (signo, casa, aspectos) - Essência, propósito, vitalidade
@@ -68,17 +44,17 @@ ESTRUTURA DA ANÁLISE (siga rigorosamente):
    Para cada um, apresente:
    - LUZ (potenciais, dons)
    - SOMBRA (desafios, bloqueios)
-   - Orientações práticas de integração
+   - Orientações práticas de integração""",
 
-3. PLANETAS PESSOAIS:
+    "planetas_pessoais": """3. PLANETAS PESSOAIS:
    
    Analise DE FORMA PROFUNDA Mercúrio, Vênus e Marte:
    - Signo, casa e aspectos de cada um
    - Como a energia se manifesta
    - LUZ e SOMBRA
-   - Orientações práticas levando em consideração o mapa completo
+   - Orientações práticas levando em consideração o mapa completo""",
 
-4. JÚPITER E SATURNO:
+    "jupiter_saturno": """4. JÚPITER E SATURNO:
    
    Analise DE FORMA PROFUNDA:
    - Saturno: Lições importantes de vida, estrutura, responsabilidade
@@ -87,16 +63,16 @@ ESTRUTURA DA ANÁLISE (siga rigorosamente):
    Para cada um:
    - Energia manifestada
    - LUZ e SOMBRA
-   - Sugestões práticas
+   - Sugestões práticas""",
 
-5. O MEIO-CÉU: O CHAMADO VOCACIONAL:
+    "meio_ceu": """5. O MEIO-CÉU: O CHAMADO VOCACIONAL:
    
    - Analise signo do Meio-Céu, regente e aspectos
    - Destaque missão e propósito social
    - LUZ e SOMBRA
-   - Possíveis caminhos profissionais
+   - Possíveis caminhos profissionais""",
 
-6. CASAS ASTROLÓGICAS: CAMINHO DE MANIFESTAÇÃO:
+    "casas": """6. CASAS ASTROLÓGICAS: CAMINHO DE MANIFESTAÇÃO:
    
    Para CADA casa, explique:
    - A essência e propósito do setor
@@ -135,9 +111,9 @@ ESTRUTURA DA ANÁLISE (siga rigorosamente):
    - Bloqueio: Repressão emocional e fuga
    
    IMPORTANTE: Coloque textos LONGOS e explique DE FORMA PROFUNDA qual energia está presente.
-   Por exemplo, se for casa com signo de fogo, explique como ativar o fogo para mover aquele setor.
+   Por exemplo, se for casa com signo de fogo, explique como ativar o fogo para mover aquele setor.""",
 
-7. PRINCIPAIS ASPECTOS:
+    "aspectos": """7. PRINCIPAIS ASPECTOS:
    
    Analise DE FORMA PROFUNDA os principais aspectos:
    - Conjunções
@@ -147,18 +123,47 @@ ESTRUTURA DA ANÁLISE (siga rigorosamente):
    - Sextis
    
    Veja os aspectos entre TODOS os planetas.
-   Explique o impacto de cada aspecto importante.
+   Explique o impacto de cada aspecto importante.""",
 
-8. PONTOS KÁRMICOS:
+    "pontos_karmicos": """8. PONTOS KÁRMICOS:
    
    Analise:
    - Nodos Lunares (Norte e Sul): Lições evolutivas
    - Quíron: Ferida primordial e cura
    - Lilith: Aspectos reprimidos e poder feminino
    
-   Explique o impacto e proponha estratégias de integração.
-{question_section}
+   Explique o impacto e proponha estratégias de integração.""",
+}
+
+# Seção opcional, só quando há pergunta
+QUESTION_SECTION = "resposta_pergunta"
 
+# Títulos para exibição (eventos do /generate-report/stream)
+SECTION_TITLES = {
+    "visao_geral": "Visão Geral",
+    "triade_principal": "Tríade Principal",
+    "planetas_pessoais": "Planetas Pessoais",
+    "jupiter_saturno": "Júpiter e Saturno",
+    "meio_ceu": "Meio-Céu",
+    "casas": "Casas Astrológicas",
+    "aspectos": "Principais Aspectos",
+    "pontos_karmicos": "Pontos Kármicos",
+    QUESTION_SECTION: "Resposta à Pergunta",
+}
+
+# Partes do mapa que cada seção usa (a resposta à pergunta recebe o mapa inteiro)
+SECTION_DATA = {
+    "visao_geral": ("positions", "elements", "quadruplicities"),
+    "triade_principal": ("positions", "aspects", "elements"),
+    "planetas_pessoais": ("positions", "aspects"),
+    "jupiter_saturno": ("positions", "aspects"),
+    "meio_ceu": ("positions", "houses", "aspects"),
+    "casas": ("positions", "houses"),
+    "aspectos": ("positions", "aspects"),
+    "pontos_karmicos": ("positions", "aspects"),
+}
+
+REPORT_FORMAT = """
 FORMATO DA RESPOSTA:
 - Use HTML para formatação (h2, h3, p, strong, ul, li)
 - Seja EXTREMAMENTE DETALHADO em cada seção
@@ -173,8 +178,82 @@ IMPORTANTE:
 - Seja PROFUNDO e DETALHADO
 - Cada seção deve ter NO MÍNIMO 3-4 parágrafos longos
 """
+
+
+def question_prompt(question: str) -> str:
+    return f"""
+        
+9. RESPOSTA À PERGUNTA DO CLIENTE:
+   Pergunta: "{question}"
+   
+   Responda à pergunta do cliente de forma profunda, conectando com TODA a análise do mapa astral.
+   Use os insights das seções anteriores para dar uma resposta completa e personalizada.
+   Seja específico e prático nas orientações.
+"""
+
+
+def report_section_keys(question: str = None) -> list:
+    """Seções do relatório, na ordem (com a resposta à pergunta se houver)."""
+    return list(REPORT_SECTIONS) + ([QUESTION_SECTION] if question else [])
+
+
+def get_report_prompt(name: str, map_data: dict, question: str = None) -> str:
+    """
+    Gera o prompt estruturado para a IA criar análise completa
+    
+    Args:
+        name: Nome do cliente
+        map_data: Dados do mapa astral calculado
+        question: Pergunta opcional do usuário
+    
+    Returns:
+        String com prompt completo
+    """
+    
+    question_section = question_prompt(question) if question else ""
+    sections = "\n\n".join(REPORT_SECTIONS.values())
+    
+    prompt = f"""
+Você é um astrólogo profissional especializado em análises profundas de mapas astrais.
+
+Crie uma análise astrológica COMPLETA e PROFUNDA para {name}, seguindo EXATAMENTE esta estrutura:
+
+DADOS DO MAPA NATAL:
+{json.dumps(map_data, ensure_ascii=False, indent=2)}
+
+ESTRUTURA DA ANÁLISE (siga rigorosamente):
+
+{sections}
+{question_section}
+{REPORT_FORMAT}"""
     
     return prompt
 
 
-import json
+def get_section_prompt(name: str, map_data: dict, section: str, question: str = None) -> str:
+    """
+    Prompt de uma única seção do relatório (mesmas instruções e formato do
+    prompt completo), com apenas as partes do mapa que a seção usa.
+    """
+    if section == QUESTION_SECTION:
+        instructions = question_prompt(question).strip("\n ")
+        data = map_data
+    else:
+        instructions = REPORT_SECTIONS[section]
+        data = {k: map_data[k] for k in SECTION_DATA[section] if k in map_data}
+    
+    return f"""
+Você é um astrólogo profissional especializado em análises profundas de mapas astrais.
+
+Esta é UMA seção de uma análise astrológica COMPLETA e PROFUNDA para {name}.
+As outras seções são escritas separadamente: escreva SOMENTE esta, sem repetir
+o título e sem introdução ou conclusão sobre o relatório como um todo.
+
+DADOS DO MAPA NATAL:
+{json.dumps(data, ensure_ascii=False, indent=2)}
+
+SEÇÃO:
+
+{instructions}
+
+{REPORT_FORMAT}"""
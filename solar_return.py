@@ -0,0 +1,45 @@
+# solar_return.py - Revolução Solar
+
+"""
+Instante exato da Revolução Solar (Sol de volta à longitude natal).
+
+O Sol nunca fica retrógrado e volta à mesma longitude perto do aniversário
+(±2 dias), então cada ano é um colchete curto resolvido com o buscador de
+events.py: ~10 chamadas ao Swiss Ephemeris por ano. Um único BodyTrack é
+reaproveitado para todos os anos do lote.
+"""
+
+from typing import List, Optional, Sequence
+
+import swisseph as swe
+
+from events import BodyTrack, next_event
+
+# Janela em volta do aniversário onde a revolução sempre cai
+SEARCH_BEFORE_DAYS = 3
+SEARCH_AFTER_DAYS = 4
+
+MAX_YEARS = 100
+
+
+def natal_sun_longitude(natal_jd: float) -> float:
+    pos, _ = swe.calc_ut(natal_jd, swe.SUN, swe.FLG_SWIEPH)
+    return pos[0]
+
+
+def solar_return_jds(natal_jd: float, years: Sequence[int], track: Optional[BodyTrack] = None) -> List[float]:
+    """JD (UT) da Revolução Solar de cada ano, na ordem recebida (ValueError se algum não for encontrado)."""
+    track = track or BodyTrack(swe.SUN)
+    target = [natal_sun_longitude(natal_jd)]
+    _, month, day, hour = swe.revjul(natal_jd)
+    jds = []
+    for year in years:
+        # 29/02 em ano não bissexto vira 01/03 no julday, ainda dentro da janela
+        birthday = swe.julday(year, month, day, hour)
+        event = next_event(track, target, birthday - SEARCH_BEFORE_DAYS, birthday + SEARCH_AFTER_DAYS)
+        if event is None:
+            event = next_event(track, target, birthday - 366, birthday + 366)
+        if event is None:
+            raise ValueError(f"Revolução solar não encontrada para {year}")
+        jds.append(event.jd)
+    return jds
@@ -0,0 +1,247 @@
+# station_index.py - Índice de Estações e Ingressos
+
+"""
+Índice pré-calculado de estações (retrógrada e direta) e ingressos em signo
+de todos os corpos de PLANETS_SWEPH num intervalo de anos (padrão 1900-2100).
+
+Construção (uma vez, offline):
+- Ingressos: buscador de events.py (colchete por velocidade + Brent) com o
+  início dos 12 signos como alvos.
+- Estações: a velocidade é amostrada num passo menor que o menor intervalo
+  entre duas estações do corpo e cada troca de sinal é refinada com Brent
+  sobre a velocidade.
+
+Armazenamento: um único array estruturado (jd, longitude, velocidade, corpo,
+tipo, signo), ordenado por (corpo, tipo, jd) e salvo em .npy ao lado das
+tabelas de efemérides. Cada (corpo, tipo) é um trecho contíguo; os offsets
+saem de um searchsorted na carga e as consultas por período são busca
+binária no trecho (microssegundos, sem Swiss Ephemeris).
+
+Uso:
+    python station_index.py build [ano_inicial] [ano_final]
+"""
+
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+import json
+import os
+import sys
+
+import numpy as np
+import swisseph as swe
+
+from chart_core import PLANETS_SWEPH, zodiac_signs
+from ephemeris_setup import ephemeris_fingerprint, init_ephemeris
+from ephemeris_tables import (
+    DEFAULT_END_YEAR, DEFAULT_START_YEAR, EPHEMERIS_TABLE_DIR, datetime_to_jd, jd_to_datetime
+)
+from events import BodyTrack, brent, find_events, ingress_targets
+
+STATION_INDEX_FILE = "station_index.npy"
+STATION_META_FILE = "station_index.json"
+
+INGRESS = 0
+STATION_RETROGRADE = 1
+STATION_DIRECT = 2
+KINDS = 3
+
+RECORD_DTYPE = np.dtype([
+    ("jd", "f8"),
+    ("longitude", "f4"),
+    ("speed", "f4"),
+    ("body", "i1"),   # posição em PLANETS_SWEPH
+    ("kind", "i1"),   # INGRESS / STATION_RETROGRADE / STATION_DIRECT
+    ("sign", "i1"),   # signo em que o corpo entra (ingresso) ou onde estaciona
+])
+
+BODIES = list(PLANETS_SWEPH)
+
+# Passo da amostragem de velocidade (dias), menor que o menor intervalo entre estações
+STATION_STEP = {
+    swe.TRUE_NODE: 0.05,  # o Nodo verdadeiro oscila e chega a estacionar duas vezes no mesmo dia
+}
+DEFAULT_STATION_STEP = 1.0
+
+# Corpos que nunca ficam estacionários
+NO_STATIONS = {swe.SUN, swe.MOON, swe.MEAN_APOG}
+
+
+class Station(NamedTuple):
+    jd: float
+    longitude: float
+    kind: int
+
+
+class RetrogradePeriod(NamedTuple):
+    body: str
+    start: float           # estação retrógrada (JD)
+    end: Optional[float]   # estação direta (None se fora do índice)
+    start_longitude: float
+    end_longitude: Optional[float]
+
+
+def find_stations(code: int, jd_start: float, jd_end: float) -> List[Station]:
+    """Estações de um corpo: trocas de sinal da velocidade, refinadas com Brent."""
+    if code in NO_STATIONS:
+        return []
+    track = BodyTrack(code)
+    step = STATION_STEP.get(code, DEFAULT_STATION_STEP)
+    stations = []
+    t, (_, speed) = jd_start, track.position(jd_start)
+    while t < jd_end:
+        t2 = min(t + step, jd_end)
+        _, speed2 = track.position(t2)
+        if (speed < 0) != (speed2 < 0):
+            jd = brent(lambda x: track.position(x)[1], t, t2, speed, speed2)
+            lon, _ = track.position(jd)
+            stations.append(Station(jd, lon, STATION_RETROGRADE if speed2 < 0 else STATION_DIRECT))
+        t, speed = t2, speed2
+    return stations
+
+
+def build_records(code: int, body: int, jd_start: float, jd_end: float) -> np.ndarray:
+    """Ingressos e estações de um corpo no intervalo."""
+    targets = ingress_targets()
+    events, _ = find_events(code, list(targets.values()), jd_start, count=sys.maxsize, jd_limit=jd_end)
+    stations = find_stations(code, jd_start, jd_end)
+    records = np.empty(len(events) + len(stations), dtype=RECORD_DTYPE)
+    for n, e in enumerate(events):
+        # Ingresso retrógrado entra no signo anterior à cúspide cruzada
+        sign = int(round(e.target / 30.0)) % 12
+        records[n] = (e.jd, e.longitude, e.speed, body, INGRESS, sign if e.speed >= 0 else (sign - 1) % 12)
+    for n, s in enumerate(stations, start=len(events)):
+        records[n] = (s.jd, s.longitude, 0.0, body, s.kind, int(s.longitude // 30) % 12)
+    return records
+
+
+def build_index(start_year: int = DEFAULT_START_YEAR, end_year: int = DEFAULT_END_YEAR,
+                out_dir: str = EPHEMERIS_TABLE_DIR) -> dict:
+    """Calcula o índice de todos os corpos e salva em out_dir."""
+    init_ephemeris()
+    os.makedirs(out_dir, exist_ok=True)
+    jd_start = swe.julday(start_year, 1, 1, 0.0)
+    jd_end = swe.julday(end_year + 1, 1, 1, 0.0)
+    records = np.concatenate([
+        build_records(code, body, jd_start, jd_end)
+        for body, code in enumerate(PLANETS_SWEPH.values())
+    ])
+    records = records[np.lexsort((records["jd"], records["kind"], records["body"]))]
+    np.save(os.path.join(out_dir, STATION_INDEX_FILE), records)
+    meta = {
+        "bodies": BODIES,
+        "jd_start": jd_start, "jd_end": jd_end,
+        "ephemeris": ephemeris_fingerprint(),
+    }
+    with open(os.path.join(out_dir, STATION_META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    return {"records": len(records), "bodies": len(BODIES)}
+
+
+class StationIndex:
+    """Índice carregado do disco (mmap), com offsets por (corpo, tipo)."""
+
+    def __init__(self, directory: str):
+        with open(os.path.join(directory, STATION_META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.bodies = self.meta["bodies"]
+        self.records = np.load(os.path.join(directory, STATION_INDEX_FILE), mmap_mode="r")
+        # Colunas contíguas para a busca binária
+        self.jd = np.ascontiguousarray(self.records["jd"])
+        self.sign = np.ascontiguousarray(self.records["sign"])
+        group = self.records["body"].astype(np.int64) * KINDS + self.records["kind"]
+        self.offsets = np.searchsorted(group, np.arange(len(self.bodies) * KINDS + 1))
+
+    @classmethod
+    def open(cls, directory: str = EPHEMERIS_TABLE_DIR) -> Optional["StationIndex"]:
+        if not os.path.exists(os.path.join(directory, STATION_META_FILE)):
+            return None
+        return cls(directory)
+
+    def covers(self, jd_start: float, jd_end: float) -> bool:
+        return self.meta["jd_start"] <= jd_start and jd_end <= self.meta["jd_end"]
+
+    def _group(self, body: str, kind: int, jd_start: float = -np.inf, jd_end: float = np.inf):
+        """(início, fim) no array dos registros do corpo/tipo com jd em [jd_start, jd_end)."""
+        g = self.bodies.index(body) * KINDS + kind
+        lo, hi = int(self.offsets[g]), int(self.offsets[g + 1])
+        jd = self.jd[lo:hi]
+        return lo + int(np.searchsorted(jd, jd_start)), lo + int(np.searchsorted(jd, jd_end))
+
+    def ingresses(self, body: str, jd_start: float = -np.inf, jd_end: float = np.inf,
+                  sign: Optional[str] = None) -> np.ndarray:
+        """Ingressos do corpo no período (opcionalmente só num signo)."""
+        lo, hi = self._group(body, INGRESS, jd_start, jd_end)
+        if sign is None:
+            return self.records[lo:hi]
+        return self.records[lo:hi][self.sign[lo:hi] == zodiac_signs.index(sign)]
+
+    def stations(self, body: str, jd_start: float = -np.inf, jd_end: float = np.inf) -> np.ndarray:
+        """Estações (retrógradas e diretas) do corpo no período, em ordem de jd."""
+        parts = [self.records[slice(*self._group(body, kind, jd_start, jd_end))]
+                 for kind in (STATION_RETROGRADE, STATION_DIRECT)]
+        merged = np.concatenate(parts)
+        return merged[np.argsort(merged["jd"], kind="stable")]
+
+    def retrograde_periods(self, body: str, jd_start: float = -np.inf,
+                           jd_end: float = np.inf) -> List[RetrogradePeriod]:
+        """Períodos retrógrados que se sobrepõem a [jd_start, jd_end)."""
+        r_lo, r_hi = self._group(body, STATION_RETROGRADE)
+        d_lo, d_hi = self._group(body, STATION_DIRECT)
+        retro, direct = self.jd[r_lo:r_hi], self.jd[d_lo:d_hi]
+        # Primeiro período: o que termina na primeira estação direta >= jd_start (ou o último, ainda aberto)
+        first_direct = int(np.searchsorted(direct, jd_start))
+        if first_direct < len(direct):
+            first = max(int(np.searchsorted(retro, direct[first_direct])) - 1, 0)
+        elif len(retro) and (not len(direct) or retro[-1] > direct[-1]):
+            first = len(retro) - 1
+        else:
+            first = len(retro)
+        last = int(np.searchsorted(retro, jd_end))
+        periods = []
+        for n, k in zip(range(first, last), np.searchsorted(direct, retro[first:last]).tolist()):
+            end = float(direct[k]) if k < len(direct) else None
+            if end is not None and end < jd_start:
+                continue
+            periods.append(RetrogradePeriod(
+                body, float(retro[n]), end,
+                float(self.records[r_lo + n]["longitude"]),
+                float(self.records[d_lo + k]["longitude"]) if end is not None else None,
+            ))
+        return periods
+
+    def stats(self) -> dict:
+        return {
+            "from": jd_to_datetime(self.meta["jd_start"]).date().isoformat(),
+            "to": jd_to_datetime(self.meta["jd_end"]).date().isoformat(),
+            "records": len(self.records),
+            "stale": self.meta.get("ephemeris") != ephemeris_fingerprint(),
+        }
+
+
+_index = None
+_index_loaded = False
+
+
+def get_station_index() -> Optional[StationIndex]:
+    """Índice compartilhado pelo processo (None se ainda não foi gerado)."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        _index = StationIndex.open(EPHEMERIS_TABLE_DIR)
+        _index_loaded = True
+    return _index
+
+
+def year_range(year: int):
+    """(jd início, jd fim) de um ano civil em UTC."""
+    return datetime_to_jd(datetime(year, 1, 1)), datetime_to_jd(datetime(year + 1, 1, 1))
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if not args or args[0] != "build":
+        print("Uso: python station_index.py build [ano_inicial] [ano_final]")
+        sys.exit(1)
+    start = int(args[1]) if len(args) > 1 else DEFAULT_START_YEAR
+    end = int(args[2]) if len(args) > 2 else DEFAULT_END_YEAR
+    info = build_index(start, end)
+    print(f"✅ {info['records']} estações/ingressos de {info['bodies']} corpos em {EPHEMERIS_TABLE_DIR}")
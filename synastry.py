@@ -0,0 +1,68 @@
+# synastry.py - Sinastria (comparação entre mapas)
+
+"""
+Aspectos entre dois mapas e sobreposição de casas.
+
+Os aspectos cruzados saem de uma única matriz de distâncias (corpos de A x
+corpos de B x aspectos), sem laço por par. Para uma pessoa contra vários
+parceiros, as longitudes dos parceiros são empilhadas (P x N) e a matriz
+vira (P x N x N) numa só operação.
+
+A sobreposição de casas (planeta de A na casa de B e vice-versa) usa a
+HouseTable de cada mapa (houses.py), com as mesmas regras do mapa natal:
+orbe de transição para planetas e ângulos, casa nominal para os Nodos.
+"""
+
+from typing import List, NamedTuple, Sequence
+
+import numpy as np
+
+from aspects import DEFAULT_TABLE, AspectHit, AspectTable, angular_distance, aspect_mask
+from chart_core import ChartArrays
+from houses import HouseTable, assign_houses_batch
+
+
+class SynastryResult(NamedTuple):
+    aspects: List[AspectHit]   # i = corpo da pessoa, j = corpo do parceiro
+    person_in_partner: np.ndarray  # casa do parceiro onde cai cada corpo da pessoa
+    partner_in_person: np.ndarray  # casa da pessoa onde cai cada corpo do parceiro
+
+
+def _orb_mask(bodies: Sequence[str]) -> np.ndarray:
+    return np.array([b not in ("NóduloNorte", "NóduloSul") for b in bodies])
+
+
+def cross_aspects(person: ChartArrays, partners: Sequence[ChartArrays], table: AspectTable = DEFAULT_TABLE):
+    """
+    Aspectos entre a pessoa e cada parceiro numa só matriz.
+    Retorna arrays paralelos (parceiro, i, j, aspecto, ângulo, orbe).
+    """
+    lon_b = np.stack([p.longitude for p in partners])          # (P, N)
+    dist = angular_distance(person.longitude[None, :], lon_b)  # (P, N, N)
+    mask = aspect_mask(dist, table.orb_matrix(person.bodies, partners[0].bodies), table)
+    p, i, j, k = np.nonzero(mask)
+    angle = dist[p, i, j]
+    return p, i, j, k, angle, np.abs(angle - table.angles[k])
+
+
+def synastry(person: ChartArrays, partners: Sequence[ChartArrays],
+             table: AspectTable = DEFAULT_TABLE) -> List[SynastryResult]:
+    """Sinastria da pessoa com cada parceiro (mesma ordem de `partners`)."""
+    p, i, j, k, angle, orb = cross_aspects(person, partners, table)
+    names = table.names
+    hits = [[] for _ in partners]
+    for pp, ii, jj, kk, a, o in zip(p.tolist(), i.tolist(), j.tolist(), k.tolist(), angle.tolist(), orb.tolist()):
+        hits[pp].append(AspectHit(ii, jj, names[kk], round(a, 2), round(o, 2)))
+
+    # Pessoa nas casas de cada parceiro (lote) e parceiros nas casas da pessoa (uma tabela)
+    lon_b = np.stack([c.longitude for c in partners])
+    person_in_partner = assign_houses_batch(
+        np.stack([c.cusps for c in partners]),
+        np.broadcast_to(person.longitude, lon_b.shape),
+        orb=_orb_mask(person.bodies)
+    )
+    partner_in_person = HouseTable(person.cusps).houses(lon_b, orb=_orb_mask(partners[0].bodies))
+    return [
+        SynastryResult(hits[n], person_in_partner[n], partner_in_person[n])
+        for n in range(len(partners))
+    ]
@@ -0,0 +1,135 @@
+"""
+Tabela de casas (houses.py) contra a varredura linear original.
+
+find_house_with_orb / find_house_nominal são as funções que o chart_core
+usava antes da busca binária e ficam aqui como referência. Cúspides reais
+(swe.houses em datas/latitudes aleatórias) e sintéticas, longitudes
+aleatórias, exatamente nas cúspides, nos limites do orbe e em 0°/360°:
+HouseTable.house, HouseTable.houses e assign_houses_batch precisam bater
+em todos os casos.
+
+    python -m pytest -q test_houses.py
+"""
+
+from typing import List
+import random
+
+import numpy as np
+import pytest
+import swisseph as swe
+
+from chart_core import CHART_BODIES, HOUSE_ORB_MASK, compute_chart
+from ephemeris_setup import init_ephemeris
+from houses import HouseTable, assign_houses_batch
+
+N_CHARTS = 2000
+N_BODIES = 16
+
+
+# ========= Referência (varredura linear) =========
+
+def find_house_with_orb(planet_long: float, houses: List[float]) -> int:
+    for i in range(12):
+        cusp_start = houses[i]
+        cusp_end = houses[(i + 1) % 12]
+        if cusp_start <= cusp_end:
+            if cusp_start <= planet_long < cusp_end:
+                nominal_house = i + 1
+                dist_next = cusp_end - planet_long
+                next_house_id = ((i + 1) % 12) + 1
+                orb = 8 if next_house_id in [1, 10] else 6
+                if dist_next <= orb:
+                    return next_house_id
+                return nominal_house
+        else:
+            if planet_long >= cusp_start or planet_long < cusp_end:
+                nominal_house = i + 1
+                if planet_long >= cusp_start:
+                    dist_next = (cusp_end + 360) - planet_long if cusp_end < planet_long else 0
+                else:
+                    dist_next = cusp_end - planet_long
+                next_house_id = ((i + 1) % 12) + 1
+                orb = 8 if next_house_id in [1, 10] else 6
+                if 0 < dist_next <= orb:
+                    return next_house_id
+                return nominal_house
+    return 1
+
+def find_house_nominal(planet_long: float, houses: List[float]) -> int:
+    for i in range(12):
+        cusp_start = houses[i]
+        cusp_end = houses[(i + 1) % 12]
+        if cusp_start <= cusp_end:
+            if cusp_start <= planet_long < cusp_end:
+                return i + 1
+        else:
+            if planet_long >= cusp_start or planet_long < cusp_end:
+                return i + 1
+    return 1
+
+
+# ========= Casos =========
+
+def random_cusps(rng):
+    """Metade de swe.houses (Placidus, |lat| < 60), metade sintética (divisão irregular do círculo)."""
+    if rng.random() < 0.5:
+        jd = rng.uniform(2415020.5, 2488069.5)  # 1900-2100
+        cusps, _ = swe.houses(jd, rng.uniform(-60, 60), rng.uniform(-180, 180), b"P")
+        return list(cusps)
+    sizes = [rng.uniform(5, 55) for _ in range(12)]
+    scale = 360 / sum(sizes)
+    start = rng.uniform(0, 360)
+    cusps, acc = [], start
+    for size in sizes:
+        cusps.append(acc % 360)
+        acc += size * scale
+    return cusps
+
+
+def tricky_longitudes(rng, cusps):
+    """Longitudes aleatórias + casos de borda (na cúspide, no limite do orbe, perto de 0°)."""
+    values = [rng.uniform(0, 360) for _ in range(N_BODIES)]
+    for c in cusps:
+        values += [c, (c - 6) % 360, (c - 8) % 360, (c - 6.000001) % 360, (c + 1e-9) % 360]
+    values += [0.0, 359.999999, round(rng.uniform(0, 360), 2)]
+    return values
+
+
+@pytest.fixture(scope="module")
+def cases():
+    init_ephemeris()
+    rng = random.Random(7)
+    return [(cusps, tricky_longitudes(rng, cusps)) for cusps in (random_cusps(rng) for _ in range(N_CHARTS))]
+
+
+# ========= Testes =========
+
+def test_house_matches_linear_scan(cases):
+    for cusps, longitudes in cases:
+        table = HouseTable(cusps)
+        assert [table.house(x, orb=False) for x in longitudes] == [find_house_nominal(x, cusps) for x in longitudes], cusps
+        assert [table.house(x) for x in longitudes] == [find_house_with_orb(x, cusps) for x in longitudes], cusps
+
+
+def test_houses_matches_linear_scan(cases):
+    for cusps, longitudes in cases:
+        table = HouseTable(cusps)
+        assert table.houses(longitudes, orb=False).tolist() == [find_house_nominal(x, cusps) for x in longitudes], cusps
+        assert table.houses(longitudes).tolist() == [find_house_with_orb(x, cusps) for x in longitudes], cusps
+
+
+def test_batch_matches_linear_scan(cases):
+    for cusps, longitudes in cases:
+        batch = assign_houses_batch(np.array([cusps]), np.array([longitudes]))
+        assert batch[0].tolist() == [find_house_with_orb(x, cusps) for x in longitudes], cusps
+
+
+def test_compute_chart_houses(cases):
+    """Nodos na casa nominal, demais corpos com orbe de transição."""
+    rng = random.Random(11)
+    for _ in range(200):
+        chart = compute_chart(rng.uniform(2415020.5, 2488069.5), rng.uniform(-60, 60), rng.uniform(-180, 180))
+        cusps = list(chart.cusps)
+        for body, lon, house, orb in zip(CHART_BODIES, chart.longitude.tolist(), chart.house.tolist(), HOUSE_ORB_MASK.tolist()):
+            expected = find_house_with_orb(lon, cusps) if orb else find_house_nominal(lon, cusps)
+            assert house == expected, (body, lon, cusps)
@@ -0,0 +1,61 @@
+"""
+Trânsitos das tabelas contra uma varredura de força bruta no Swiss Ephemeris.
+
+Com orbe pequeno, Mercúrio e Vênus (e a Lua, na tabela horária) atravessam o
+orbe inteiro entre duas amostras; todo aspecto exato da força bruta precisa aparecer.
+
+    python -m pytest -q test_transits.py
+"""
+
+import numpy as np
+import pytest
+import swisseph as swe
+
+from chart_core import PLANETS_SWEPH
+from ephemeris_tables import EphemerisTables, build_tables, wrap180
+from transits import find_transits, sensitive_points, transit_table
+
+NATAL_BODIES = ["Sol", "Lua", "Mercúrio", "Vênus", "Marte", "Júpiter", "Saturno"]
+NATAL_LON = [12.3, 101.7, 355.2, 48.9, 211.4, 164.0, 290.6]
+
+JD_START = swe.julday(2024, 1, 1, 0.0)
+JD_END = swe.julday(2026, 1, 1, 0.0)
+BRUTE_STEP = 1.0 / 48  # 30 minutos
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    out_dir = str(tmp_path_factory.mktemp("ephemeris_tables"))
+    build_tables(2023, 2026, out_dir)
+    return EphemerisTables(out_dir)
+
+
+def brute_force_exact(body: str, table):
+    """(alvo, JD) de cada troca de sinal amostrada a cada 30 minutos."""
+    targets, _, _, _ = sensitive_points(NATAL_LON, table)
+    jds = np.arange(JD_START, JD_END, BRUTE_STEP)
+    lon = np.array([swe.calc_ut(jd, PLANETS_SWEPH[body], swe.FLG_SWIEPH)[0][0] for jd in jds.tolist()])
+    d = wrap180(lon[:, None] - targets)
+    a, b = d[:-1], d[1:]
+    n, t = np.nonzero(((a < 0) != (b < 0)) & (np.abs(a) < 90) & (np.abs(b) < 90))
+    return list(zip(t.tolist(), jds[n].tolist()))
+
+
+@pytest.mark.parametrize("body", ["Lua", "Mercúrio", "Vênus"])
+@pytest.mark.parametrize("orb", [1.0, 0.5, 0.1])
+def test_small_orb_keeps_every_exact_hit(tables, body, orb):
+    table = transit_table(orb)
+    targets, natal_idx, aspect_idx, _ = sensitive_points(NATAL_LON, table)
+    found = {}
+    for tr in find_transits(tables, NATAL_LON, NATAL_BODIES, JD_START, JD_END, table, [body]):
+        found.setdefault((tr.natal, tr.aspect), []).extend(tr.exact)
+        for jd in tr.exact:
+            assert tr.entry is None or tr.entry <= jd
+            assert tr.exit is None or jd <= tr.exit
+
+    missed = []
+    for col, jd in brute_force_exact(body, table):
+        key = (NATAL_BODIES[natal_idx[col]], table.names[aspect_idx[col]])
+        if not any(jd - BRUTE_STEP <= hit <= jd + 2 * BRUTE_STEP for hit in found.get(key, [])):
+            missed.append((key, jd))
+    assert not missed
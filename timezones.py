@@ -0,0 +1,116 @@
+# timezones.py - Resolução de Fuso Horário
+
+"""
+TimezoneFinder único por processo com cache na frente.
+
+- O finder é criado uma vez (opcionalmente com in_memory=True, que troca
+  memória por velocidade) em vez de a cada requisição.
+- Cache por coordenada arredondada (TIMEZONE_CACHE_PRECISION casas decimais;
+  2 casas ≈ 1 km, suficiente para fronteiras de fuso).
+- Cache por cidade do gazetteer, que já traz o fuso do GeoNames.
+"""
+
+from collections import OrderedDict
+from typing import Optional, Union
+import threading
+import os
+
+from timezonefinder import TimezoneFinder
+
+from gazetteer import City, get_gazetteer
+
+TIMEZONE_IN_MEMORY = os.environ.get("TIMEZONE_IN_MEMORY", "0") == "1"
+TIMEZONE_CACHE_PRECISION = int(os.environ.get("TIMEZONE_CACHE_PRECISION", "2"))
+TIMEZONE_CACHE_SIZE = int(os.environ.get("TIMEZONE_CACHE_SIZE", "65536"))
+
+
+class TimezoneResolver:
+    """
+    Resolve lat/lon (ou cidade do gazetteer) para nome de fuso IANA.
+    """
+
+    def __init__(self, in_memory: bool = TIMEZONE_IN_MEMORY,
+                 precision: int = TIMEZONE_CACHE_PRECISION,
+                 maxsize: int = TIMEZONE_CACHE_SIZE):
+        self.in_memory = in_memory
+        self.precision = precision
+        self.maxsize = maxsize
+        self._finder = None
+        self._by_coord = OrderedDict()
+        self._by_city = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def load(self) -> TimezoneFinder:
+        """Cria o TimezoneFinder (uma vez só); chamado na inicialização da API."""
+        # Sob lock: várias threads podem pedir ao mesmo tempo no primeiro uso
+        if self._finder is None:
+            with self._lock:
+                if self._finder is None:
+                    self._finder = TimezoneFinder(in_memory=self.in_memory)
+        return self._finder
+
+    @property
+    def finder(self) -> TimezoneFinder:
+        return self.load()
+
+    def _cached(self, cache: OrderedDict, key):
+        """(achou, fuso) no LRU, contando hit/miss sob o lock."""
+        with self._lock:
+            if key in cache:
+                cache.move_to_end(key)
+                self.hits += 1
+                return True, cache[key]
+            self.misses += 1
+            return False, None
+
+    def _store(self, cache: OrderedDict, key, tz: Optional[str]):
+        with self._lock:
+            cache[key] = tz
+            cache.move_to_end(key)
+            while len(cache) > self.maxsize:
+                cache.popitem(last=False)
+
+    def at(self, latitude: float, longitude: float) -> Optional[str]:
+        """Fuso para a coordenada (None se estiver fora de qualquer polígono)."""
+        key = (round(latitude, self.precision), round(longitude, self.precision))
+        found, tz = self._cached(self._by_coord, key)
+        if found:
+            return tz
+        tz = self.finder.timezone_at(lat=latitude, lng=longitude)
+        self._store(self._by_coord, key, tz)
+        return tz
+
+    def for_city(self, city: Union[City, int]) -> Optional[str]:
+        """
+        Fuso de uma cidade do gazetteer (coluna timezone do GeoNames).
+        Com o City em mãos o fuso já vem nele; só quem tem apenas o id paga
+        a tabela de ids do gazetteer (montada na primeira busca por id).
+        """
+        city_id = city if isinstance(city, int) else city.id
+        found, tz = self._cached(self._by_city, city_id)
+        if found:
+            return tz
+        if isinstance(city, int):
+            gaz = get_gazetteer()
+            city = gaz.by_id(city_id) if gaz is not None else None
+            if city is None:
+                return None
+        tz = city.timezone or self.at(city.lat, city.lon)
+        self._store(self._by_city, city_id, tz)
+        return tz
+
+    def stats(self) -> dict:
+        return {
+            "in_memory": self.in_memory,
+            "precision": self.precision,
+            "cached_coordinates": len(self._by_coord),
+            "cached_cities": len(self._by_city),
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Instância única usada pela API
+tz_resolver = TimezoneResolver()
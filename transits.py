@@ -0,0 +1,167 @@
+# transits.py - Motor de Trânsitos
+
+"""
+Trânsitos sobre um mapa natal a partir das tabelas pré-calculadas
+(ephemeris_tables.py), sem chamar o Swiss Ephemeris dia a dia.
+
+Para cada corpo em trânsito:
+1. Lê a janela de amostras da tabela (diária; horária para a Lua)
+2. Monta a matriz (amostras x alvos) da distância até cada ponto sensível
+   (longitude natal ± ângulo do aspecto), tudo de uma vez com NumPy
+3. Troca de sinal = aspecto exato; |distância| cruzando o orbe = entrada/saída
+   (ou as duas no mesmo intervalo, quando o corpo atravessa o orbe entre amostras)
+4. Refina cada cruzamento por bisseção sobre o Hermite cúbico da tabela
+
+Um trânsito retrógrado pode passar várias vezes pelo ponto exato dentro de
+uma mesma janela de orbe, por isso `exact` é uma lista.
+"""
+
+from typing import List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from aspects import MAJOR_ASPECTS, AspectTable
+from chart_core import PLANETS_SWEPH
+from ephemeris_tables import EphemerisSeries, EphemerisTables, get_ephemeris_tables, wrap180
+
+# Orbe padrão dos trânsitos (bem menor que o orbe natal)
+TRANSIT_ORB = 1.0
+
+# Iterações da bisseção: passo / 2**40 (< 1 ms mesmo no passo diário)
+REFINE_ITERATIONS = 40
+
+TRANSIT_BODIES = list(PLANETS_SWEPH)
+
+
+class Transit(NamedTuple):
+    transit: str
+    natal: str
+    aspect: str
+    entry: Optional[float]  # JD UT; None = já estava no orbe no início do período
+    exact: List[float]
+    exit: Optional[float]   # JD UT; None = ainda no orbe no fim do período
+
+
+def transit_table(orb: float = TRANSIT_ORB) -> AspectTable:
+    """Aspectos maiores com um orbe único para trânsitos."""
+    return AspectTable([a._replace(orb=orb) for a in MAJOR_ASPECTS])
+
+
+def sensitive_points(natal_lon: Sequence[float], table: AspectTable):
+    """
+    Pontos sensíveis do mapa natal: longitude ± ângulo de cada aspecto
+    (conjunção e oposição só têm um lado).
+    Retorna arrays paralelos (longitude alvo, corpo natal, aspecto, orbe).
+    """
+    natal_lon = np.asarray(natal_lon, dtype=np.float64)
+    targets, natal_idx, aspect_idx = [], [], []
+    for k, angle in enumerate(table.angles.tolist()):
+        sides = (1,) if angle % 180 == 0 else (1, -1)
+        for side in sides:
+            targets.append((natal_lon + side * angle) % 360.0)
+            natal_idx.append(np.arange(len(natal_lon)))
+            aspect_idx.append(np.full(len(natal_lon), k))
+    aspect_idx = np.concatenate(aspect_idx)
+    return np.concatenate(targets), np.concatenate(natal_idx), aspect_idx, table.orbs[aspect_idx]
+
+
+def refine_crossings(series: EphemerisSeries, column: Optional[int], index: np.ndarray,
+                     target: np.ndarray, level: np.ndarray,
+                     lo: Optional[np.ndarray] = None, hi: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Instante (JD) em que wrap180(longitude - target) == level dentro do
+    intervalo [index, index + 1] de cada cruzamento, por bisseção vetorizada.
+    lo/hi restringem a busca a uma fração do intervalo (padrão: 0..1).
+    """
+    lo = np.zeros(len(index)) if lo is None else np.asarray(lo, dtype=np.float64)
+    hi = np.ones(len(index)) if hi is None else np.asarray(hi, dtype=np.float64)
+    f_lo = wrap180(series.interval(index, lo, column)[0] - target) - level
+    for _ in range(REFINE_ITERATIONS):
+        mid = (lo + hi) / 2
+        f_mid = wrap180(series.interval(index, mid, column)[0] - target) - level
+        same = (f_mid < 0) == (f_lo < 0)
+        lo = np.where(same, mid, lo)
+        f_lo = np.where(same, f_mid, f_lo)
+        hi = np.where(same, hi, mid)
+    return series.jd(index) + (lo + hi) / 2 * series.step
+
+
+def _body_transits(tables: EphemerisTables, body: str, targets, natal_idx, aspect_idx, orbs,
+                   natal_bodies, table, jd_start, jd_end) -> List[Transit]:
+    series, column = tables.series(body)
+    first, lon, _ = series.window(jd_start, jd_end, column)
+    d = wrap180(np.asarray(lon, dtype=np.float64)[:, None] - targets)  # (amostras, alvos)
+    inside = np.abs(d) <= orbs
+    a, b = d[:-1], d[1:]
+
+    # Exato: troca de sinal longe de ±180 (onde wrap180 também "troca de sinal")
+    n_ex, t_ex = np.nonzero(((a < 0) != (b < 0)) & (np.abs(a) < 90) & (np.abs(b) < 90))
+    exact = refine_crossings(series, column, first + n_ex, targets[t_ex], np.zeros(len(n_ex)))
+
+    # Entrada/saída: |d| cruza o orbe; o nível é o orbe do lado da amostra de fora
+    n_in, t_in = np.nonzero(~inside[:-1] & inside[1:])
+    entry = refine_crossings(series, column, first + n_in, targets[t_in], np.sign(a[n_in, t_in]) * orbs[t_in])
+    n_out, t_out = np.nonzero(inside[:-1] & ~inside[1:])
+    exit_ = refine_crossings(series, column, first + n_out, targets[t_out], np.sign(b[n_out, t_out]) * orbs[t_out])
+
+    # Corpo rápido (ou orbe pequeno) que atravessa o orbe inteiro entre duas amostras:
+    # as duas ficam fora, então entrada e saída estão no mesmo intervalo, antes e depois do exato
+    through = ~inside[n_ex, t_ex] & ~inside[n_ex + 1, t_ex]
+    if through.any():
+        n_th, t_th = n_ex[through], t_ex[through]
+        index = first + n_th
+        frac = (exact[through] - series.jd(index)) / series.step
+        entry = np.concatenate([entry, refine_crossings(series, column, index, targets[t_th],
+                                                        np.sign(a[n_th, t_th]) * orbs[t_th], hi=frac)])
+        exit_ = np.concatenate([exit_, refine_crossings(series, column, index, targets[t_th],
+                                                        np.sign(b[n_th, t_th]) * orbs[t_th], lo=frac)])
+        t_in = np.concatenate([t_in, t_th])
+        t_out = np.concatenate([t_out, t_th])
+
+    # Eventos por alvo em ordem de tempo (0 = entrada, 1 = exato, 2 = saída)
+    cols = np.concatenate([t_in, t_ex, t_out])
+    times = np.concatenate([entry, exact, exit_])
+    kinds = np.concatenate([np.zeros(len(t_in), int), np.ones(len(t_ex), int), np.full(len(t_out), 2)])
+    order = np.lexsort((kinds, times, cols))
+
+    transits = []
+    open_windows = {int(t): Transit(body, natal_bodies[natal_idx[t]], table.names[aspect_idx[t]], None, [], None)
+                    for t in np.nonzero(inside[0])[0]}
+    for col, jd, kind in zip(cols[order].tolist(), times[order].tolist(), kinds[order].tolist()):
+        if kind == 0:
+            open_windows[col] = Transit(body, natal_bodies[natal_idx[col]], table.names[aspect_idx[col]], jd, [], None)
+        elif col in open_windows:
+            if kind == 1:
+                open_windows[col].exact.append(jd)
+            else:
+                transits.append(open_windows.pop(col)._replace(exit=jd))
+    transits.extend(open_windows.values())
+    # A janela lida tem uma amostra a mais em cada ponta: descarta o que não toca o período
+    return [
+        t for t in transits
+        if (t.entry is None or t.entry <= jd_end) and (t.exit is None or t.exit >= jd_start)
+    ]
+
+
+def find_transits(tables: EphemerisTables, natal_lon: Sequence[float], natal_bodies: Sequence[str],
+                  jd_start: float, jd_end: float, table: Optional[AspectTable] = None,
+                  bodies: Optional[Sequence[str]] = None) -> List[Transit]:
+    """
+    Todos os aspectos de trânsito -> natal ativos entre jd_start e jd_end,
+    ordenados pelo início (entrada ou início do período).
+    """
+    table = table or transit_table()
+    targets, natal_idx, aspect_idx, orbs = sensitive_points(natal_lon, table)
+    transits = []
+    for body in bodies or TRANSIT_BODIES:
+        transits.extend(_body_transits(tables, body, targets, natal_idx, aspect_idx, orbs,
+                                       list(natal_bodies), table, jd_start, jd_end))
+    transits.sort(key=lambda t: (t.entry if t.entry is not None else jd_start, t.transit, t.natal))
+    return transits
+
+
+def search_transits(natal_lon: Sequence[float], natal_bodies: Sequence[str], jd_start: float, jd_end: float,
+                    orb: float = TRANSIT_ORB, bodies: Optional[Sequence[str]] = None) -> List[Transit]:
+    """find_transits com as tabelas do processo (ponto de entrada para o pool de CPU)."""
+    return find_transits(get_ephemeris_tables(), natal_lon, natal_bodies, jd_start, jd_end,
+                         transit_table(orb), bodies)
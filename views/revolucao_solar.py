@@ -1,5 +1,82 @@
 import streamlit as st
+import requests
+from datetime import date
+
+# URL da API no Railway
+API_URL = "https://api-mapa-astral-production.up.railway.app"
+
 
 def render():
     st.title("☀️ Revolução Solar")
-    st.info("Em breve: Análise completa do seu ano pessoal.")
+    st.caption("O mapa do momento exato em que o Sol volta à posição do seu nascimento: o tema do seu ano pessoal.")
+
+    with st.form("form_revolucao"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            cidade = st.text_input("Cidade de Nascimento")
+            data_nasc = st.text_input("Data (DD/MM/AAAA)", placeholder="Ex: 29/10/1981")
+        with col2:
+            pais = st.text_input("País", value="Brazil")
+            hora_nasc = st.text_input("Hora (HH:MM)", placeholder="Ex: 05:45")
+        with col3:
+            ano = st.number_input("Ano da Revolução", min_value=1900, max_value=2200, value=date.today().year, step=1)
+            cidade_rs = st.text_input("Cidade onde vai passar o aniversário", placeholder="Opcional")
+
+        submit = st.form_submit_button("✨ Calcular Revolução Solar", use_container_width=True)
+
+    if not submit:
+        return
+
+    if not data_nasc or not hora_nasc or not cidade:
+        st.warning("Preencha todos os dados!")
+        st.stop()
+
+    payload = {
+        "birth_data": {"date": data_nasc, "time": hora_nasc, "city": cidade, "country": pais},
+        "year": int(ano),
+    }
+    if cidade_rs:
+        payload["city"] = cidade_rs
+        payload["country"] = pais
+
+    with st.spinner("Consultando os astros..."):
+        try:
+            response = requests.post(f"{API_URL}/solar-return", json=payload, timeout=60)
+        except Exception as e:
+            st.error(f"Erro de conexão: {e}")
+            return
+
+    if response.status_code != 200:
+        st.error(f"Erro no cálculo: {response.text}")
+        return
+
+    revolucao = response.json()[0]
+    mapa = revolucao["chart"]
+    st.success(f"Revolução Solar {revolucao['year']}: {revolucao['local_time']} (hora local)")
+
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.subheader("Posições Planetárias")
+        st.dataframe(
+            [
+                {
+                    "Ponto": p["planet"],
+                    "Signo": p["sign"],
+                    "Grau": f"{p['degree']}°",
+                    "Casa": p["house"],
+                    "Retrógrado": "Sim" if p["retrograde"] else "Não",
+                }
+                for p in mapa["positions"]
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+    with col_b:
+        st.subheader("Casas")
+        st.dataframe(
+            [{"Casa": h["house"], "Signo": h["sign"], "Grau": f"{h['degree']}°"} for h in mapa["houses"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+        st.subheader("Elementos")
+        st.bar_chart(mapa["elements"])
@@ -1,5 +1,92 @@
 import streamlit as st
+import requests
+
+# URL da API no Railway
+API_URL = "https://api-mapa-astral-production.up.railway.app"
+
+ASPECT_ICONS = {
+    "Conjunção": "☌", "Oposição": "☍", "Quadratura": "□", "Trígono": "△", "Sextil": "⚹"
+}
+
+
+def dados_pessoa(titulo, chave):
+    st.subheader(titulo)
+    nome = st.text_input("Nome", key=f"{chave}_nome")
+    data = st.text_input("Data (DD/MM/AAAA)", placeholder="Ex: 29/10/1981", key=f"{chave}_data")
+    hora = st.text_input("Hora (HH:MM)", placeholder="Ex: 05:45", key=f"{chave}_hora")
+    cidade = st.text_input("Cidade de Nascimento", key=f"{chave}_cidade")
+    pais = st.text_input("País", value="Brazil", key=f"{chave}_pais")
+    return {
+        "name": nome or titulo,
+        "birth_data": {"date": data, "time": hora, "city": cidade, "country": pais},
+    }
+
 
 def render():
     st.title("❤️ Sinastria")
-    st.info("Em breve: Análise de compatibilidade entre mapas.")
+    st.caption("Como os planetas de duas pessoas conversam entre si e em que área da vida do outro cada um atua.")
+
+    with st.form("form_sinastria"):
+        col1, col2 = st.columns(2)
+        with col1:
+            pessoa = dados_pessoa("Pessoa 1", "p1")
+        with col2:
+            parceiro = dados_pessoa("Pessoa 2", "p2")
+        submit = st.form_submit_button("✨ Comparar Mapas", use_container_width=True)
+
+    if not submit:
+        return
+
+    if not all(pessoa["birth_data"].values()) or not all(parceiro["birth_data"].values()):
+        st.warning("Preencha todos os dados!")
+        st.stop()
+
+    with st.spinner("Consultando os astros..."):
+        try:
+            response = requests.post(
+                f"{API_URL}/synastry",
+                json={"person": pessoa, "partners": [parceiro]},
+                timeout=60,
+            )
+        except Exception as e:
+            st.error(f"Erro de conexão: {e}")
+            return
+
+    if response.status_code != 200:
+        st.error(f"Erro no cálculo: {response.text}")
+        return
+
+    resultado = response.json()[0]
+    nome1, nome2 = pessoa["name"], parceiro["name"]
+
+    st.subheader(f"Aspectos entre {nome1} e {nome2}")
+    aspectos = sorted(resultado["aspects"], key=lambda a: a["orb"])
+    st.dataframe(
+        [
+            {
+                nome1: a["planet1"],
+                "Aspecto": f"{ASPECT_ICONS.get(a['aspect_type'], '')} {a['aspect_type']}",
+                nome2: a["planet2"],
+                "Orbe": f"{a['orb']}°",
+            }
+            for a in aspectos
+        ],
+        use_container_width=True,
+        hide_index=True,
+    )
+
+    col_a, col_b = st.columns(2)
+    with col_a:
+        st.subheader(f"Planetas de {nome1} nas casas de {nome2}")
+        st.dataframe(
+            [{"Planeta": o["planet"], "Casa": o["house"]} for o in resultado["person_in_partner_houses"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+    with col_b:
+        st.subheader(f"Planetas de {nome2} nas casas de {nome1}")
+        st.dataframe(
+            [{"Planeta": o["planet"], "Casa": o["house"]} for o in resultado["partner_in_person_houses"]],
+            use_container_width=True,
+            hide_index=True,
+        )
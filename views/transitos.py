@@ -1,5 +1,80 @@
 import streamlit as st
+import requests
+from datetime import date, datetime, timedelta
+
+# URL da API no Railway
+API_URL = "https://api-mapa-astral-production.up.railway.app"
+
+ASPECT_ICONS = {
+    "Conjunção": "☌", "Oposição": "☍", "Quadratura": "□", "Trígono": "△", "Sextil": "⚹"
+}
+
+
+def formatar_data(valor):
+    if not valor:
+        return "—"
+    return datetime.fromisoformat(valor.replace("Z", "+00:00")).strftime("%d/%m/%Y %H:%M")
+
 
 def render():
     st.title("🪐 Trânsitos")
-    st.info("Em breve: Previsões baseadas nos movimentos planetários atuais.")
+    st.caption("Aspectos dos planetas em trânsito sobre o seu mapa natal, com entrada, momento exato e saída (horários em UTC).")
+
+    with st.form("form_transitos"):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            cidade = st.text_input("Cidade de Nascimento")
+            data_nasc = st.text_input("Data (DD/MM/AAAA)", placeholder="Ex: 29/10/1981")
+        with col2:
+            pais = st.text_input("País", value="Brazil")
+            hora_nasc = st.text_input("Hora (HH:MM)", placeholder="Ex: 05:45")
+        with col3:
+            inicio = st.date_input("Início do período", value=date.today())
+            fim = st.date_input("Fim do período", value=date.today() + timedelta(days=90))
+        orbe = st.slider("Orbe (graus)", min_value=0.5, max_value=3.0, value=1.0, step=0.5)
+
+        submit = st.form_submit_button("✨ Calcular Trânsitos", use_container_width=True)
+
+    if not submit:
+        return
+
+    if not data_nasc or not hora_nasc or not cidade:
+        st.warning("Preencha todos os dados!")
+        st.stop()
+
+    payload = {
+        "birth_data": {"date": data_nasc, "time": hora_nasc, "city": cidade, "country": pais},
+        "start": inicio.isoformat(),
+        "end": fim.isoformat(),
+        "orb": orbe,
+    }
+
+    with st.spinner("Consultando os astros..."):
+        try:
+            response = requests.post(f"{API_URL}/transits", json=payload, timeout=60)
+        except Exception as e:
+            st.error(f"Erro de conexão: {e}")
+            return
+
+    if response.status_code != 200:
+        st.error(f"Erro no cálculo: {response.text}")
+        return
+
+    transitos = response.json()
+    if not transitos:
+        st.info("Nenhum trânsito no período.")
+        return
+
+    st.success(f"{len(transitos)} trânsitos encontrados")
+    linhas = [
+        {
+            "Trânsito": t["transit_planet"],
+            "Aspecto": f"{ASPECT_ICONS.get(t['aspect_type'], '')} {t['aspect_type']}",
+            "Natal": t["natal_planet"],
+            "Entrada": formatar_data(t["entry"]),
+            "Exato": ", ".join(formatar_data(e) for e in t["exact"]) or "—",
+            "Saída": formatar_data(t["exit"]),
+        }
+        for t in transitos
+    ]
+    st.dataframe(linhas, use_container_width=True, hide_index=True)